@@ -0,0 +1,136 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+Every generator takes a seed, so the same arguments always produce the
+same data and runs on different machines stay comparable.
+"""
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+from finance_core.instrument_master import CSV_PATH
+from finance_core.price_store import FakeProvider
+
+CATEGORIES = ["Food", "Rent", "Travel", "Shopping", "Utilities", "Health", "Fuel", "Entertainment",
+              "Salary", "Freelance Income", "Interest Credit", "Insurance", "Education", "Groceries"]
+
+
+def make_master(rows, seed=0, base_path=CSV_PATH):
+    """
+    Instrument master of `rows` rows, scaled from the real CSV: rows are
+    drawn from it with replacement and numbered copies get suffixed symbols,
+    so the symbol/company vocabulary stays realistic.
+    """
+    base = pd.read_csv(base_path, dtype=str, keep_default_na=False)
+    rng = np.random.default_rng(seed)
+    if rows <= len(base):
+        return base.iloc[np.sort(rng.choice(len(base), rows, replace=False))].reset_index(drop=True)
+
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    copy = pd.Series(np.arange(rows) // len(base), dtype=str)
+    suffix = np.where(copy == "0", "", "-" + copy)
+    df["Symbol"] = df["Symbol"] + suffix
+    df["Yahoo_Ticker"] = df["Yahoo_Ticker"].where(df["Yahoo_Ticker"] == "", df["Yahoo_Ticker"] + suffix)
+    return df
+
+
+def make_holdings(symbols, lots, seed=0, start="1995-01-02", end="2024-12-31"):
+    """
+    Lot dicts (symbol, buy_date, units) spread over the given symbols and dates.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end)
+    return [
+        {"symbol": symbols[s], "buy_date": days[d], "units": float(u)}
+        for s, d, u in zip(rng.integers(0, len(symbols), lots), rng.integers(0, len(days), lots),
+                           rng.uniform(1, 100, lots).round(3))
+    ]
+
+
+def make_transactions(symbols, count, seed=0, start="1995-01-02", end="2024-12-31"):
+    """
+    Ledger transactions over the given symbols: mostly buys, with sells of
+    part of the units held at the time, occasional splits and dividends.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end)
+    dates = days[np.sort(rng.integers(0, len(days), count))]
+    picks = rng.integers(0, len(symbols), count)
+    kinds = rng.choice(["buy", "sell", "split", "dividend"], count, p=[0.6, 0.25, 0.01, 0.14])
+    held = {}
+    transactions = []
+    for date, s, kind in zip(dates, picks, kinds):
+        symbol = symbols[s]
+        units = held.get(symbol, 0.0)
+        if kind == "buy" or units == 0:
+            bought = round(float(rng.uniform(1, 100)), 3)
+            held[symbol] = units + bought
+            transactions.append({"date": date, "symbol": symbol, "type": "buy", "units": bought,
+                                 "price": float(rng.uniform(10, 1000))})
+        elif kind == "sell":
+            sold = units * float(rng.uniform(0.1, 0.5))
+            held[symbol] = units - sold
+            transactions.append({"date": date, "symbol": symbol, "type": "sell", "units": sold,
+                                 "price": float(rng.uniform(10, 1000))})
+        elif kind == "split":
+            held[symbol] = units * 2
+            transactions.append({"date": date, "symbol": symbol, "type": "split", "ratio": 2})
+        else:
+            transactions.append({"date": date, "symbol": symbol, "type": "dividend",
+                                 "amount": float(units * rng.uniform(1, 20))})
+    return transactions
+
+
+def make_statement(rows, seed=0, start="2015-01-01", date_format="%d/%m/%Y %H:%M"):
+    """
+    Bank statement with bank-style headers, a non-ISO date format and a
+    few noise columns, sorted by date like a real export.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+    seconds = np.sort(rng.integers(0, 10 * 365 * 24 * 3600, rows))
+    dates = start + pd.to_timedelta(seconds, unit="s")
+    return pd.DataFrame({
+        "Txn Date": dates.strftime(date_format),
+        "Reference": rng.integers(10 ** 9, 10 ** 10, rows).astype(str),
+        "Particulars": np.asarray(CATEGORIES)[rng.integers(0, len(CATEGORIES), rows)],
+        "Amount (INR)": rng.gamma(2.0, 900.0, rows).round(2),
+        "Balance": rng.uniform(0, 1e6, rows).round(2),
+    })
+
+
+class FakeTicker:
+    """
+    Stand-in for yfinance.Ticker backed by FakeProvider, returning frames
+    shaped like yfinance's: a tz-aware index plus Dividends and Stock Splits.
+    """
+
+    def __init__(self, symbol, provider):
+        self.ticker = symbol
+        self._provider = provider
+
+    def history(self, period="max", start=None, **kwargs):
+        # Only the calls YahooProvider makes are supported: period="max" or start=.
+        hist = self._provider.fetch(self.ticker, start=start).copy()
+        hist.index = hist.index.tz_localize("America/New_York")
+        hist["Dividends"] = 0.0
+        hist["Stock Splits"] = 0.0
+        return hist
+
+    @property
+    def fast_info(self):
+        return {"last_price": float(self._provider.fetch(self.ticker)["Close"].iloc[-1])}
+
+
+def install_fake_yfinance(start="1995-01-02", end="2024-12-31"):
+    """
+    Registers a fake `yfinance` module so YahooProvider runs its real code
+    path without network access. Returns the module.
+    """
+    provider = FakeProvider(start=start, end=end)
+    module = types.ModuleType("yfinance")
+    module.Ticker = lambda symbol: FakeTicker(symbol, provider)
+    sys.modules["yfinance"] = module
+    return module
@@ -0,0 +1,284 @@
+"""
+Benchmarks for the hot paths of FinanceApp on synthetic data.
+
+    python bench/run.py                          # quick profile
+    python bench/run.py --profile full           # 1M-row master, 2M-row ledger
+    python bench/run.py --output new.json --compare bench/baseline.json
+
+Results are written as JSON (one record per benchmark and size, with
+min/median/mean seconds) so runs can be compared; --compare exits non-zero
+when any median is slower than the baseline by more than --threshold.
+No network access is needed: prices come from a fake yfinance module.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from generators import install_fake_yfinance, make_holdings, make_master, make_statement, make_transactions
+
+PROFILES = {
+    "quick": {
+        "master_rows": [18_937, 100_000],
+        "history_symbols": 20,
+        "lots": 500,
+        "statement_rows": 200_000,
+        "repeat": 3,
+    },
+    "full": {
+        "master_rows": [18_937, 100_000, 1_000_000],
+        "history_symbols": 200,
+        "lots": 5_000,
+        "statement_rows": 2_000_000,
+        "repeat": 5,
+    },
+}
+
+# Searches typed into the search bar: symbols, prefixes, company words and typos.
+QUERIES = ["AAPL", "aa", "MSFT", "Micro", "bank", "Acquisition", "tesla", "NVD", "Alphabet", "gold etf",
+           "HDFC", "reliance", "Vanguard", "amzn", "Appel", "nifty 50", "Z", "income fund", "pharma", "tech"]
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+class Recorder:
+    def __init__(self):
+        self.results = []
+
+    def add(self, name, times, **params):
+        record = {
+            "name": name,
+            "params": params,
+            "repeat": len(times),
+            "min_s": min(times),
+            "median_s": statistics.median(times),
+            "mean_s": statistics.fmean(times),
+        }
+        self.results.append(record)
+        label = ", ".join(f"{k}={v}" for k, v in params.items())
+        print(f"{name:<28} {label:<40} median {record['median_s'] * 1000:10.2f} ms", flush=True)
+
+    def run(self, name, fn, repeat, **params):
+        self.add(name, measure(fn, repeat), **params)
+
+
+@contextmanager
+def working_dir(path):
+    # The stores use paths relative to the repo root, e.g. data/prices.sqlite.
+    previous = os.getcwd()
+    os.makedirs(os.path.join(path, "data"), exist_ok=True)
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def bench_master(rec, rows, repeat, base_path):
+    from finance_core.instrument_master import build_master, load_master, read_master_csv
+    from finance_core.search_index import SearchIndex
+
+    csv_path, arrow_path = "data/master.csv", "data/master.arrow"
+    make_master(rows, base_path=base_path).to_csv(csv_path, index=False)
+
+    rec.run("master_read_csv", lambda: read_master_csv(csv_path), repeat, rows=rows)
+    rec.run("master_build_arrow", lambda: build_master(csv_path, arrow_path), 1, rows=rows)
+    rec.run("load_stock_data", lambda: load_master(csv_path, arrow_path), repeat, rows=rows)
+
+    master = load_master(csv_path, arrow_path)
+    rec.run("search_index_build", lambda: SearchIndex(master), repeat, rows=rows)
+
+    index = SearchIndex(master)
+    times = [t / len(QUERIES) for t in measure(lambda: [index.search(q) for q in QUERIES], repeat)]
+    rec.add("search_lookup", times, rows=rows, queries=len(QUERIES))
+
+
+def bench_prices(rec, symbols, lots, repeat):
+    from finance_core.fx import FakeFxProvider, FxStore
+    from finance_core.portfolio import fetch_closes, portfolio_values
+    from finance_core.portfolio_store import PortfolioStore
+    from finance_core.price_store import PriceStore, YahooProvider
+    from finance_core.risk import risk_report
+    from finance_core.screener import scan
+    from finance_core.transactions import TransactionLedger, xirr
+    from finance_core.valuation import align_closes, value_portfolio
+
+    names = [f"SYN{i:04d}" for i in range(symbols)]
+    store = PriceStore(path="data/prices.sqlite", provider=YahooProvider())
+
+    rec.run("price_store_cold_fill", lambda: store.histories(names), 1, symbols=symbols, years=30)
+    rec.run("price_store_warm_read", lambda: store.histories(names), repeat, symbols=symbols, years=30)
+
+    closes, _ = fetch_closes(store, names)
+    holdings = make_holdings(names, lots)
+    rec.run("align_closes", lambda: align_closes(closes), repeat, symbols=symbols, years=30)
+    rec.run("value_portfolio", lambda: value_portfolio(closes, holdings), repeat,
+            symbols=symbols, lots=lots, years=30)
+    # Synthetic tickers are bare, so every one of them is converted from USD.
+    fx = FxStore(path="data/fx.sqlite", provider=FakeFxProvider())
+    rec.run("value_portfolio_fx", lambda: value_portfolio(closes, holdings, fx.convert), repeat,
+            symbols=symbols, lots=lots, years=30)
+    rec.run("risk_report", lambda: risk_report(closes, holdings, closes[names[0]]), repeat,
+            symbols=symbols, lots=lots, years=30)
+
+    transactions = make_transactions(names, lots)
+    ledger = TransactionLedger(transactions)
+    prices = {symbol: float(close.iloc[-1]) for symbol, close in closes.items()}
+    rec.run("ledger_build", lambda: TransactionLedger(transactions), repeat, transactions=lots)
+    rec.run("ledger_positions", lambda: ledger.positions(prices), repeat, symbols=symbols, transactions=lots)
+    values = ledger.positions(prices)["Market Value"].to_dict()
+    rec.run("ledger_xirr", lambda: ledger.money_weighted_returns(values, as_of="2025-01-01"), repeat,
+            symbols=symbols, transactions=lots)
+
+    portfolios = PortfolioStore(path="data/portfolios.sqlite")
+    portfolio_id = portfolios.create("bench")
+    portfolios.add_transactions(portfolio_id, transactions)
+    rec.run("portfolio_snapshot_build", lambda: portfolio_values(store, portfolios, portfolio_id, fx=fx), 1,
+            symbols=symbols, transactions=lots, years=30)
+    rec.run("portfolio_snapshot_reopen", lambda: portfolio_values(store, portfolios, portfolio_id, fx=fx),
+            repeat, symbols=symbols, transactions=lots, years=30)
+
+    # Many portfolios' cash flows solved in one batch.
+    rng = np.random.default_rng(0)
+    amounts = -rng.uniform(10, 100, (1_000, 500))
+    amounts[:, -1] = -amounts.sum(axis=1) * rng.uniform(0.8, 2.0, 1_000)
+    years = np.sort(rng.uniform(0, 10, (1_000, 500)), axis=1)
+    years -= years[:, :1]
+    rec.run("xirr_batch", lambda: xirr(amounts, years), repeat, schedules=1_000, flows=500)
+
+    def full_scan():
+        if os.path.exists("data/screener.arrow"):
+            os.remove("data/screener.arrow")
+        scan(store)
+    rec.run("screener_scan", full_scan, repeat, symbols=symbols, years=30)
+    rec.run("screener_rescan", lambda: scan(store), repeat, symbols=symbols, years=30)
+
+
+def bench_expenses(rec, rows, repeat):
+    import pandas as pd
+
+    from finance_core.expense_ingest import iter_chunks
+    from finance_core.expense_ledger import ExpenseLedger
+    from finance_core.expense_rules import DEFAULT_RULES_TEXT, RuleSet
+    from finance_core.expense_schema import detect_columns, infer_schema
+
+    statement = make_statement(rows)
+    data = statement.to_csv(index=False).encode()
+    sample = pd.read_csv(io.BytesIO(data), nrows=1_000)
+
+    rec.run("detect_columns", lambda: detect_columns(sample), repeat, rows=len(sample))
+
+    schema = infer_schema(sample)
+    cols = (schema["date_col"], schema["category_col"], schema["amount_col"])
+    rules = RuleSet.parse(DEFAULT_RULES_TEXT)
+    rec.run("parse_statement", lambda: sum(len(chunk) for chunk in iter_chunks(
+        io.BytesIO(data), "statement.csv", *cols, date_format=schema["date_format"]
+    )), repeat, rows=rows)
+
+    ledger = ExpenseLedger(path="data/expense_ledger.sqlite")
+    ledger.clear()
+    rec.run("ledger_append", lambda: ledger.append_statement(
+        "bench", io.BytesIO(data), "statement.csv", *cols, date_format=schema["date_format"]
+    ), 1, rows=rows)
+
+    rec.run("ledger_category_totals", lambda: ledger.category_totals(2020), repeat, rows=rows)
+    for by in ["Month", "Week", "Day"]:
+        rec.run("ledger_income_expense", lambda: ledger.income_expense(rules, 2020, 6, by=by),
+                repeat, rows=rows, by=by)
+    rec.run("ledger_month_rows", lambda: ledger.month_rows(2020, 6), repeat, rows=rows)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints median ratios against a baseline run; returns the regressions.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["name"], json.dumps(r["params"], sort_keys=True)): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for r in results:
+        old = baseline.get((r["name"], json.dumps(r["params"], sort_keys=True)))
+        if old is None:
+            continue
+        ratio = r["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        flag = " REGRESSION" if ratio > threshold else ""
+        print(f"{r['name']:<28} {json.dumps(r['params']):<40} x{ratio:5.2f}{flag}")
+        if flag:
+            regressions.append(r)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", nargs="+", choices=["master", "prices", "expenses"],
+                        default=["master", "prices", "expenses"])
+    parser.add_argument("--output", default="bench/results.json")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed median slowdown ratio")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    base_path = os.path.abspath("data/combined_stocks_yahoo.csv")
+    output = os.path.abspath(args.output)
+    install_fake_yfinance()
+
+    rec = Recorder()
+    with tempfile.TemporaryDirectory() as tmp, working_dir(tmp):
+        if "master" in args.only:
+            for rows in profile["master_rows"]:
+                bench_master(rec, rows, profile["repeat"], base_path)
+        if "prices" in args.only:
+            bench_prices(rec, profile["history_symbols"], profile["lots"], profile["repeat"])
+        if "expenses" in args.only:
+            bench_expenses(rec, profile["statement_rows"], profile["repeat"])
+
+    report = {
+        "profile": args.profile,
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "results": rec.results,
+    }
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Wrote {len(rec.results)} results to {args.output}")
+
+    if args.compare and compare(rec.results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
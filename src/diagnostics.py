@@ -0,0 +1,49 @@
+import streamlit as st
+import pandas as pd
+from finance_core import telemetry
+from utils import get_quote_cache
+
+
+def _hit_ratio(hits, misses):
+    total = hits + misses
+    return f"{hits / total:.0%}" if total else "–"
+
+
+def diagnostics_page():
+    st.title(" Diagnostics")
+
+    tel = telemetry.get_telemetry()
+    st.caption(f"Timing spans for this server process; every span is also logged to `{tel.log_path}`.")
+
+    if st.button("Reset counters"):
+        tel.reset()
+
+    snapshot = tel.snapshot()
+    counters = snapshot["counters"]
+
+    # --- Cache effectiveness ---
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Quote cache hit ratio",
+                _hit_ratio(counters.get("quote_cache.hit", 0), counters.get("quote_cache.miss", 0)))
+    col2.metric("Price store served from disk",
+                _hit_ratio(counters.get("price_store.fresh", 0), counters.get("price_store.fetch", 0)))
+    master_calls = counters.get("load_stock_data.call", 0)
+    master_misses = counters.get("load_stock_data.miss", 0)
+    col3.metric("Master cache hit ratio", _hit_ratio(master_calls - master_misses, master_misses))
+    stats = get_quote_cache().stats()
+    col4.metric("Quote cache size", f"{stats['bytes'] / 2**20:.1f} MiB",
+                f"{stats['entries']} entries, {stats['watched']} watched", delta_color="off")
+
+    # --- Spans ---
+    st.markdown("### Spans")
+    if snapshot["spans"]:
+        spans = pd.DataFrame(snapshot["spans"]).set_index("span")
+        st.dataframe(spans.round(2), use_container_width=True)
+    else:
+        st.info("No spans recorded yet. Use the other pages, then come back.")
+
+    st.markdown("### Counters")
+    st.dataframe(pd.Series(counters, name="count", dtype="int64"), use_container_width=True)
+
+    with st.expander("Recent spans"):
+        st.dataframe(pd.DataFrame(snapshot["recent"]), use_container_width=True, height=400)
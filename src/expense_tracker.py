@@ -1,44 +1,175 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime
 import calendar
+import hashlib
+import re
+from finance_core import telemetry
+from finance_core.expense_ingest import SAMPLE_ROWS, read_sample
+from finance_core.expense_ledger import ExpenseLedger
+from finance_core.expense_rules import DEFAULT_RULES_TEXT, RuleSet
+from finance_core.expense_schema import infer_schema
+from utils import show_chart
+
+
+# Chart title adjective for each "Group By" option.
+GRANULARITY_TITLES = {"Day": "Daily", "Week": "Weekly", "Month": "Monthly"}
+
+
+@st.cache_data(show_spinner=False)
+def load_statement_schema(content_hash, _file, name):
+    """
+    Infers an uploaded statement's schema once per distinct file content.
+    """
+    telemetry.count("statement_schema.miss")
+    return infer_schema(read_sample(_file, name, nrows=SAMPLE_ROWS))
+
+
+@st.cache_resource
+def get_expense_ledger():
+    """
+    Returns the process-wide persistent expense ledger.
+    """
+    return ExpenseLedger()
+
+
+def content_hash(uploaded_file):
+    """
+    SHA-256 of an upload's bytes, computed once per upload and kept in session state.
+    """
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    if uploaded_file.file_id not in hashes:
+        hashes[uploaded_file.file_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return hashes[uploaded_file.file_id]
+
+
+@telemetry.timed("figure.build.expense")
+def income_expense_figure(summary, labels, graph_type, granularity, chart_title):
+    """
+    Income vs expense bar or line chart for one summary from ExpenseLedger.income_expense.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    if graph_type == "Bar Chart":
+        fig.add_trace(go.Bar(
+            x=labels,
+            y=summary.get("Income", 0),
+            name="Income",
+            marker_color="#313536"  # Sky Blue
+        ))
+        fig.add_trace(go.Bar(
+            x=labels,
+            y=summary.get("Expense", 0),
+            name="Expense",
+            marker_color="#07472A"  # Red
+        ))
+        fig.update_layout(barmode='group')
+    else:
+        fig.add_trace(go.Scatter(
+            x=labels,
+            y=summary.get("Income", 0),
+            mode='lines+markers',
+            name="Income",
+            line=dict(color='#1f77b4', width=3),
+            marker=dict(color='white', line=dict(color='#1f77b4', width=2))
+        ))
+        fig.add_trace(go.Scatter(
+            x=labels,
+            y=summary.get("Expense", 0),
+            mode='lines+markers',
+            name="Expense",
+            line=dict(color='#d62728', width=3),
+            marker=dict(color='white', line=dict(color='#d62728', width=2))
+        ))
+
+    fig.update_layout(
+        title=chart_title,
+        xaxis_title=granularity,
+        yaxis_title="Amount (₹)",
+        plot_bgcolor="#111111",
+        paper_bgcolor="#111111",
+        font=dict(color="#e0e0e0"),
+        xaxis=dict(showgrid=True, gridcolor="#333"),
+        yaxis=dict(showgrid=True, gridcolor="#333"),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5)
+    )
+    return fig
 
 
-def detect_columns(df):
-    date_col, category_col, amount_col = None, None, None
-
-    # Detect Date column
-    for col in df.columns:
-        try:
-            parsed = pd.to_datetime(df[col], errors='coerce')
-            if parsed.notnull().sum() > len(df) * 0.5:
-                date_col = col
-                break
-        except Exception:
-            continue
-
-    # Detect Amount column (numeric)
-    for col in df.columns:
-        if col != date_col and pd.api.types.is_numeric_dtype(df[col]):
-            amount_col = col
-            break
-
-    # Detect Category column (non-numeric, not date)
-    for col in df.columns:
-        if col not in [date_col, amount_col]:
-            category_col = col
-            break
+def expense_tracker_page():
+    st.title(" Expense Tracker")
 
-    return date_col, category_col, amount_col
+    ledger = get_expense_ledger()
 
+    # Clearing the ledger bumps the uploader's key so the file still shown
+    # in it is dropped rather than ingested again on the rerun.
+    uploader_key = f"expense_upload_{st.session_state.setdefault('expense_upload_generation', 0)}"
+    uploaded_file = st.file_uploader("📎 Upload CSV or Excel file (must include Date, Category, Amount)", type=["csv", "xlsx"],
+                                     key=uploader_key)
 
-def expense_tracker_page():
-    st.title(" Expense Tracker")
+    with st.expander("⚙️ Income/Expense Rules"):
+        rules_text = st.text_area(
+            "One rule per line as `Label: keyword, keyword` or `Label: re:<pattern>`. "
+            "Categories matching no rule count as Expense.",
+            value=DEFAULT_RULES_TEXT, key="expense_rules"
+        )
+    try:
+        rules = RuleSet.parse(rules_text)
+    except re.error as e:
+        st.error(f"❌ Invalid rule pattern: {e}")
+        return
 
+    if uploaded_file is not None:
+        file_hash = content_hash(uploaded_file)
+        if not ledger.has_upload(file_hash):
+            try:
+                schema = load_statement_schema(file_hash, uploaded_file, uploaded_file.name)
+            except Exception as e:
+                st.error(f"❌ Failed to read file: {e}")
+                return
+
+            date_col, category_col, amount_col = schema["date_col"], schema["category_col"], schema["amount_col"]
+            if not all([date_col, category_col, amount_col]):
+                st.error("❌ Could not detect required columns (Date, Category, Amount). Try renaming them.")
+                return
+
+            try:
+                added, skipped, invalid = ledger.append_statement(
+                    file_hash, uploaded_file, uploaded_file.name,
+                    date_col, category_col, amount_col, date_format=schema["date_format"]
+                )
+            except Exception as e:
+                st.error(f"❌ Failed to read file: {e}")
+                return
+            st.success(f"✅ Added {added:,} entries to your ledger ({skipped:,} duplicates skipped).")
+            if invalid:
+                st.warning(f"⚠️ Skipped {invalid:,} rows without a valid date or amount.")
+
+    if ledger.is_empty():
+        st.info(" Upload a statement to start your expense ledger.")
+        return
+
+    if st.button("🗑️ Clear Ledger"):
+        ledger.clear()
+        st.session_state.expense_upload_generation += 1
+        st.rerun()
+
+    month_view(ledger, rules)
+
+
+@st.fragment
+def month_view(ledger, rules):
+    """
+    Month arrows and everything that depends on the selected month; moving
+    between months or changing the chart options reruns only this fragment.
+    """
     # Initialize month selector state
     if "selected_month" not in st.session_state:
         st.session_state.selected_month = datetime.now().month
+    if "selected_year" not in st.session_state:
+        st.session_state.selected_year = datetime.now().year
 
     with st.container():
         st.markdown("####  Select Month")
@@ -46,10 +177,23 @@ def expense_tracker_page():
 
         with col1:
             if st.button("⬅️", use_container_width=True):
-                st.session_state.selected_month = 12 if st.session_state.selected_month == 1 else st.session_state.selected_month - 1
+                if st.session_state.selected_month == 1:
+                    st.session_state.selected_month = 12
+                    st.session_state.selected_year -= 1
+                else:
+                    st.session_state.selected_month -= 1
+
+        with col3:
+            if st.button("➡️", use_container_width=True):
+                if st.session_state.selected_month == 12:
+                    st.session_state.selected_month = 1
+                    st.session_state.selected_year += 1
+                else:
+                    st.session_state.selected_month += 1
 
         with col2:
             selected_month = st.session_state.selected_month
+            selected_year = st.session_state.selected_year
             month_name = calendar.month_name[selected_month]
             st.markdown(
                 f"""
@@ -62,138 +206,72 @@ def expense_tracker_page():
                     color: white;
                     font-weight: bold;
                     font-size: 20px;'>
-                    {month_name}
+                    {month_name} {selected_year}
                 </div>
                 """,
                 unsafe_allow_html=True
             )
 
-        with col3:
-            if st.button("➡️", use_container_width=True):
-                st.session_state.selected_month = 1 if st.session_state.selected_month == 12 else st.session_state.selected_month + 1
-
     st.markdown("---")
 
-    uploaded_file = st.file_uploader("📎 Upload CSV or Excel file (must include Date, Category, Amount)", type=["csv", "xlsx"])
+    current_month = st.session_state.selected_month
+    current_year = st.session_state.selected_year
 
-    if uploaded_file is not None:
-        try:
-            df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith(".csv") else pd.read_excel(uploaded_file)
-        except Exception as e:
-            st.error(f"❌ Failed to read file: {e}")
-            return
-
-        date_col, category_col, amount_col = detect_columns(df)
-        if not all([date_col, category_col, amount_col]):
-            st.error("❌ Could not detect required columns (Date, Category, Amount). Try renaming them.")
-            return
-
-        df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
-        df = df.dropna(subset=[date_col])
-        df["Month"] = df[date_col].dt.month
-
-        current_month = st.session_state.selected_month
-        filtered_df = df[df["Month"] == current_month]
-
-        if filtered_df.empty:
-            st.info(" No expenses found for this month.")
-            return
-
-        # --- Graph Section ---
-        graph_type = st.radio(" Select Graph Type", ["Bar Chart", "Line Chart"], horizontal=True)
-
-        # Classify income/expense
-        income_keywords = ["income", "salary", "credit"]
-        df["Type"] = df[category_col].apply(lambda x: "Income" if any(k in str(x).lower() for k in income_keywords) else "Expense")
-
-        summary = df.groupby(["Month", "Type"])[amount_col].sum().unstack(fill_value=0).reindex(range(1, 13), fill_value=0)
-        months = [calendar.month_abbr[m] for m in range(1, 13)]
-
-        fig = go.Figure()
-
-        if graph_type == "Bar Chart":
-            fig.add_trace(go.Bar(
-                x=months,
-                y=summary.get("Income", 0),
-                name="Income",
-                marker_color="#313536"  # Sky Blue
-            ))
-            fig.add_trace(go.Bar(
-                x=months,
-                y=summary.get("Expense", 0),
-                name="Expense",
-                marker_color="#07472A"  # Red
-            ))
-            fig.update_layout(barmode='group')
-        else:
-            fig.add_trace(go.Scatter(
-                x=months,
-                y=summary.get("Income", 0),
-                mode='lines+markers',
-                name="Income",
-                line=dict(color='#1f77b4', width=3),
-                marker=dict(color='white', line=dict(color='#1f77b4', width=2))
-            ))
-            fig.add_trace(go.Scatter(
-                x=months,
-                y=summary.get("Expense", 0),
-                mode='lines+markers',
-                name="Expense",
-                line=dict(color='#d62728', width=3),
-                marker=dict(color='white', line=dict(color='#d62728', width=2))
-            ))
-
-        fig.update_layout(
-            title=" Monthly Income vs Expenses",
-            xaxis_title="Month",
-            yaxis_title="Amount (₹)",
-            plot_bgcolor="#111111",
-            paper_bgcolor="#111111",
-            font=dict(color="#e0e0e0"),
-            xaxis=dict(showgrid=True, gridcolor="#333"),
-            yaxis=dict(showgrid=True, gridcolor="#333"),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5)
-        )
+    year_totals = ledger.category_totals(current_year)
+    month_totals = year_totals[year_totals["Month"] == current_month]
 
-        st.plotly_chart(fig, use_container_width=True)
+    if month_totals.empty:
+        st.info(" No expenses found for this month.")
+        return
 
-        # --- Category Cards ---
-        st.markdown("### 🧾 Category Breakdown")
-        category_summary = (
-            filtered_df.groupby(category_col)[amount_col].sum()
-            .reset_index()
-            .rename(columns={category_col: "Category", amount_col: "Total"})
-        )
-        total_amount = category_summary["Total"].sum()
-        cols = st.columns(len(category_summary))
-
-        for idx, row in category_summary.iterrows():
-            with cols[idx]:
-                percent = (row["Total"] / total_amount) * 100
-                st.markdown(
-                    f"""
-                    <div style="padding: 15px; border-radius: 12px; background-color: #222;
-                    border: 1px solid #444; box-shadow: 2px 2px 8px rgba(0,0,0,0.5);
-                    text-align: center; min-height: 100px;">
-                        <h5 style='margin: 0; color: #f0f0f0; font-size: 16px;'>{row["Category"]}</h5>
-                        <p style='margin: 8px 0 4px; font-size: 20px; color: #4caf50; font-weight: bold;'>₹{row["Total"]:,.0f}</p>
-                        <p style='margin: 0; color: #aaaaaa;'>{percent:.1f}%</p>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+    # --- Graph Section ---
+    graph_type = st.radio(" Select Graph Type", ["Bar Chart", "Line Chart"], horizontal=True)
+    granularity = st.radio(" Group By", ["Month", "Week", "Day"], horizontal=True, key="expense_granularity")
 
-        # --- Table View ---
-        st.markdown("###  Expense Table")
-        display_df = filtered_df[[date_col, category_col, amount_col]].copy()
-        display_df.columns = ["Date/Time", "Category", "Amount"]
-        display_df["Date/Time"] = pd.to_datetime(display_df["Date/Time"]).dt.strftime("%Y-%m-%d %H:%M")
+    summary = ledger.income_expense(rules, current_year, current_month, by=granularity)
+    if granularity == "Month":
+        labels = [calendar.month_abbr[m] for m in range(1, 13)]
+        chart_title = f" Monthly Income vs Expenses ({current_year})"
+    else:
+        labels = summary.index.strftime("%d %b").tolist()
+        chart_title = f" {GRANULARITY_TITLES[granularity]} Income vs Expenses ({calendar.month_name[current_month]} {current_year})"
 
-        with st.expander(" View Monthly Expenses", expanded=True):
-            st.dataframe(display_df, use_container_width=True, height=400)
+    fig = income_expense_figure(summary, labels, graph_type, granularity, chart_title)
+    show_chart(fig)
 
-        total = display_df["Amount"].sum()
-        st.markdown(
-            f"<h4 style='text-align:right; color:#4caf50;'> Total: ₹{total:,.2f}</h4>",
-            unsafe_allow_html=True
-        )
+    # --- Category Cards ---
+    st.markdown("### 🧾 Category Breakdown")
+    category_summary = month_totals.groupby("Category", as_index=False)["Total"].sum()
+    total_amount = category_summary["Total"].sum()
+    cols = st.columns(len(category_summary))
+
+    for idx, row in category_summary.iterrows():
+        with cols[idx]:
+            percent = (row["Total"] / total_amount) * 100
+            st.markdown(
+                f"""
+                <div style="padding: 15px; border-radius: 12px; background-color: #222;
+                border: 1px solid #444; box-shadow: 2px 2px 8px rgba(0,0,0,0.5);
+                text-align: center; min-height: 100px;">
+                    <h5 style='margin: 0; color: #f0f0f0; font-size: 16px;'>{row["Category"]}</h5>
+                    <p style='margin: 8px 0 4px; font-size: 20px; color: #4caf50; font-weight: bold;'>₹{row["Total"]:,.0f}</p>
+                    <p style='margin: 0; color: #aaaaaa;'>{percent:.1f}%</p>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+
+    # --- Table View ---
+    st.markdown("###  Expense Table")
+    display_df = ledger.month_rows(current_year, current_month)
+    display_df.columns = ["Date/Time", "Category", "Amount"]
+    display_df["Date/Time"] = display_df["Date/Time"].dt.strftime("%Y-%m-%d %H:%M")
+
+    with st.expander(" View Monthly Expenses", expanded=True):
+        st.dataframe(display_df, use_container_width=True, height=400)
+
+    total = month_totals["Total"].sum()
+    st.markdown(
+        f"<h4 style='text-align:right; color:#4caf50;'> Total: ₹{total:,.2f}</h4>",
+        unsafe_allow_html=True
+    )
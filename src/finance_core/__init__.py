@@ -0,0 +1,25 @@
+"""
+Streamlit-free analytics behind FinanceApp, usable from batch jobs.
+
+    price_store        SQLite store of daily bars and the price providers
+    nav_store          append-only AMFI mutual fund NAV history
+    quote_cache        process-wide cache of quotes and histories
+    valuation          history alignment and vectorized portfolio valuation
+    fx                 FX rate store and currency conversion
+    portfolio          holdings files and store-backed valuation
+    portfolio_store    saved portfolios, transactions and daily value snapshots
+    transactions       transaction ledger, FIFO P&L and batched XIRR
+    risk               portfolio risk and performance analytics
+    comparison         aligned, rebased multi-symbol comparison
+    batch              parallel valuation of many holdings files
+    screener           parallel, incremental universe screener
+    indicators         technical indicators with incremental updates
+    instrument_master  typed Arrow copy of the instrument master
+    search_index       instrument search
+    expense_ingest     chunked statement parsing and aggregation
+    expense_schema     statement column and date format inference
+    expense_rules      income/expense classification rules
+    expense_ledger     persistent expense ledger with rollups
+
+Modules are imported individually so that pages only pay for what they use.
+"""
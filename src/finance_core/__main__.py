@@ -0,0 +1,102 @@
+"""
+Command-line entry point for the headless analytics, run from the repo root:
+
+    PYTHONPATH=src python -m finance_core value clients/ --period 1y --output values.csv
+    PYTHONPATH=src python -m finance_core value clients/ --currency INR
+    PYTHONPATH=src python -m finance_core build-master
+    PYTHONPATH=src python -m finance_core ingest-nav data/tickers_list.csv
+    PYTHONPATH=src python -m finance_core screen --output screen.csv
+"""
+import argparse
+import sys
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m finance_core", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    value = commands.add_parser("value", help="value holdings CSV files (symbol, buy_date, units) in parallel")
+    value.add_argument("holdings", nargs="+", help="holdings CSV files or directories of them")
+    value.add_argument("--period", default="max", help="yfinance-style period, e.g. 1y or max")
+    value.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    value.add_argument("--output", default="-", help="summary CSV path, or - for stdout")
+    value.add_argument("--series-dir", help="also write each portfolio's value series here")
+    value.add_argument("--currency", help="convert every holding into this currency, e.g. INR")
+
+    commands.add_parser("build-master", help="rebuild the Arrow instrument master from the CSV")
+
+    nav = commands.add_parser("ingest-nav", help="append AMFI NAVAll.txt snapshots to the NAV store")
+    nav.add_argument("snapshots", nargs="*", help="NAVAll.txt files, oldest first")
+    nav.add_argument("--download", action="store_true", help="also fetch today's snapshot from AMFI")
+    nav.add_argument("--rebuild-index", action="store_true", help="recreate the index from the partitions")
+
+    screen = commands.add_parser("screen", help="update the screener results from the local price store")
+    screen.add_argument("--fetch", action="store_true",
+                        help="first download history for every instrument in the master")
+    screen.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    screen.add_argument("--output", help="also write the results as CSV")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build-master":
+        from .instrument_master import ARROW_PATH, build_master
+
+        master = build_master()
+        print(f"✅ Wrote {len(master)} instruments to {ARROW_PATH}")
+        return 0
+
+    if args.command == "ingest-nav":
+        from .nav_store import NavStore
+
+        store = NavStore()
+        if args.rebuild_index:
+            print(f"✅ Indexed {store.rebuild_index()} NAVs from the partitions under {store.root}")
+        for path in args.snapshots:
+            print(f"✅ {path}: {store.ingest_file(path)} new NAVs")
+        if args.download:
+            print(f"✅ AMFI: {store.update(force=True)} new NAVs")
+        return 0
+
+    if args.command == "screen":
+        from .price_store import PriceStore
+        from .screener import RESULTS_PATH, scan
+
+        store = PriceStore()
+        if args.fetch:
+            from .instrument_master import load_master, price_symbols
+
+            _, errors = store.histories(price_symbols(load_master()).dropna().unique().tolist())
+            if errors:
+                print(f"⚠️ {len(errors)} instruments failed to download", file=sys.stderr)
+
+        started = time.perf_counter()
+        results, recomputed = scan(store, max_workers=args.workers)
+        if args.output:
+            results.to_csv(args.output, index=False)
+        print(f"✅ Screened {recomputed} changed of {len(results)} instruments in "
+              f"{time.perf_counter() - started:.1f}s; results in {RESULTS_PATH}", file=sys.stderr)
+        return 0
+
+    from .batch import value_files
+
+    fx = None
+    if args.currency:
+        from .fx import FxStore
+
+        fx = FxStore(base=args.currency.upper())
+
+    started = time.perf_counter()
+    summary, problems = value_files(args.holdings, period=args.period, max_workers=args.workers,
+                                    series_dir=args.series_dir, fx=fx)
+    for symbol, problem in problems.items():
+        print(f"⚠️ {symbol}: {problem}", file=sys.stderr)
+
+    summary.to_csv(sys.stdout if args.output == "-" else args.output, index=False)
+    print(f"✅ Valued {len(summary)} portfolios in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Values many holdings files in parallel against one shared price matrix.
+
+Prices for every symbol across all files are fetched once, aligned, and
+saved as a .npy file that each worker memory-maps read-only, so the
+history is shared through the page cache instead of being copied into
+every process.
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .portfolio import fetch_closes, read_holdings
+from .price_store import PriceStore
+from .valuation import align_closes, value_aligned
+
+SUMMARY_COLUMNS = ["portfolio", "lots", "first_date", "last_date", "value", "peak_value", "missing"]
+
+# Per-process view of the shared matrix, set up by _init_worker.
+_shared = {}
+
+
+def holdings_paths(paths):
+    """
+    Expands directories to the .csv files inside them, sorted.
+    """
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(".csv")
+            ))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def _init_worker(matrix_path, dates, symbols):
+    _shared["matrix"] = np.load(matrix_path, mmap_mode="r")
+    _shared["dates"] = pd.DatetimeIndex(dates, name="Date")
+    _shared["symbols"] = symbols
+    _shared["priced"] = set(symbols)
+
+
+def _value_file(task):
+    path, holdings, series_dir = task
+    _, total = value_aligned(_shared["dates"], _shared["symbols"], _shared["matrix"], holdings)
+
+    missing = sorted({h['symbol'] for h in holdings} - _shared["priced"])
+    held = total[total > 0]
+
+    if series_dir is not None:
+        name = os.path.splitext(os.path.basename(path))[0]
+        total.to_csv(os.path.join(series_dir, f"{name}.csv"))
+
+    return {
+        "portfolio": path,
+        "lots": len(holdings),
+        "first_date": held.index[0].date() if not held.empty else None,
+        "last_date": total.index[-1].date() if not total.empty else None,
+        "value": float(total.iloc[-1]) if not total.empty else 0.0,
+        "peak_value": float(total.max()) if not total.empty else 0.0,
+        "missing": ";".join(missing),
+    }
+
+
+def value_files(paths, period='max', store=None, max_workers=None, series_dir=None, fx=None):
+    """
+    Values every holdings CSV in `paths` over `period` across a process pool.
+
+    Returns (summary, problems): one summary row per file and the symbols
+    whose prices could not be loaded. With series_dir, each file's total
+    value series is also written there as <name>.csv. With an FxStore,
+    the shared matrix is converted into fx.base once, before valuation.
+    """
+    store = store or PriceStore()
+    paths = holdings_paths(paths)
+    if not paths:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS), {}
+
+    holdings = [read_holdings(path) for path in paths]
+    symbols = sorted({h['symbol'] for lots in holdings for h in lots})
+    closes, problems = fetch_closes(store, symbols, period)
+    dates, priced, matrix = align_closes(closes)
+    if fx is not None:
+        matrix = fx.convert(dates, priced, matrix)
+
+    if series_dir is not None:
+        os.makedirs(series_dir, exist_ok=True)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (max_workers * 4))
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, "closes.npy")
+        np.save(matrix_path, matrix)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(matrix_path, dates.to_numpy(), priced)) as pool:
+            tasks = [(path, lots, series_dir) for path, lots in zip(paths, holdings)]
+            rows = list(pool.map(_value_file, tasks, chunksize=chunksize))
+
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS), problems
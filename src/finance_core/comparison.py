@@ -0,0 +1,80 @@
+"""
+Side-by-side comparison of many symbols on one aligned calendar.
+
+Stocks from different exchanges and fund NAVs trade on different days;
+align_frame puts them on the union of their dates in one vectorized step
+(valuation.align_closes) and leaves a gap where a series did not trade, so
+the statistics measure each return between a symbol's own trading days
+rather than counting the other markets' holidays as flat days.
+"""
+import numpy as np
+import pandas as pd
+
+from .risk import TRADING_DAYS, daily_returns, pairwise_corr
+from .valuation import align_closes, traded_mask
+
+# Most symbols shown on one comparison chart.
+MAX_SYMBOLS = 40
+
+
+def align_frame(closes):
+    """
+    Dates x symbols frame of closes from a symbol -> Series dict, in the
+    dict's order; NaN before each series starts and on dates the symbol
+    did not trade. Use frame.ffill() to carry closes over those dates.
+    """
+    dates, symbols, matrix = align_closes(closes)
+    traded = traded_mask(closes, dates, symbols)
+    return pd.DataFrame(np.where(traded & (matrix > 0), matrix, np.nan), index=dates, columns=symbols)
+
+
+def rebase(frame, base=100.0):
+    """
+    Scales each column so that its first value in the frame equals `base`.
+    """
+    values = frame.to_numpy(dtype=float)
+    first = (~np.isnan(values)).argmax(axis=0)
+    start = values[first, np.arange(values.shape[1])]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame(values / start * base, index=frame.index, columns=frame.columns)
+
+
+def _own_returns(frame):
+    """
+    Daily returns of each column between its own trading days (non-NaN
+    rows), and their validity mask; rows where a column has no close are
+    invalid rather than 0% returns.
+    """
+    returns, valid = daily_returns(np.nan_to_num(frame.ffill().to_numpy(dtype=float)))
+    valid &= frame.notna().to_numpy()
+    return returns, valid
+
+
+def comparison_stats(frame):
+    """
+    Return over the frame, annualized volatility of daily returns and
+    max drawdown for each column.
+    """
+    values = frame.to_numpy(dtype=float)
+    returns, valid = _own_returns(frame)
+    counts = valid.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (returns * valid).sum(axis=0) / counts
+        var = (((returns - mean) * valid) ** 2).sum(axis=0) / (counts - 1)
+        rebased = rebase(frame.ffill(), base=1.0).to_numpy()
+        drawdown = values / np.fmax.accumulate(values, axis=0) - 1
+
+    return pd.DataFrame({
+        "Return": rebased[-1] - 1 if len(values) else np.nan,
+        "Volatility": np.sqrt(var) * np.sqrt(TRADING_DAYS),
+        "Max Drawdown": np.nanmin(drawdown, axis=0, initial=0.0, where=~np.isnan(drawdown)),
+    }, index=pd.Index(frame.columns, name="Symbol"))
+
+
+def return_correlation(frame):
+    """
+    Correlation of daily returns between columns, each pair over the days
+    both have data.
+    """
+    returns, valid = _own_returns(frame)
+    return pd.DataFrame(pairwise_corr(returns, valid), index=frame.columns, columns=frame.columns)
@@ -0,0 +1,99 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Rows parsed per chunk when streaming a statement.
+CHUNK_SIZE = 200_000
+
+# Rows read up front to detect the Date/Category/Amount columns.
+SAMPLE_ROWS = 1_000
+
+
+def _is_excel(name):
+    return name.lower().endswith(".xlsx")
+
+
+def read_sample(file, name, nrows=SAMPLE_ROWS):
+    """
+    Reads the first rows of a CSV/XLSX statement for column detection.
+    """
+    file.seek(0)
+    if _is_excel(name):
+        return pd.read_excel(file, nrows=nrows)
+    return pd.read_csv(file, nrows=nrows)
+
+
+def _iter_excel_chunks(file, usecols, chunksize):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h) for h in next(rows)]
+        positions = [header.index(col) for col in usecols]
+
+        batch = []
+        for row in rows:
+            batch.append([row[i] for i in positions])
+            if len(batch) == chunksize:
+                yield pd.DataFrame(batch, columns=usecols)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=usecols)
+    finally:
+        workbook.close()
+
+
+def parse_dates(values, date_format=None):
+    """
+    Parses date strings with a known strptime format using Arrow's
+    vectorized parser, which is far faster than pandas for non-ISO formats.
+    Unparseable values become NaT.
+    """
+    if date_format is None or pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(values, errors="coerce")
+
+    parsed = pc.strptime(pa.array(values, type=pa.string(), from_pandas=True),
+                         format=date_format, unit="s", error_is_null=True)
+    return pd.Series(parsed.to_numpy(zero_copy_only=False), index=values.index, name=values.name)
+
+
+def iter_chunks(file, name, date_col, category_col, amount_col, chunksize=CHUNK_SIZE, date_format=None):
+    """
+    Streams only the Date/Category/Amount columns with explicit dtypes,
+    parsing each date once with the inferred format. Yields frames with
+    Date, Category and Amount columns. Unparseable dates become NaT and
+    non-numeric amounts NaN; those rows are kept for the caller to count
+    and drop (see valid_rows).
+    """
+    usecols = [date_col, category_col, amount_col]
+    file.seek(0)
+    if _is_excel(name):
+        chunks = _iter_excel_chunks(file, usecols, chunksize)
+    else:
+        chunks = pd.read_csv(
+            file, usecols=usecols, chunksize=chunksize,
+            # Amounts are left to inference: numeric chunks parse straight to
+            # numbers and only a chunk with stray text needs to_numeric.
+            dtype={date_col: str, category_col: "category"},
+        )
+
+    for chunk in chunks:
+        categories = chunk[category_col].astype("category")
+        if categories.isna().any():
+            categories = categories.cat.add_categories("Uncategorized").fillna("Uncategorized")
+
+        chunk = pd.DataFrame({
+            "Date": parse_dates(chunk[date_col], date_format),
+            "Category": categories,
+            "Amount": chunk[amount_col].astype("float64") if pd.api.types.is_numeric_dtype(chunk[amount_col])
+            else pd.to_numeric(chunk[amount_col], errors="coerce").astype("float64"),
+        })
+        yield chunk
+
+
+def valid_rows(chunk):
+    """
+    Mask of the rows of an iter_chunks frame with a date and an amount.
+    """
+    return (chunk["Date"].notna() & chunk["Amount"].notna()).to_numpy()
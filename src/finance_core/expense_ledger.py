@@ -0,0 +1,222 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from . import telemetry
+from .expense_ingest import CHUNK_SIZE, iter_chunks, valid_rows
+
+LEDGER_PATH = "data/expense_ledger.sqlite"
+
+
+class ExpenseLedger:
+    """
+    Persistent SQLite ledger of expense rows, appended to upload by upload.
+
+    Rows are deduplicated on (timestamp, category, amount, occurrence),
+    where occurrence numbers identical rows within one statement. Uploading
+    an overlapping statement therefore skips rows already stored, while
+    genuinely repeated transactions inside a statement are kept.
+
+    An index on (year, month, category, amount) serves raw month views as
+    range scans. Daily and monthly (category -> total, count) rollups are
+    maintained incrementally by a trigger as rows are added, so summaries
+    and drill-downs never rescan raw rows.
+    """
+
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "id INTEGER PRIMARY KEY, ts TEXT NOT NULL, year INTEGER NOT NULL, "
+                "month INTEGER NOT NULL, category TEXT NOT NULL, amount REAL NOT NULL, "
+                "occurrence INTEGER NOT NULL, "
+                "UNIQUE (ts, category, amount, occurrence))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_period "
+                "ON entries (year, month, category, amount)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "content_hash TEXT PRIMARY KEY, name TEXT, added INTEGER, skipped INTEGER)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rollup_days ("
+                "year INTEGER NOT NULL, month INTEGER NOT NULL, day TEXT NOT NULL, "
+                "category TEXT NOT NULL, total REAL NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (year, month, day, category)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rollup_months ("
+                "year INTEGER NOT NULL, month INTEGER NOT NULL, "
+                "category TEXT NOT NULL, total REAL NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (year, month, category)) WITHOUT ROWID"
+            )
+            # Rows skipped by INSERT OR IGNORE never fire the trigger, so the
+            # rollups only ever see rows that were actually added.
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_rollup AFTER INSERT ON entries BEGIN "
+                "INSERT INTO rollup_days VALUES "
+                "(NEW.year, NEW.month, substr(NEW.ts, 1, 10), NEW.category, NEW.amount, 1) "
+                "ON CONFLICT DO UPDATE SET total = total + excluded.total, count = count + 1; "
+                "INSERT INTO rollup_months VALUES (NEW.year, NEW.month, NEW.category, NEW.amount, 1) "
+                "ON CONFLICT DO UPDATE SET total = total + excluded.total, count = count + 1; "
+                "END"
+            )
+
+            # Ledgers created before the rollups existed are backfilled once.
+            has_entries = conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone()
+            has_rollups = conn.execute("SELECT 1 FROM rollup_months LIMIT 1").fetchone()
+            if has_entries and not has_rollups:
+                self._rebuild_rollups(conn)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _rebuild_rollups(self, conn):
+        conn.execute("DELETE FROM rollup_days")
+        conn.execute("DELETE FROM rollup_months")
+        conn.execute(
+            "INSERT INTO rollup_days SELECT year, month, substr(ts, 1, 10), category, SUM(amount), COUNT(*) "
+            "FROM entries GROUP BY year, month, substr(ts, 1, 10), category"
+        )
+        conn.execute(
+            "INSERT INTO rollup_months SELECT year, month, category, SUM(total), SUM(count) "
+            "FROM rollup_days GROUP BY year, month, category"
+        )
+
+    def has_upload(self, content_hash):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT 1 FROM uploads WHERE content_hash = ?", (content_hash,)).fetchone()
+        return row is not None
+
+    @telemetry.timed("expense_ledger.append")
+    def append_statement(self, content_hash, file, name, date_col, category_col, amount_col,
+                         date_format=None, chunksize=CHUNK_SIZE):
+        """
+        Streams a statement into the ledger in one transaction, so a
+        statement that fails part way adds nothing. Returns (added, skipped,
+        invalid) row counts: skipped rows were already stored, invalid ones
+        have no parseable date or amount. A statement whose content was
+        already ingested is skipped without being read.
+        """
+        if self.has_upload(content_hash):
+            return 0, 0, 0
+
+        seen = {}
+        total = added = invalid = 0
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM uploads WHERE content_hash = ?", (content_hash,)).fetchone():
+                return 0, 0, 0
+            for chunk in iter_chunks(file, name, date_col, category_col, amount_col, chunksize, date_format):
+                valid = valid_rows(chunk)
+                invalid += int((~valid).sum())
+                chunk = chunk[valid]
+                ts = chunk["Date"].dt.strftime("%Y-%m-%d %H:%M:%S")
+                categories = chunk["Category"].astype(str)
+                keys = ts + "\x1f" + categories + "\x1f" + chunk["Amount"].astype(str)
+
+                # Number identical rows, continuing the count from earlier chunks.
+                occurrence = keys.groupby(keys, sort=False).cumcount() + keys.map(seen).fillna(0).astype(int)
+                for key, count in keys.value_counts(sort=False).items():
+                    seen[key] = seen.get(key, 0) + count
+
+                rows = zip(
+                    ts.tolist(), chunk["Date"].dt.year.tolist(), chunk["Date"].dt.month.tolist(),
+                    categories.tolist(), chunk["Amount"].tolist(), occurrence.tolist()
+                )
+                cursor = conn.executemany(
+                    "INSERT OR IGNORE INTO entries (ts, year, month, category, amount, occurrence) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                added += cursor.rowcount
+                total += len(chunk)
+
+            conn.execute(
+                "INSERT INTO uploads VALUES (?, ?, ?, ?)", (content_hash, name, added, total - added)
+            )
+        return added, total - added, invalid
+
+    def is_empty(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone() is None
+
+    def category_totals(self, year):
+        """
+        Per (month, category) totals and counts for one year, read from the
+        monthly rollup, so the cost does not grow with the ledger.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT month, category, total, count FROM rollup_months WHERE year = ?", (year,)
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["Month", "Category", "Total", "Count"])
+
+    def daily_totals(self, year, month):
+        """
+        Per (day, category) totals and counts for one month from the daily rollup.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT day, category, total, count FROM rollup_days WHERE year = ? AND month = ?",
+                (year, month)
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=["Day", "Category", "Total", "Count"])
+        df["Day"] = pd.to_datetime(df["Day"], format="%Y-%m-%d")
+        return df
+
+    def weekly_totals(self, year, month):
+        """
+        Per (week, category) totals for one month, rolled up from the daily
+        rollup. Weeks start on Monday and are labelled by their first day.
+        """
+        daily = self.daily_totals(year, month)
+        daily["Week"] = daily["Day"] - pd.to_timedelta(daily["Day"].dt.weekday, unit="D")
+        return daily.groupby(["Week", "Category"], as_index=False)[["Total", "Count"]].sum()
+
+    @telemetry.timed("expense_ledger.income_expense")
+    def income_expense(self, rules, year, month=None, by="Month"):
+        """
+        Totals per rule label (e.g. Income/Expense) for each month of `year`,
+        or for each week or day of `month` when `by` is "Week" or "Day".
+        Categories are classified with `rules`, a RuleSet.
+        """
+        if by == "Month":
+            totals = self.category_totals(year)
+        elif by == "Week":
+            totals = self.weekly_totals(year, month)
+        else:
+            totals = self.daily_totals(year, month)
+
+        totals["Type"] = rules.classify(totals["Category"]).to_numpy()
+        summary = totals.groupby([by, "Type"], observed=True)["Total"].sum().unstack(fill_value=0)
+        if by == "Month":
+            summary = summary.reindex(range(1, 13), fill_value=0)
+        return summary
+
+    @telemetry.timed("expense_ledger.month_rows")
+    def month_rows(self, year, month):
+        """
+        Raw rows for one calendar month, oldest first.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT ts, category, amount FROM entries "
+                "WHERE year = ? AND month = ? ORDER BY ts", (year, month)
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=["Date", "Category", "Amount"])
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d %H:%M:%S")
+        return df
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM uploads")
+            conn.execute("DELETE FROM rollup_days")
+            conn.execute("DELETE FROM rollup_months")
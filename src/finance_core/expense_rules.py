@@ -0,0 +1,76 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RULES_TEXT = "Income: income, salary, credit"
+
+
+class RuleSet:
+    """
+    Ordered keyword/regex rules that label categories (e.g. Income);
+    the first matching rule wins and unmatched categories get `default`.
+
+    Labels are computed once per distinct category and memoized, then
+    mapped back onto rows through categorical codes, so classifying a
+    chunk costs one factorize plus one array gather.
+    """
+
+    def __init__(self, rules, default="Expense"):
+        self.rules = [(label, re.compile(pattern, re.IGNORECASE)) for label, pattern in rules]
+        self.default = default
+        self.labels = list(dict.fromkeys([label for label, _ in self.rules] + [default]))
+        self._code_of = {label: i for i, label in enumerate(self.labels)}
+        self._memo = {}
+
+    @classmethod
+    def parse(cls, text, default="Expense"):
+        """
+        Builds a rule set from lines of `Label: keyword, keyword` or
+        `Label: re:<pattern>`. Keywords match anywhere in the category,
+        case-insensitively.
+        """
+        rules = []
+        for line in text.splitlines():
+            label, sep, body = line.partition(":")
+            label, body = label.strip(), body.strip()
+            if not sep or not label or not body:
+                continue
+            if body.startswith("re:"):
+                pattern = body[3:].strip()
+                re.compile(pattern)
+            else:
+                keywords = [k.strip() for k in body.split(",") if k.strip()]
+                pattern = "|".join(re.escape(k) for k in keywords)
+            if pattern:
+                rules.append((label, pattern))
+        return cls(rules, default=default)
+
+    def label(self, category):
+        text = str(category)
+        for label, pattern in self.rules:
+            if pattern.search(text):
+                return label
+        return self.default
+
+    def _codes_for(self, uniques):
+        codes = np.empty(len(uniques), dtype=np.int8)
+        for i, category in enumerate(uniques):
+            label = self._memo.get(category)
+            if label is None:
+                label = self._memo[category] = self.label(category)
+            codes[i] = self._code_of[label]
+        return codes
+
+    def classify(self, categories):
+        """
+        Returns a categorical Series of labels aligned with `categories`.
+        """
+        if isinstance(categories.dtype, pd.CategoricalDtype):
+            row_codes, uniques = categories.cat.codes.to_numpy(), categories.cat.categories
+        else:
+            row_codes, uniques = pd.factorize(categories)
+
+        label_codes = np.append(self._codes_for(uniques), self._code_of[self.default])
+        labels = pd.Categorical.from_codes(label_codes[row_codes], categories=self.labels)
+        return pd.Series(labels, index=categories.index, name="Type")
@@ -0,0 +1,111 @@
+"""
+Infers the Date/Category/Amount columns and date format of a bank statement.
+"""
+import re
+import warnings
+
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from . import telemetry
+from .expense_ingest import SAMPLE_ROWS
+
+
+# Header synonyms, most specific first.
+DATE_HEADERS = ["date", "transaction date", "txn date", "value date", "posting date", "posted date",
+                "date time", "datetime", "timestamp", "time"]
+CATEGORY_HEADERS = ["category", "sub category", "subcategory", "expense category", "tag", "label",
+                    "description", "narration", "particulars", "merchant", "payee", "details", "remarks"]
+AMOUNT_HEADERS = ["amount", "amt", "transaction amount", "txn amount", "value", "total", "sum", "price"]
+
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%d-%m-%Y", "%d/%m/%Y", "%m/%d/%Y",
+                "%d/%m/%Y %H:%M", "%m/%d/%Y %H:%M", "%d-%b-%Y", "%d %b %Y", "%Y/%m/%d", "%d.%m.%Y"]
+
+
+def _normalize_header(col):
+    return " ".join(re.sub(r"\(.*?\)|[^0-9a-z]+", " ", str(col).lower()).split())
+
+
+def _match_header(columns, synonyms, exclude=()):
+    normalized = {col: _normalize_header(col) for col in columns if col not in exclude}
+    for synonym in synonyms:
+        for col, name in normalized.items():
+            if name == synonym:
+                return col
+    return None
+
+
+def detect_date_format(values):
+    """
+    Picks the strptime format that parses the most sampled values, or None
+    when the values are already datetimes or no format parses over half.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return None
+
+    values = values.dropna().astype(str).str.strip()
+    if values.empty:
+        return None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        guesses = [guess_datetime_format(v, dayfirst=True) for v in values.head(20)]
+
+    # Known formats come first so they win ties on ambiguous samples.
+    candidates = list(dict.fromkeys(DATE_FORMATS + guesses))
+    best_format, best_ratio = None, 0.5
+    for fmt in filter(None, candidates):
+        ratio = pd.to_datetime(values, format=fmt, errors="coerce").notna().mean()
+        if ratio > best_ratio:
+            best_format, best_ratio = fmt, ratio
+    return best_format
+
+
+@telemetry.timed("expense.infer_schema")
+def infer_schema(df, sample_rows=SAMPLE_ROWS):
+    """
+    Infers the Date/Category/Amount columns and the date format from a
+    bounded row sample. Recognized headers win; otherwise columns are
+    chosen by content.
+    """
+    sample = df.head(sample_rows)
+    columns = list(sample.columns)
+
+    date_col = _match_header(columns, DATE_HEADERS)
+    date_format = detect_date_format(sample[date_col]) if date_col is not None else None
+    if date_col is None:
+        for col in columns:
+            if pd.api.types.is_numeric_dtype(sample[col]):
+                continue
+            fmt = detect_date_format(sample[col])
+            if fmt is not None or pd.api.types.is_datetime64_any_dtype(sample[col]):
+                date_col, date_format = col, fmt
+                break
+
+    amount_col = _match_header(columns, AMOUNT_HEADERS, exclude=[date_col])
+    if amount_col is not None and not pd.api.types.is_numeric_dtype(sample[amount_col]):
+        amount_col = None
+    if amount_col is None:
+        for col in columns:
+            if col != date_col and pd.api.types.is_numeric_dtype(sample[col]):
+                amount_col = col
+                break
+
+    category_col = _match_header(columns, CATEGORY_HEADERS, exclude=[date_col, amount_col])
+    if category_col is None:
+        for col in columns:
+            if col not in [date_col, amount_col]:
+                category_col = col
+                break
+
+    return {
+        "date_col": date_col,
+        "category_col": category_col,
+        "amount_col": amount_col,
+        "date_format": date_format,
+    }
+
+
+def detect_columns(df):
+    schema = infer_schema(df)
+    return schema["date_col"], schema["category_col"], schema["amount_col"]
@@ -0,0 +1,199 @@
+"""
+Currency-aware valuation: a local store of FX rate series and vectorized
+conversion of aligned price matrices into one base currency.
+
+Rates are daily bars of Yahoo FX pairs ("USDINR=X" is INR per USD) kept in
+their own PriceStore file, so they refresh incrementally like prices. Each
+pair's series is held in memory between refreshes, and converting a
+matrix is one gather of per-currency rate columns plus one multiply,
+whatever the number of currencies.
+"""
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from . import telemetry
+from .price_store import REFRESH_INTERVAL, PriceStore, YahooProvider
+
+FX_PATH = "data/fx.sqlite"
+
+BASE_CURRENCY = "INR"
+
+CURRENCY_SYMBOLS = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£"}
+
+# Yahoo ticker suffixes of non-US exchanges; bare tickers are US listings.
+SUFFIX_CURRENCIES = {
+    ".NS": "INR",
+    ".BO": "INR",
+    ".L": "GBP",
+}
+
+INDEX_CURRENCIES = {
+    "^NSEI": "INR",
+    "^BSESN": "INR",
+    "^GSPC": "USD",
+}
+
+
+def symbol_currency(symbol):
+    """
+    Trading currency of a price symbol: AMFI scheme codes and NSE/BSE
+    tickers are INR, other suffixed tickers follow SUFFIX_CURRENCIES and
+    bare Yahoo tickers are US listings in USD.
+    """
+    from .nav_store import is_scheme_code
+
+    if is_scheme_code(symbol):
+        return "INR"
+    if symbol in INDEX_CURRENCIES:
+        return INDEX_CURRENCIES[symbol]
+    for suffix, currency in SUFFIX_CURRENCIES.items():
+        if symbol.endswith(suffix):
+            return currency
+    return "USD"
+
+
+def pair_symbol(currency, base=BASE_CURRENCY):
+    """
+    Yahoo symbol of the rate quoting `base` units per unit of `currency`.
+    """
+    return f"{currency}{base}=X"
+
+
+class FakeFxProvider:
+    """
+    Offline FX rates: a small deterministic walk around a fixed level per
+    pair, for tests and benchmarks.
+    """
+
+    # Rough INR value of one unit of each currency.
+    LEVELS = {"INR": 1.0, "USD": 83.0, "EUR": 90.0, "GBP": 105.0}
+
+    def __init__(self, start="2000-01-03", end=None):
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+
+    def fetch(self, symbol, start=None):
+        currency, base = symbol[:3], symbol[3:6]
+        level = self.LEVELS.get(currency, 1.0) / self.LEVELS.get(base, 1.0)
+        dates = pd.bdate_range(self.start, self.end, name="Date")
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        rate = level * np.exp(np.cumsum(rng.normal(0.0, 0.003, len(dates))))
+        hist = pd.DataFrame({"Open": rate, "High": rate, "Low": rate, "Close": rate, "Volume": np.nan},
+                            index=dates)
+        if start is not None:
+            hist = hist[hist.index >= pd.Timestamp(start)]
+        return hist
+
+    def quote(self, symbol):
+        return float(self.fetch(symbol)["Close"].iloc[-1])
+
+
+def default_fx_provider():
+    """
+    FakeFxProvider when FINANCEAPP_PRICE_PROVIDER is 'fake', otherwise Yahoo.
+    """
+    if os.environ.get("FINANCEAPP_PRICE_PROVIDER", "yahoo").lower() == "fake":
+        return FakeFxProvider()
+    return YahooProvider()
+
+
+class FxStore:
+    """
+    Local FX rate series for converting prices into `base`.
+
+    Each pair's dates and rates are cached as arrays and reloaded from the
+    bar store only after refresh_interval, so repeated conversions cost a
+    searchsorted per currency rather than a query.
+    """
+
+    def __init__(self, path=FX_PATH, provider=None, base=BASE_CURRENCY, refresh_interval=REFRESH_INTERVAL):
+        self.bars = PriceStore(path=path, provider=provider or default_fx_provider(),
+                               refresh_interval=refresh_interval)
+        self.base = base
+        self.refresh_interval = refresh_interval
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, currency):
+        """
+        (dates, rates) arrays for `currency`, in base units per unit.
+        Raises LookupError when no rates are available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._series.get(currency)
+        if cached is not None and now - cached[0] < self.refresh_interval:
+            telemetry.count("fx.hit")
+            return cached[1], cached[2]
+
+        telemetry.count("fx.miss")
+        with telemetry.span("fx.load", currency=currency, base=self.base):
+            close = self.bars.history(pair_symbol(currency, self.base))["Close"]
+            close = close[close > 0]
+        if close.empty:
+            raise LookupError(f"no {currency}/{self.base} rates available")
+        dates, rates = close.index.to_numpy(dtype="datetime64[ns]"), close.to_numpy(dtype=float)
+        with self._lock:
+            self._series[currency] = (now, dates, rates)
+        return dates, rates
+
+    def rates(self, currency, dates):
+        """
+        Base units per unit of `currency` on each of `dates`: the last rate
+        on or before the date, or the first rate for dates before the
+        series starts.
+        """
+        dates = np.asarray(pd.DatetimeIndex(dates), dtype="datetime64[ns]")
+        if currency == self.base:
+            return np.ones(len(dates))
+        stamps, rates = self.series(currency)
+        rows = np.searchsorted(stamps, dates, side="right") - 1
+        return rates[np.clip(rows, 0, len(rates) - 1)]
+
+    def rate_table(self, symbols, dates):
+        """
+        Dates x symbols matrix of the rate converting each symbol's
+        currency into base: one rates column per distinct currency,
+        gathered out to the symbols' columns.
+        """
+        currencies = [symbol_currency(s) for s in symbols]
+        distinct = sorted(set(currencies))
+        table = np.column_stack([self.rates(c, dates) for c in distinct]) if distinct \
+            else np.ones((len(dates), 0))
+        return table[:, [distinct.index(c) for c in currencies]]
+
+    def convert(self, dates, symbols, matrix):
+        """
+        Converts an aligned close matrix (see valuation.align_closes) into
+        base in one vectorized multiply. Rows are dates on the union of the
+        markets' calendars, so each close, including one carried over a
+        market holiday, is converted at that day's rate.
+        """
+        if not len(symbols):
+            return matrix
+        return matrix * self.rate_table(symbols, dates)
+
+    def convert_transactions(self, transactions):
+        """
+        Transaction dicts with price and amount converted into base at the
+        rate on each transaction's date.
+        """
+        if not transactions:
+            return []
+        frame = pd.DataFrame(transactions)
+        dates = pd.to_datetime(frame["date"])
+        rate = np.ones(len(frame))
+        currencies = frame["symbol"].map(symbol_currency)
+        for currency in currencies.unique():
+            if currency != self.base:
+                mask = (currencies == currency).to_numpy()
+                rate[mask] = self.rates(currency, dates[mask])
+        for col in ["price", "amount"]:
+            if col in frame:
+                frame[col] = pd.to_numeric(frame[col], errors="coerce") * rate
+        return frame.to_dict("records")
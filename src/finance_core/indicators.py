@@ -0,0 +1,226 @@
+"""
+Vectorized technical indicators with incremental updates.
+
+Every indicator is a function `fn(bars, start, state, **params)` returning
+(frame, state): `frame` holds the indicator rows for bars[start:], and
+`state` is whatever the recursion needs to resume after the second-to-last
+bar. The last bar is treated as provisional (the price store re-fetches it
+while the session is open), so an update resumes from that bar with the
+saved state instead of recomputing the whole history.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import telemetry
+
+TRADING_DAYS = 252
+
+# Cached (symbol, indicator, params) results kept per process.
+MAX_ENTRIES = 256
+
+
+def _ewm(values, alpha, seed=None):
+    """
+    Exponential moving average (adjust=False) of an array, continuing from
+    `seed`, the average up to the previous element, when given.
+    """
+    if seed is None:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return pd.Series(np.concatenate([[seed], values])).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def _resume(arrays, state):
+    """
+    State as of the second-to-last row: the new values if the computed
+    tail reaches back that far, otherwise the state that was passed in.
+    """
+    if len(arrays[0]) >= 2:
+        return tuple(a[-2] for a in arrays)
+    return state
+
+
+def _frame(bars, start, **columns):
+    return pd.DataFrame(columns, index=bars.index[start:])
+
+
+# --- Window indicators: only the last `window` inputs matter ---
+
+def sma(bars, start=0, state=None, window=20):
+    close = bars["Close"]
+    lo = max(0, start - window + 1)
+    mean = close.iloc[lo:].rolling(window).mean().to_numpy()[start - lo:]
+    return _frame(bars, start, **{f"SMA {window}": mean}), None
+
+
+def bollinger(bars, start=0, state=None, window=20, width=2.0):
+    close = bars["Close"]
+    lo = max(0, start - window + 1)
+    rolling = close.iloc[lo:].rolling(window)
+    mean = rolling.mean().to_numpy()[start - lo:]
+    std = rolling.std(ddof=0).to_numpy()[start - lo:]
+    return _frame(bars, start, **{
+        "BB Mid": mean, "BB Upper": mean + width * std, "BB Lower": mean - width * std,
+    }), None
+
+
+def volatility(bars, start=0, state=None, window=21):
+    """
+    Annualized rolling standard deviation of daily log returns.
+    """
+    close = bars["Close"]
+    lo = max(0, start - window)
+    returns = np.log(close.iloc[lo:]).diff()
+    vol = returns.rolling(window).std().to_numpy()[start - lo:] * np.sqrt(TRADING_DAYS)
+    return _frame(bars, start, Volatility=vol), None
+
+
+# --- Recursive indicators: resume from the saved state ---
+
+def ema(bars, start=0, state=None, span=20):
+    close = bars["Close"].to_numpy()[start:]
+    seed = state[0] if state is not None else None
+    out = _ewm(close, 2 / (span + 1), seed)
+    return _frame(bars, start, **{f"EMA {span}": out}), _resume([out], state)
+
+
+def rsi(bars, start=0, state=None, period=14):
+    """
+    Wilder's RSI: gains and losses smoothed with alpha = 1 / period.
+    """
+    close = bars["Close"].to_numpy()
+    if state is None:
+        delta = np.diff(close[start:])
+        gains = _ewm(np.clip(delta, 0, None), 1 / period)
+        losses = _ewm(np.clip(-delta, 0, None), 1 / period)
+        # The first bar has no change; keep a NaN row for it.
+        gains, losses = np.concatenate([[np.nan], gains]), np.concatenate([[np.nan], losses])
+    else:
+        delta = np.diff(close[start - 1:])
+        gains = _ewm(np.clip(delta, 0, None), 1 / period, state[0])
+        losses = _ewm(np.clip(-delta, 0, None), 1 / period, state[1])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(losses == 0, 100.0, 100 - 100 / (1 + gains / losses))
+    value[np.isnan(gains)] = np.nan
+    return _frame(bars, start, RSI=value), _resume([gains, losses], state)
+
+
+def macd(bars, start=0, state=None, fast=12, slow=26, signal=9):
+    close = bars["Close"].to_numpy()[start:]
+    seeds = state if state is not None else (None, None, None)
+    fast_ema = _ewm(close, 2 / (fast + 1), seeds[0])
+    slow_ema = _ewm(close, 2 / (slow + 1), seeds[1])
+    line = fast_ema - slow_ema
+    signal_line = _ewm(line, 2 / (signal + 1), seeds[2])
+    return _frame(bars, start, MACD=line, Signal=signal_line, Histogram=line - signal_line), \
+        _resume([fast_ema, slow_ema, signal_line], state)
+
+
+def drawdown(bars, start=0, state=None):
+    """
+    Distance below the running peak close (0 at a new high, -0.2 at 20% below).
+    """
+    close = bars["Close"].to_numpy()[start:]
+    if state is None:
+        peak = np.maximum.accumulate(close)
+    else:
+        peak = np.maximum.accumulate(np.concatenate([[state[0]], close]))[1:]
+    return _frame(bars, start, Drawdown=close / peak - 1), _resume([peak], state)
+
+
+INDICATORS = {
+    "sma": sma,
+    "ema": ema,
+    "bollinger": bollinger,
+    "rsi": rsi,
+    "macd": macd,
+    "volatility": volatility,
+    "drawdown": drawdown,
+}
+
+
+# --- Whole-window statistics, computed on the displayed slice ---
+
+def max_drawdown(close):
+    """
+    Largest peak-to-trough fall within `close`, as a negative fraction.
+    """
+    values = close.to_numpy(dtype=float)
+    if len(values) == 0:
+        return 0.0
+    return float(np.min(values / np.maximum.accumulate(values) - 1))
+
+
+def volume_profile(bars, bins=24):
+    """
+    Traded volume per closing-price bin. Returns a DataFrame with the bin
+    Low/High edges and Volume, lowest price first.
+    """
+    close = bars["Close"].to_numpy(dtype=float)
+    volume = bars["Volume"].to_numpy(dtype=float)
+    if len(close) == 0 or np.nansum(volume) == 0:
+        return pd.DataFrame(columns=["Low", "High", "Volume"])
+    totals, edges = np.histogram(close, bins=bins, weights=volume)
+    return pd.DataFrame({"Low": edges[:-1], "High": edges[1:], "Volume": totals})
+
+
+class IndicatorEngine:
+    """
+    Process-wide LRU cache of indicator results keyed by (symbol,
+    indicator, params).
+
+    Asking again for the same bars returns the cached frame. When bars were
+    appended (or the provisional last bar changed), only the tail from the
+    old last bar onward is recomputed from the saved state. A changed close
+    before that (history re-adjusted for a split or dividend) forces a full
+    recompute.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (index, closes, frame, state)
+        self._lock = threading.Lock()
+
+    def compute(self, symbol, bars, name, **params):
+        key = (symbol, name, tuple(sorted(params.items())))
+        fn = INDICATORS[name]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        n = len(bars)
+        if n == 0:
+            return fn(bars, **params)[0]
+
+        if entry is not None:
+            index, closes, frame, state = entry
+            m = len(index)
+            close = bars["Close"].to_numpy()
+            if m == n and index[-1] == bars.index[-1] and np.array_equal(closes[-2:], close[-2:], equal_nan=True):
+                telemetry.count("indicators.hit")
+                return frame
+            if 3 <= m <= n and index[0] == bars.index[0] and index[m - 2] == bars.index[m - 2] \
+                    and np.array_equal(closes[m - 2], close[m - 2], equal_nan=True):
+                telemetry.count("indicators.extend")
+                with telemetry.span("indicators.extend", indicator=name, rows=n - m + 1):
+                    tail, state = fn(bars, m - 1, state, **params)
+                    frame = pd.concat([frame.iloc[:m - 1], tail])
+                self._put(key, bars, frame, state)
+                return frame
+
+        telemetry.count("indicators.full")
+        with telemetry.span("indicators.full", indicator=name, rows=n):
+            frame, state = fn(bars, **params)
+        self._put(key, bars, frame, state)
+        return frame
+
+    def _put(self, key, bars, frame, state):
+        with self._lock:
+            self._entries[key] = (bars.index, bars["Close"].to_numpy(), frame, state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
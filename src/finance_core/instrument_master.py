@@ -0,0 +1,82 @@
+"""
+Typed binary copy of the instrument master.
+
+Run `PYTHONPATH=src python -m finance_core build-master` after regenerating
+the CSV to rebuild the Arrow file; the loader also rebuilds it whenever the CSV is newer.
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+CSV_PATH = "data/combined_stocks_yahoo.csv"
+ARROW_PATH = "data/combined_stocks_yahoo.arrow"
+
+STRING_COLUMNS = ["Symbol", "Company", "Yahoo_Ticker"]
+CATEGORY_COLUMNS = ["Country", "Type", "AMC"]
+
+
+def read_master_csv(csv_path=CSV_PATH):
+    """
+    Parses the master CSV with explicit dtypes.
+    """
+    df = pd.read_csv(
+        csv_path,
+        dtype={**{c: "string" for c in STRING_COLUMNS}, **{c: "category" for c in CATEGORY_COLUMNS}},
+        usecols=STRING_COLUMNS + CATEGORY_COLUMNS + ["NAV_Date", "NAV"],
+        keep_default_na=False,
+        na_values={"NAV_Date": [""], "NAV": [""]},
+    )
+    df["NAV"] = pd.to_numeric(df["NAV"], errors="coerce")
+    df["NAV_Date"] = pd.to_datetime(df["NAV_Date"], format="%d-%b-%Y", errors="coerce")
+    return df
+
+
+def build_master(csv_path=CSV_PATH, arrow_path=ARROW_PATH):
+    """
+    Converts the master CSV into an uncompressed Arrow file that can be
+    memory-mapped. The file is written atomically.
+    """
+    df = read_master_csv(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    tmp_path = f"{arrow_path}.tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, arrow_path)
+    return df
+
+
+def is_stale(csv_path=CSV_PATH, arrow_path=ARROW_PATH):
+    if not os.path.exists(arrow_path):
+        return True
+    return os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(arrow_path)
+
+
+def load_master(csv_path=CSV_PATH, arrow_path=ARROW_PATH):
+    """
+    Loads the instrument master from the memory-mapped Arrow file, falling
+    back to the CSV (and rebuilding the Arrow file) only when it is stale.
+
+    The memory map saves CSV parsing and dtype inference, not memory:
+    to_pandas copies every column into the DataFrame the pages use, which
+    is why callers load it once per process (see utils.load_stock_data).
+    """
+    if is_stale(csv_path, arrow_path):
+        return build_master(csv_path, arrow_path)
+
+    table = feather.read_table(arrow_path, memory_map=True)
+    return table.to_pandas()
+
+
+def price_symbols(master):
+    """
+    The symbol each instrument is priced under: its Yahoo ticker, or the
+    AMFI scheme code for mutual funds, which have none.
+    """
+    return master["Yahoo_Ticker"].mask(master["Yahoo_Ticker"].fillna("") == "", master["Symbol"])
+
+
+if __name__ == "__main__":
+    master = build_master()
+    print(f"✅ Wrote {len(master)} instruments to {ARROW_PATH}")
@@ -0,0 +1,233 @@
+"""
+Append-only NAV history for Indian mutual funds, fed by AMFI NAVAll.txt
+snapshots.
+
+AMFI publishes only the latest NAV of each scheme, so history builds up one
+snapshot at a time. Rows are written once into partitions by NAV date,
+
+    data/nav/2025-05-28/part-1748390400000000000-4242.arrow
+
+and never rewritten: ingesting a snapshot again only appends the (scheme,
+date) rows not seen before. A SQLite index clustered on (scheme, date)
+covers every partition, so one fund's multi-year history is a single range
+scan instead of a read of every snapshot. rebuild_index() recreates it from
+the partitions.
+
+    PYTHONPATH=src python -m finance_core ingest-nav data/tickers_list.csv
+"""
+import glob
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from . import telemetry
+
+ROOT = "data/nav"
+AMFI_URL = "https://www.amfiindia.com/spages/NAVAll.txt"
+DATE_FORMAT = "%d-%b-%Y"
+
+# Each process downloads a new snapshot at most this often.
+CHECK_INTERVAL = 60 * 60
+
+NAVALL_FIELDS = ["Scheme Code", "ISIN Growth", "ISIN Reinvestment", "Scheme Name", "NAV", "Date"]
+
+
+def is_scheme_code(symbol):
+    """
+    AMFI scheme codes are all digits; Yahoo tickers never are.
+    """
+    return isinstance(symbol, str) and symbol.isdigit()
+
+
+def parse_navall(text):
+    """
+    Parses AMFI's NAVAll.txt into one row per scheme with the NAVALL_FIELDS
+    and AMC columns, all as stripped strings.
+
+    The file is ';'-separated with six fields per scheme, interleaved with
+    scheme-category headings and fund house names. The text is parsed in
+    one vectorized pass: fund house lines are forward-filled onto the
+    schemes that follow them.
+    """
+    lines = pd.Series(text.splitlines(), dtype=str).str.strip()
+    is_scheme = (lines.str.count(";") == 5) & ~lines.str.startswith("Scheme Code")
+    is_heading = lines.str.contains("Schemes(", regex=False)
+    is_amc = lines.ne("") & ~is_scheme & ~is_heading & ~lines.str.contains(";", regex=False)
+    if not is_scheme.any():
+        return pd.DataFrame(columns=NAVALL_FIELDS + ["AMC"], dtype=str)
+
+    amc = lines.where(is_amc).ffill()[is_scheme]
+    fields = lines[is_scheme].str.split(";", expand=True).apply(lambda col: col.str.strip())
+    fields.columns = NAVALL_FIELDS
+    fields["AMC"] = amc.fillna("")
+    return fields.reset_index(drop=True)
+
+
+def snapshot_rows(snapshot):
+    """
+    The (scheme, date, nav) rows of a parsed snapshot, dropping schemes
+    whose NAV or date is missing (AMFI writes 'N.A.').
+    """
+    rows = pd.DataFrame({
+        "scheme": snapshot["Scheme Code"],
+        "date": pd.to_datetime(snapshot["Date"], format=DATE_FORMAT, errors="coerce").dt.strftime("%Y-%m-%d"),
+        "nav": pd.to_numeric(snapshot["NAV"], errors="coerce"),
+    }).dropna()
+    return rows.drop_duplicates(["scheme", "date"], keep="last")
+
+
+class NavStore:
+    """
+    Date-partitioned, append-only NAV history with a per-scheme index.
+    """
+
+    def __init__(self, root=ROOT, check_interval=CHECK_INTERVAL):
+        self.root = root
+        self.index_path = os.path.join(root, "index.sqlite")
+        self.check_interval = check_interval
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._create_tables(conn)
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    @staticmethod
+    def _create_tables(conn):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS nav ("
+            "scheme TEXT NOT NULL, date TEXT NOT NULL, nav REAL NOT NULL, "
+            "PRIMARY KEY (scheme, date)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS parts ("
+            "path TEXT PRIMARY KEY, date TEXT NOT NULL, rows INTEGER NOT NULL)"
+        )
+
+    # --- Writing ---
+
+    def _write_part(self, date, rows):
+        """
+        Writes rows as a new partition file for `date`, atomically. The
+        name (write time and pid) is unique across processes and sorts in
+        write order.
+        """
+        directory = os.path.join(self.root, date)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{time.time_ns():019d}-{os.getpid()}.arrow")
+        table = pa.Table.from_pandas(rows[["scheme", "nav"]], preserve_index=False)
+        feather.write_feather(table, f"{path}.tmp", compression="uncompressed")
+        os.replace(f"{path}.tmp", path)
+        return os.path.relpath(path, self.root)
+
+    def ingest(self, text):
+        """
+        Appends the rows of a NAVAll.txt snapshot that are not stored yet.
+        Returns the number of new rows.
+        """
+        with telemetry.span("nav_store.ingest") as fields:
+            rows = snapshot_rows(parse_navall(text))
+            with self._lock, closing(self._connect()) as conn, conn:
+                # Take the write lock before reading which rows are new, so
+                # another process cannot store the same rows in between.
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("CREATE TEMP TABLE incoming (scheme TEXT, date TEXT, nav REAL)")
+                conn.executemany("INSERT INTO incoming VALUES (?, ?, ?)", rows.itertuples(index=False, name=None))
+                new = pd.DataFrame(conn.execute(
+                    "SELECT i.scheme, i.date, i.nav FROM incoming i "
+                    "LEFT JOIN nav n ON n.scheme = i.scheme AND n.date = i.date WHERE n.scheme IS NULL"
+                ).fetchall(), columns=["scheme", "date", "nav"])
+                conn.execute("DROP TABLE incoming")
+
+                # Partition files first: if the index update is lost, rebuild_index() recovers it.
+                for date, part in new.groupby("date"):
+                    path = self._write_part(date, part)
+                    conn.execute("INSERT INTO parts VALUES (?, ?, ?)", (path, date, len(part)))
+                conn.executemany("INSERT INTO nav VALUES (?, ?, ?)", new.itertuples(index=False, name=None))
+            if fields is not None:
+                fields["rows"], fields["new"] = len(rows), len(new)
+        return len(new)
+
+    def ingest_file(self, path):
+        with open(path, encoding="utf-8") as f:
+            return self.ingest(f.read())
+
+    def update(self, force=False):
+        """
+        Downloads and ingests AMFI's current NAVAll.txt, at most once per
+        check_interval unless forced. Returns the number of new rows.
+        """
+        with self._lock:
+            now = time.time()
+            if not force and now - self._checked_at < self.check_interval:
+                return 0
+            self._checked_at = now
+        import requests
+
+        telemetry.count("nav_store.download")
+        response = requests.get(AMFI_URL, timeout=60)
+        response.raise_for_status()
+        return self.ingest(response.content.decode("utf-8"))
+
+    def rebuild_index(self):
+        """
+        Recreates the index from the partition files. Returns the row count.
+        """
+        paths = sorted(glob.glob(os.path.join(self.root, "*", "part-*.arrow")))
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DROP TABLE IF EXISTS nav")
+            conn.execute("DROP TABLE IF EXISTS parts")
+            self._create_tables(conn)
+            total = 0
+            for path in paths:
+                date = os.path.basename(os.path.dirname(path))
+                part = feather.read_table(path, memory_map=True).to_pandas()
+                conn.executemany("INSERT OR REPLACE INTO nav VALUES (?, ?, ?)",
+                                 ((s, date, v) for s, v in zip(part["scheme"], part["nav"])))
+                conn.execute("INSERT INTO parts VALUES (?, ?, ?)", (os.path.relpath(path, self.root), date, len(part)))
+                total += len(part)
+        return total
+
+    # --- Reading ---
+
+    def history(self, scheme, start=None):
+        """
+        NAV series for a scheme from `start` onward, indexed by Date.
+        """
+        query = "SELECT date, nav FROM nav WHERE scheme = ?"
+        params = [scheme]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query + " ORDER BY date", params).fetchall()
+        dates = pd.DatetimeIndex([r[0] for r in rows], name="Date")
+        return pd.Series([r[1] for r in rows], index=dates, name="NAV", dtype=float)
+
+    def latest(self, scheme):
+        """
+        (date, nav) of the newest stored NAV for a scheme, or None.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT date, nav FROM nav WHERE scheme = ? ORDER BY date DESC LIMIT 1", (scheme,)
+            ).fetchone()
+        return (pd.Timestamp(row[0]), row[1]) if row else None
+
+    def last_date(self):
+        """
+        Newest NAV date in any snapshot, or None for an empty store.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT MAX(date) FROM parts").fetchone()
+        return pd.Timestamp(row[0]) if row[0] else None
@@ -0,0 +1,150 @@
+import csv
+
+import pandas as pd
+
+from . import telemetry
+from .fx import symbol_currency
+from .price_store import period_start
+from .risk import risk_report
+from .transactions import TransactionLedger
+from .valuation import value_portfolio
+
+# Days of bars read before the last snapshot when extending snapshots.
+SNAPSHOT_LOOKBACK = pd.Timedelta(days=14)
+
+
+def read_holdings(path):
+    """
+    Reads a holdings CSV with symbol, buy_date and units columns into the
+    list of lot dicts used by value_portfolio. Holdings files are small, so
+    the csv module beats building a DataFrame per file.
+    """
+    with open(path, newline="") as f:
+        return [
+            {"symbol": row["symbol"], "buy_date": pd.Timestamp(row["buy_date"]), "units": float(row["units"])}
+            for row in csv.DictReader(f)
+        ]
+
+
+def fetch_closes(store, symbols, period='max', start=None):
+    """
+    Close series for each distinct symbol from a PriceStore, over `period`
+    or from `start` onward. Returns (closes, problems); problems maps
+    symbols that failed or have no bars to a short message.
+    """
+    if start is None:
+        histories, errors = store.histories(symbols, period=period)
+    else:
+        histories, errors = store.histories(symbols, period=period, start=start)
+    closes, problems = {}, {}
+    for symbol in dict.fromkeys(symbols):
+        if symbol in errors:
+            problems[symbol] = f"failed to fetch data: {errors[symbol]}"
+        elif histories[symbol].empty or "Close" not in histories[symbol]:
+            problems[symbol] = "no data found"
+        else:
+            closes[symbol] = histories[symbol]["Close"]
+    return closes, problems
+
+
+def value_holdings(store, holdings, period='max', fx=None):
+    """
+    Total portfolio value over `period` for a list of lot dicts, converted
+    into fx.base when an FxStore is given. Returns (total, problems) where
+    problems is as in fetch_closes.
+    """
+    with telemetry.span("portfolio.fetch", lots=len(holdings), period=period):
+        closes, problems = fetch_closes(store, [h['symbol'] for h in holdings], period)
+    with telemetry.span("portfolio.value", lots=len(holdings), symbols=len(closes)):
+        _, total = value_portfolio(closes, holdings, fx.convert if fx else None)
+    return total, problems
+
+
+def portfolio_values(store, portfolios, portfolio_id, period='max', fx=None):
+    """
+    Daily value series of a stored portfolio (see PortfolioStore) over
+    `period`. Days from the last snapshot on are valued and saved first;
+    the last one is included because its bars may have been written
+    mid-session. Everything older is read back from the snapshots, so
+    reopening a portfolio costs one indexed read however long its history.
+
+    Snapshots hold values in fx.base and are only written when an FxStore
+    is given and every symbol loaded; otherwise the series is valued from
+    scratch. Returns (total, problems) as in value_holdings.
+    """
+    transactions = portfolios.transactions(portfolio_id)
+    if not transactions:
+        return portfolios.snapshots(portfolio_id), {}
+    lots = TransactionLedger(transactions).lots()
+    first = min(pd.Timestamp(t['date']) for t in transactions)
+
+    # A symbol whose history was re-adjusted (split or dividend) since the
+    # snapshots were written changes every past value. Its bars are
+    # refreshed first so a re-adjustment found now is caught too.
+    symbols = list(dict.fromkeys(lot['symbol'] for lot in lots))
+    store.histories(symbols, period='5d')
+    adjusted = store.adjusted_at(symbols)
+    if adjusted is not None and adjusted > (portfolios.snapshot_at(portfolio_id) or 0.0):
+        telemetry.count("portfolio.snapshots_readjusted")
+        portfolios.clear_snapshots(portfolio_id)
+    last = portfolios.last_snapshot(portfolio_id)
+
+    # Bars from a little before the last snapshot give every symbol a close
+    # to carry forward into the new days.
+    start = first if last is None else max(first, last - SNAPSHOT_LOOKBACK)
+    with telemetry.span("portfolio.snapshot", lots=len(lots), start=str(start.date())):
+        closes, problems = fetch_closes(store, [lot['symbol'] for lot in lots], start=start)
+        if problems or fx is None:
+            return value_holdings(store, lots, period, fx)
+        _, total = value_portfolio(closes, lots, fx.convert)
+        portfolios.write_snapshots(portfolio_id, total[total.index >= max(first, last or first)])
+
+    if period.endswith('d'):
+        return portfolios.snapshots(portfolio_id, limit=int(period[:-1])), problems
+    return portfolios.snapshots(portfolio_id, start=period_start(period)), problems
+
+
+def holdings_risk(store, holdings, period='max', benchmark=None, risk_free=0.0, confidence=0.95, fx=None):
+    """
+    Risk report (see risk.risk_report) for a list of lot dicts over
+    `period`, with beta against the `benchmark` symbol when given and
+    positions converted into fx.base when an FxStore is given. Returns
+    (report, problems) where problems is as in fetch_closes and may
+    include the benchmark.
+    """
+    symbols = [h['symbol'] for h in holdings]
+    with telemetry.span("portfolio.fetch", lots=len(holdings), period=period):
+        closes, problems = fetch_closes(store, symbols + ([benchmark] if benchmark else []), period)
+    index = closes.get(benchmark) if benchmark else None
+    if benchmark not in symbols:
+        closes.pop(benchmark, None)
+    report = risk_report(closes, holdings, index, risk_free, confidence, fx.convert if fx else None)
+    return report, problems
+
+
+def ledger_summary(store, transactions, as_of=None, fx=None):
+    """
+    FIFO positions (see TransactionLedger.positions) for a transaction
+    list, valued at each symbol's latest close, with "Currency" and "XIRR"
+    columns. With an FxStore, every transaction is converted into fx.base
+    at its own date's rate and closes at the latest rate, so P&L and XIRR
+    include currency gains. Returns (positions, total XIRR, problems) where
+    problems is as in fetch_closes. Symbols still held but without a close
+    get NaN XIRR and are left out of the total. Raises ValueError for a
+    sale of more units than held.
+    """
+    if fx is not None:
+        transactions = fx.convert_transactions(transactions)
+    ledger = TransactionLedger(transactions)
+    with telemetry.span("portfolio.fetch", symbols=len(ledger.symbols), period="5d"):
+        closes, problems = fetch_closes(store, ledger.symbols, period="5d")
+    prices = {symbol: float(close.iloc[-1]) for symbol, close in closes.items()}
+    if fx is not None:
+        prices = {symbol: price * fx.rates(symbol_currency(symbol), [closes[symbol].index[-1]])[0]
+                  for symbol, price in prices.items()}
+    with telemetry.span("portfolio.ledger", transactions=len(ledger.frame)):
+        positions = ledger.positions(prices)
+        returns = ledger.money_weighted_returns(positions["Market Value"].to_dict(), as_of)
+    positions.insert(0, "Currency", positions.index.map(symbol_currency))
+    positions["XIRR"] = returns.reindex(positions.index)
+    return positions, float(returns["Total"]), problems
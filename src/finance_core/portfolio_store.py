@@ -0,0 +1,205 @@
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from .transactions import TRANSACTION_COLUMNS
+
+PORTFOLIO_PATH = "data/portfolios.sqlite"
+
+DEFAULT_OWNER = "default"
+
+# Bumped when the meaning of stored snapshots changes; older ones are
+# dropped on open and rebuilt on demand. 1: values in the base currency.
+# 2: portfolios record when their snapshots were last written.
+SNAPSHOT_VERSION = 2
+
+
+class PortfolioStore:
+    """
+    Persistent SQLite store of named portfolios, their transactions and
+    materialized daily valuation snapshots.
+
+    Each owner can keep several portfolios. Snapshots are values in the
+    base currency (see fx.FxStore) keyed by (portfolio, date) without a
+    rowid, so a portfolio's whole value series is one range scan of the
+    primary key. Adding or removing a transaction
+    deletes the snapshots from its date onward, since only those days
+    change; see portfolio.portfolio_values for how they are extended and
+    for dropping them all when a symbol's price history is re-adjusted.
+    """
+
+    def __init__(self, path=PORTFOLIO_PATH):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS portfolios ("
+                "id INTEGER PRIMARY KEY, owner TEXT NOT NULL, name TEXT NOT NULL, snapshot_at REAL, "
+                "UNIQUE (owner, name))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transactions ("
+                "id INTEGER PRIMARY KEY, portfolio_id INTEGER NOT NULL, date TEXT NOT NULL, "
+                "symbol TEXT NOT NULL, stock TEXT, type TEXT NOT NULL, "
+                "units REAL, price REAL, ratio REAL, amount REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_portfolio ON transactions (portfolio_id, id)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "portfolio_id INTEGER NOT NULL, date TEXT NOT NULL, value REAL NOT NULL, "
+                "PRIMARY KEY (portfolio_id, date)) WITHOUT ROWID"
+            )
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version < SNAPSHOT_VERSION:
+                conn.execute("DELETE FROM snapshots")
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(portfolios)")]
+                if "snapshot_at" not in columns:
+                    conn.execute("ALTER TABLE portfolios ADD COLUMN snapshot_at REAL")
+                conn.execute(f"PRAGMA user_version = {SNAPSHOT_VERSION}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- Portfolios ---
+
+    def portfolios(self, owner=DEFAULT_OWNER):
+        """
+        Names of the owner's portfolios in the order they were created.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT name FROM portfolios WHERE owner = ? ORDER BY id", (owner,)).fetchall()
+        return [name for (name,) in rows]
+
+    def create(self, name, owner=DEFAULT_OWNER):
+        """
+        Creates a portfolio unless it exists; returns its id.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO portfolios (owner, name) VALUES (?, ?)", (owner, name))
+            return conn.execute(
+                "SELECT id FROM portfolios WHERE owner = ? AND name = ?", (owner, name)
+            ).fetchone()[0]
+
+    def portfolio_id(self, name, owner=DEFAULT_OWNER):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT id FROM portfolios WHERE owner = ? AND name = ?", (owner, name)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, portfolio_id):
+        """
+        Deletes a portfolio with its transactions and snapshots.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM snapshots WHERE portfolio_id = ?", (portfolio_id,))
+            conn.execute("DELETE FROM transactions WHERE portfolio_id = ?", (portfolio_id,))
+            conn.execute("DELETE FROM portfolios WHERE id = ?", (portfolio_id,))
+
+    # --- Transactions ---
+
+    def transactions(self, portfolio_id):
+        """
+        The portfolio's transactions in the order they were added, as dicts
+        with an "id" and a "stock" display name besides TRANSACTION_COLUMNS.
+        """
+        columns = ["id", "stock"] + TRANSACTION_COLUMNS
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM transactions WHERE portfolio_id = ? ORDER BY id",
+                (portfolio_id,),
+            ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def add_transactions(self, portfolio_id, transactions):
+        """
+        Appends transaction dicts and drops the snapshots they change.
+        """
+        rows = [
+            (portfolio_id, pd.Timestamp(t["date"]).strftime("%Y-%m-%d"), t["symbol"], t.get("stock"),
+             t["type"], t.get("units"), t.get("price"), t.get("ratio"), t.get("amount"))
+            for t in transactions
+        ]
+        if not rows:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO transactions (portfolio_id, date, symbol, stock, type, units, price, ratio, amount) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._invalidate(conn, portfolio_id, min(row[1] for row in rows))
+
+    def remove_transactions(self, portfolio_id, ids):
+        """
+        Deletes transactions by id and drops the snapshots they changed.
+        """
+        ids = list(ids)
+        if not ids:
+            return
+        marks = ",".join("?" * len(ids))
+        with closing(self._connect()) as conn, conn:
+            (first,) = conn.execute(
+                f"SELECT MIN(date) FROM transactions WHERE portfolio_id = ? AND id IN ({marks})",
+                [portfolio_id, *ids],
+            ).fetchone()
+            conn.execute(f"DELETE FROM transactions WHERE portfolio_id = ? AND id IN ({marks})",
+                         [portfolio_id, *ids])
+            if first is not None:
+                self._invalidate(conn, portfolio_id, first)
+
+    # --- Snapshots ---
+
+    def _invalidate(self, conn, portfolio_id, date):
+        conn.execute("DELETE FROM snapshots WHERE portfolio_id = ? AND date >= ?", (portfolio_id, date))
+
+    def snapshot_at(self, portfolio_id):
+        """
+        time.time() of the last write_snapshots, or None.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT snapshot_at FROM portfolios WHERE id = ?", (portfolio_id,)).fetchone()
+        return row[0] if row else None
+
+    def clear_snapshots(self, portfolio_id):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM snapshots WHERE portfolio_id = ?", (portfolio_id,))
+
+    def last_snapshot(self, portfolio_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT MAX(date) FROM snapshots WHERE portfolio_id = ?", (portfolio_id,)).fetchone()
+        return pd.Timestamp(row[0]) if row[0] else None
+
+    def write_snapshots(self, portfolio_id, total):
+        """
+        Upserts daily values from a Series indexed by date.
+        """
+        rows = [(portfolio_id, date.strftime("%Y-%m-%d"), float(value)) for date, value in total.items()]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", rows)
+            conn.execute("UPDATE portfolios SET snapshot_at = ? WHERE id = ?", (time.time(), portfolio_id))
+
+    def snapshots(self, portfolio_id, start=None, limit=None):
+        """
+        Stored daily values from start onward, or only the last `limit`
+        days, as a "Total Value" Series indexed by date.
+        """
+        query = "SELECT date, value FROM snapshots WHERE portfolio_id = ?"
+        params = [portfolio_id]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if limit is not None:
+            query += " ORDER BY date DESC LIMIT ?"
+            params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return pd.Series(dtype=float, index=pd.DatetimeIndex([], name="Date"), name="Total Value")
+        dates, values = zip(*rows)
+        total = pd.Series(values, index=pd.DatetimeIndex(dates, name="Date"), name="Total Value", dtype=float)
+        return total.sort_index()
@@ -0,0 +1,426 @@
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from . import telemetry
+
+DB_PATH = "data/prices.sqlite"
+OHLC_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Symbols refreshed more recently than this are served straight from disk.
+REFRESH_INTERVAL = 15 * 60
+
+# Upper bound on concurrent provider requests, to stay clear of rate limits.
+MAX_WORKERS = 8
+
+# Relative change in a settled close that means the provider re-adjusted
+# the symbol's history (after a split or dividend) rather than rounding.
+ADJUSTMENT_TOLERANCE = 1e-4
+
+PERIOD_OFFSETS = {
+    '1d': pd.offsets.BDay(1),
+    '5d': pd.offsets.BDay(5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+
+# Summary of a symbol's bars kept in the symbols table (see PriceStore.contents);
+# each subquery is a range scan of the bars primary key.
+CONTENT_SET = (
+    "last_date = (SELECT MAX(date) FROM bars WHERE symbol = ?), "
+    "last_close = (SELECT close FROM bars WHERE symbol = ? ORDER BY date DESC LIMIT 1), "
+    "bars = (SELECT COUNT(*) FROM bars WHERE symbol = ?)"
+)
+
+
+def _empty_history():
+    return pd.DataFrame(columns=OHLC_COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+
+
+class YahooProvider:
+    """
+    Fetches daily bars from Yahoo Finance via yfinance.
+    """
+
+    def fetch(self, symbol, start=None):
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if start is None:
+            hist = ticker.history(period="max")
+        else:
+            hist = ticker.history(start=start.strftime("%Y-%m-%d"))
+
+        if hist.empty or "Close" not in hist.columns:
+            return _empty_history()
+
+        if hist.index.tz is not None:
+            hist.index = hist.index.tz_localize(None)
+        hist.index = hist.index.normalize()
+        hist.index.name = "Date"
+        return hist[OHLC_COLUMNS]
+
+    def quote(self, symbol):
+        """
+        Latest traded price, from the lightweight fast_info endpoint rather
+        than the full ticker.info payload.
+        """
+        import yfinance as yf
+
+        return float(yf.Ticker(symbol).fast_info["last_price"])
+
+
+class FakeProvider:
+    """
+    Offline provider that generates a deterministic random walk per symbol.
+    """
+
+    def __init__(self, start="2000-01-03", end=None):
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+
+    def fetch(self, symbol, start=None):
+        dates = pd.bdate_range(self.start, self.end, name="Date")
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates))))
+        spread = close * rng.uniform(0, 0.01, len(dates))
+        hist = pd.DataFrame({
+            "Open": close - spread / 2,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, len(dates)).astype(float),
+        }, index=dates)
+
+        if start is not None:
+            hist = hist[hist.index >= pd.Timestamp(start)]
+        return hist
+
+    def quote(self, symbol):
+        return float(self.fetch(symbol)["Close"].iloc[-1])
+
+
+class NavProvider:
+    """
+    Serves mutual fund NAVs from the local AMFI NAV store as daily bars
+    (the NAV fills Open, High, Low and Close; there is no volume).
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        # Created on first use so that stock-only sessions never touch data/nav.
+        if self._store is None:
+            from .nav_store import NavStore
+
+            self._store = NavStore()
+        return self._store
+
+    def fetch(self, symbol, start=None):
+        try:
+            self.store.update()
+        except Exception:
+            # Offline or AMFI unavailable: serve the snapshots already stored.
+            telemetry.count("nav_store.update_failed")
+
+        nav = self.store.history(symbol, start=start)
+        hist = pd.DataFrame({col: nav for col in OHLC_COLUMNS[:4]}, index=nav.index)
+        hist["Volume"] = np.nan
+        return hist
+
+    def quote(self, symbol):
+        latest = self.store.latest(symbol)
+        if latest is None:
+            raise LookupError(f"no NAV stored for scheme {symbol}")
+        return float(latest[1])
+
+
+class FundRouter:
+    """
+    Sends AMFI scheme codes to the NAV provider and every other symbol to
+    the market data provider.
+    """
+
+    def __init__(self, market, funds):
+        self.market = market
+        self.funds = funds
+
+    def _route(self, symbol):
+        from .nav_store import is_scheme_code
+
+        return self.funds if is_scheme_code(symbol) else self.market
+
+    def fetch(self, symbol, start=None):
+        return self._route(symbol).fetch(symbol, start=start)
+
+    def quote(self, symbol):
+        return self._route(symbol).quote(symbol)
+
+
+def default_provider():
+    """
+    Returns the provider selected by FINANCEAPP_PRICE_PROVIDER ('yahoo' or
+    'fake'). With 'yahoo', mutual fund scheme codes are served from the
+    AMFI NAV store instead.
+    """
+    if os.environ.get("FINANCEAPP_PRICE_PROVIDER", "yahoo").lower() == "fake":
+        return FakeProvider()
+    return FundRouter(YahooProvider(), NavProvider())
+
+
+def period_start(period):
+    """
+    Returns the first date covered by a yfinance-style period, or None for
+    'max'. Raises ValueError for a period yfinance does not define.
+    """
+    today = pd.Timestamp.today().normalize()
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return today.replace(month=1, day=1)
+    if period not in PERIOD_OFFSETS:
+        supported = ", ".join([*PERIOD_OFFSETS, 'ytd', 'max'])
+        raise ValueError(f"unsupported period {period!r}; expected one of {supported}")
+    return today - PERIOD_OFFSETS[period]
+
+
+class PriceStore:
+    """
+    SQLite-backed store of daily OHLC bars keyed by (symbol, date).
+
+    Only bars after the last stored date are requested from the provider;
+    every period is answered by slicing what is already on disk. Yahoo
+    bars are adjusted for splits and dividends, so each refresh also checks
+    one settled stored bar against the provider and rewrites the symbol's
+    whole history when the provider has re-adjusted it.
+    """
+
+    def __init__(self, path=DB_PATH, provider=None, refresh_interval=REFRESH_INTERVAL):
+        self.path = path
+        self.provider = provider or default_provider()
+        self.refresh_interval = refresh_interval
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                "symbol TEXT NOT NULL, date TEXT NOT NULL, "
+                "open REAL, high REAL, low REAL, close REAL, volume REAL, "
+                "PRIMARY KEY (symbol, date)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS symbols ("
+                "symbol TEXT PRIMARY KEY, refreshed_at REAL NOT NULL, adjusted_at REAL, "
+                "last_date TEXT, last_close REAL, bars INTEGER)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(symbols)")]
+            if "adjusted_at" not in columns:
+                conn.execute("ALTER TABLE symbols ADD COLUMN adjusted_at REAL")
+            if "bars" not in columns:
+                # Stores from before content keys are summarized once.
+                for col, kind in [("last_date", "TEXT"), ("last_close", "REAL"), ("bars", "INTEGER")]:
+                    conn.execute(f"ALTER TABLE symbols ADD COLUMN {col} {kind}")
+                for (symbol,) in conn.execute("SELECT symbol FROM symbols").fetchall():
+                    conn.execute(f"UPDATE symbols SET {CONTENT_SET} WHERE symbol = ?", (symbol,) * 4)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def last_date(self, symbol):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT MAX(date) FROM bars WHERE symbol = ?", (symbol,)).fetchone()
+        return pd.Timestamp(row[0]) if row[0] else None
+
+    def is_fresh(self, symbol):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT refreshed_at FROM symbols WHERE symbol = ?", (symbol,)).fetchone()
+        return row is not None and time.time() - row[0] < self.refresh_interval
+
+    def version(self, symbols):
+        """
+        Token that changes whenever any of `symbols` is written, for keying
+        caches of results derived from their bars.
+        """
+        unique = sorted(set(symbols))
+        if not unique:
+            return (0, None)
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT COUNT(*), MAX(refreshed_at) FROM symbols WHERE symbol IN ({','.join('?' * len(unique))})",
+                unique,
+            ).fetchone()
+        return tuple(row)
+
+    def adjusted_at(self, symbols):
+        """
+        Latest time any of `symbols` had its whole history rewritten after
+        a re-adjustment, or None if none ever had.
+        """
+        unique = sorted(set(symbols))
+        if not unique:
+            return None
+        with closing(self._connect()) as conn:
+            (stamp,) = conn.execute(
+                f"SELECT MAX(adjusted_at) FROM symbols WHERE symbol IN ({','.join('?' * len(unique))})",
+                unique,
+            ).fetchone()
+        return stamp
+
+    def contents(self):
+        """
+        (last date, last close, bar count, adjusted_at) of every stored
+        symbol, as a dict. Unlike refreshed_at, which every refresh bumps,
+        these only change when a symbol's bars do.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT symbol, last_date, last_close, bars, adjusted_at FROM symbols").fetchall()
+        return {symbol: tuple(key) for symbol, *key in rows}
+
+    def write(self, symbol, hist, replace=False):
+        """
+        Upserts bars for a symbol and marks it as refreshed. With replace,
+        the symbol's stored bars are swapped for `hist` in one transaction
+        and it is marked as re-adjusted.
+        """
+        rows = [
+            (symbol, date.strftime("%Y-%m-%d"), *values)
+            for date, values in zip(hist.index, hist[OHLC_COLUMNS].itertuples(index=False, name=None))
+        ]
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            if replace:
+                conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+            conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT INTO symbols (symbol, refreshed_at, adjusted_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (symbol) DO UPDATE SET "
+                "refreshed_at = excluded.refreshed_at, adjusted_at = COALESCE(excluded.adjusted_at, adjusted_at)",
+                (symbol, now, now if replace else None),
+            )
+            conn.execute(f"UPDATE symbols SET {CONTENT_SET} WHERE symbol = ?", (symbol,) * 4)
+
+    def _anchor(self, symbol):
+        """
+        (date, close) of the second newest stored bar, which is settled
+        even when the newest was written mid-session; the newest when it is
+        the only one, or None for an unknown symbol.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT date, close FROM bars WHERE symbol = ? ORDER BY date DESC LIMIT 2", (symbol,)
+            ).fetchall()
+        return (pd.Timestamp(rows[-1][0]), rows[-1][1]) if rows else None
+
+    def refresh(self, symbol, force=False):
+        """
+        Fetches bars from the second newest stored date on. The newest
+        stored bar is re-fetched since it may have been written
+        mid-session; the one before it is compared with the provider's, and
+        if it changed, the provider has re-adjusted the history for a split
+        or dividend and every bar is fetched again and replaced.
+        """
+        if not force and self.is_fresh(symbol):
+            telemetry.count("price_store.fresh")
+            return
+        anchor = self._anchor(symbol)
+        telemetry.count("price_store.fetch")
+        with telemetry.span("price_store.fetch", symbol=symbol) as fields:
+            hist = self.provider.fetch(symbol, start=anchor[0] if anchor else None)
+            if fields is not None:
+                fields["rows"] = len(hist)
+
+        replace = anchor is not None and not hist.empty and not self._matches(hist, *anchor)
+        if replace:
+            telemetry.count("price_store.readjust")
+            with telemetry.span("price_store.readjust", symbol=symbol) as fields:
+                hist = self.provider.fetch(symbol)
+                if fields is not None:
+                    fields["rows"] = len(hist)
+            if hist.empty:
+                return
+        with telemetry.span("price_store.write", symbol=symbol, rows=len(hist)):
+            self.write(symbol, hist, replace=replace)
+
+    @staticmethod
+    def _matches(hist, date, close):
+        if date not in hist.index:
+            return False
+        fetched = hist["Close"].loc[date]
+        return bool(np.isclose(fetched, close, rtol=ADJUSTMENT_TOLERANCE, atol=0.0, equal_nan=True))
+
+    def read(self, symbol, start=None, limit=None):
+        """
+        Reads stored bars from start onward, or only the last `limit` bars.
+        """
+        query = "SELECT date, open, high, low, close, volume FROM bars WHERE symbol = ?"
+        params = [symbol]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if limit is not None:
+            query += " ORDER BY date DESC LIMIT ?"
+            params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return _empty_history()
+
+        dates, *values = zip(*rows)
+        hist = pd.DataFrame(dict(zip(OHLC_COLUMNS, values)), index=pd.DatetimeIndex(dates, name="Date"))
+        return hist.astype(float).sort_index()
+
+    def history(self, symbol, period='max', refresh=True, start=None):
+        """
+        Returns daily bars for a yfinance-style period ('5d' ... 'max'), or
+        from `start` onward when given, refreshing the tail from the
+        provider first.
+        """
+        with telemetry.span("price_store.history", symbol=symbol, period=period) as fields:
+            if refresh:
+                self.refresh(symbol)
+            if start is not None:
+                hist = self.read(symbol, start=start)
+            elif period.endswith('d'):
+                hist = self.read(symbol, limit=int(period[:-1]))
+            else:
+                hist = self.read(symbol, start=period_start(period))
+            if fields is not None:
+                fields["rows"], fields["bytes"] = len(hist), telemetry.frame_bytes(hist)
+        return hist
+
+    def histories(self, symbols, period='max', max_workers=MAX_WORKERS, start=None):
+        """
+        Fetches many symbols at once through a bounded thread pool.
+
+        Duplicate symbols are fetched once. Returns (histories, errors), both
+        dicts keyed by symbol; a failing symbol lands in errors without
+        affecting the others.
+        """
+        unique = list(dict.fromkeys(symbols))
+        histories, errors = {}, {}
+        if not unique:
+            return histories, errors
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as pool:
+            futures = {symbol: pool.submit(self.history, symbol, period, start=start) for symbol in unique}
+            for symbol, future in futures.items():
+                try:
+                    histories[symbol] = future.result()
+                except Exception as e:
+                    errors[symbol] = e
+        return histories, errors
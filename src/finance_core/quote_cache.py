@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import telemetry
+from .price_store import MAX_WORKERS, PriceStore
+
+# Live prices go stale quickly; daily bars only change at the tail.
+QUOTE_TTL = 30
+HISTORY_TTLS = {
+    '5d': 5 * 60,
+    '1mo': 15 * 60,
+}
+DEFAULT_HISTORY_TTL = 60 * 60
+
+# Upper bound on the memory held by cached histories and quotes.
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# A symbol stays on the poller's list this long after a session last read it.
+WATCH_TTL = 2 * 60
+POLL_INTERVAL = 10
+
+# Cold fetches of the same key wait on one lock; keys share a fixed set of
+# locks by hash so the set does not grow with every key ever fetched.
+FETCH_LOCKS = 64
+
+
+def history_ttl(period):
+    return HISTORY_TTLS.get(period, DEFAULT_HISTORY_TTL)
+
+
+def _size_of(value):
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    return 64
+
+
+class QuoteCache:
+    """
+    Process-wide cache of live quotes and daily histories shared by every
+    Streamlit session.
+
+    Sessions only read snapshots: a cold key is fetched once (concurrent
+    readers wait for the same fetch), after which a single background
+    poller refreshes expired entries for the symbols someone has read
+    within WATCH_TTL. Entries are evicted least-recently-used once their
+    estimated size exceeds max_bytes.
+    """
+
+    def __init__(self, store=None, max_bytes=MAX_CACHE_BYTES, quote_ttl=QUOTE_TTL,
+                 watch_ttl=WATCH_TTL, poll_interval=POLL_INTERVAL):
+        self.store = store or PriceStore()
+        self.max_bytes = max_bytes
+        self.quote_ttl = quote_ttl
+        self.watch_ttl = watch_ttl
+        self.poll_interval = poll_interval
+
+        self._entries = OrderedDict()  # key -> (value, fetched_at, size)
+        self._bytes = 0
+        self._watched = {}  # symbol -> last read time
+        self._lock = threading.Lock()
+        self._fetch_locks = [threading.Lock() for _ in range(FETCH_LOCKS)]
+        self._poller = None
+        self._stop = threading.Event()
+
+    # --- Entries ---
+
+    def _ttl(self, key):
+        return self.quote_ttl if key[0] == "quote" else history_ttl(key[2])
+
+    def _load(self, key):
+        if key[0] == "quote":
+            return self.store.provider.quote(key[1])
+        # Short tiers expire before the store would refetch on its own.
+        if history_ttl(key[2]) < self.store.refresh_interval:
+            self.store.refresh(key[1], force=True)
+            return self.store.history(key[1], period=key[2], refresh=False)
+        return self.store.history(key[1], period=key[2])
+
+    def _put(self, key, value):
+        size = _size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[2]
+            self._entries[key] = (value, time.time(), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                telemetry.count("quote_cache.evict")
+
+    def _fetch(self, key):
+        with self._fetch_locks[hash(key) % len(self._fetch_locks)]:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] < self._ttl(key):
+                return entry[0]
+            with telemetry.span(f"quote_cache.load.{key[0]}", symbol=key[1]) as fields:
+                value = self._load(key)
+                if fields is not None:
+                    fields["bytes"] = _size_of(value)
+            self._put(key, value)
+            return value
+
+    def _cached(self, key):
+        """
+        Returns (True, value) for a cached key, else (False, None).
+        """
+        self.watch(key[1])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                telemetry.count("quote_cache.hit")
+                return True, entry[0]
+        telemetry.count("quote_cache.miss")
+        return False, None
+
+    def _get(self, key):
+        found, value = self._cached(key)
+        return value if found else self._fetch(key)
+
+    def quote(self, symbol):
+        """
+        Latest traded price for a symbol, refreshed every quote_ttl seconds.
+        """
+        return self._get(("quote", symbol))
+
+    def history(self, symbol, period='max'):
+        """
+        Daily bars for a yfinance-style period, refreshed on the period's TTL.
+        """
+        return self._get(("history", symbol, period))
+
+    def histories(self, symbols, period='max', max_workers=MAX_WORKERS):
+        """
+        Histories for many symbols at once: cached ones are returned as is
+        and only the misses are fetched, concurrently through a bounded
+        pool. Returns (histories, errors) like PriceStore.histories.
+        """
+        histories, errors, misses = {}, {}, []
+        for symbol in dict.fromkeys(symbols):
+            found, value = self._cached(("history", symbol, period))
+            if found:
+                histories[symbol] = value
+            else:
+                misses.append(symbol)
+        if not misses:
+            return histories, errors
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(misses))) as pool:
+            futures = {symbol: pool.submit(self._fetch, ("history", symbol, period)) for symbol in misses}
+            for symbol, future in futures.items():
+                try:
+                    histories[symbol] = future.result()
+                except Exception as e:
+                    errors[symbol] = e
+        return histories, errors
+
+    def age(self, symbol, period=None):
+        """
+        Seconds since the quote (or the period's history) was fetched, or None.
+        """
+        key = ("quote", symbol) if period is None else ("history", symbol, period)
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else time.time() - entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "watched": len(self._watched)}
+
+    # --- Background poller ---
+
+    def watch(self, symbol):
+        """
+        Marks a symbol as being viewed and starts the poller if needed.
+        """
+        with self._lock:
+            self._watched[symbol] = time.time()
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll_loop, name="quote-poller", daemon=True)
+                self._poller.start()
+
+    def expired_keys(self):
+        """
+        Cached keys of watched symbols whose TTL has passed. Symbols nobody
+        has read within watch_ttl are dropped from the watch list.
+        """
+        now = time.time()
+        with self._lock:
+            for symbol, seen in list(self._watched.items()):
+                if now - seen > self.watch_ttl:
+                    del self._watched[symbol]
+            return [
+                key for key, (_, fetched_at, _) in self._entries.items()
+                if key[1] in self._watched and now - fetched_at >= self._ttl(key)
+            ]
+
+    def refresh_expired(self, max_workers=MAX_WORKERS):
+        """
+        Refreshes every expired watched key once, through a bounded pool.
+        Returns the number of keys refreshed.
+        """
+        keys = self.expired_keys()
+        if not keys:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as pool:
+            results = list(pool.map(self._refresh_key, keys))
+        telemetry.count("quote_cache.poll_refresh", sum(results))
+        return sum(results)
+
+    def _refresh_key(self, key):
+        try:
+            self._fetch(key)
+            return True
+        except Exception:
+            # Keep serving the previous snapshot; the next poll retries.
+            return False
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh_expired()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,211 @@
+"""
+Portfolio risk and performance analytics over the aligned close matrix.
+
+Everything is computed from one dates x symbols matrix (see
+valuation.align_closes) with array operations, so a few hundred holdings
+over ten or more years take milliseconds rather than seconds.
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from . import telemetry
+from .valuation import align_closes, traded_mask, value_aligned
+
+TRADING_DAYS = 252
+
+
+def daily_returns(matrix):
+    """
+    Simple daily returns of each column of an aligned close matrix, and a
+    mask of the valid ones. A return is invalid on the first row and
+    wherever the previous close is 0 (before the series starts).
+    """
+    returns = np.zeros_like(matrix)
+    valid = np.zeros(matrix.shape, dtype=bool)
+    if len(matrix) < 2:
+        return returns, valid
+    prev, curr = matrix[:-1], matrix[1:]
+    valid[1:] = (prev > 0) & (curr > 0)
+    np.divide(curr, prev, out=returns[1:], where=valid[1:])
+    returns[1:] -= valid[1:]
+    return returns, valid
+
+
+def pairwise_cov(returns, valid):
+    """
+    Sample covariance of every pair of columns over the rows where both are
+    valid, computed with three matrix products instead of a loop over pairs.
+    Returns (cov, counts).
+    """
+    x = np.where(valid, returns, 0.0)
+    m = valid.astype(float)
+    counts = m.T @ m
+    sums = x.T @ m  # sums[i, j]: sum of column i over the rows where j is valid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (x.T @ x - sums * sums.T / counts) / (counts - 1)
+    cov[counts < 2] = np.nan
+    return cov, counts
+
+
+def pairwise_corr(returns, valid):
+    """
+    Correlation of every pair of columns over the rows where both are
+    valid. Each pair's variances use the same rows as its covariance, so
+    values stay within [-1, 1] even when the columns cover different dates.
+    """
+    x = np.where(valid, returns, 0.0)
+    m = valid.astype(float)
+    counts = m.T @ m
+    sums = x.T @ m
+    squares = (x * x).T @ m  # squares[i, j]: sum of column i squared over the rows where j is valid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = x.T @ x - sums * sums.T / counts
+        var = squares - sums ** 2 / counts
+        corr = cov / np.sqrt(var * var.T)
+    corr[counts < 2] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def portfolio_returns(values, returns, valid):
+    """
+    Daily portfolio returns weighted by the previous day's position values,
+    so buying more units is not mistaken for a gain. Rows where nothing was
+    held the day before are dropped; returns (rows, portfolio returns).
+    """
+    weights = values[:-1] * valid[1:]
+    invested = weights.sum(axis=1)
+    rows = np.flatnonzero(invested > 0) + 1
+    gains = (weights * returns[1:]).sum(axis=1)
+    return rows, gains[rows - 1] / invested[rows - 1]
+
+
+def _ratio(numerator, denominator):
+    return float(numerator / denominator) if denominator > 0 else np.nan
+
+
+def risk_metrics(returns, risk_free=0.0, confidence=0.95, benchmark=None):
+    """
+    Annualized return and volatility, Sharpe and Sortino ratios, one-day
+    historical and parametric (normal) VaR with historical CVaR, and beta
+    against `benchmark` returns on the same days (NaN entries skipped).
+    Losses are reported as positive fractions of portfolio value.
+    """
+    daily_rf = risk_free / TRADING_DAYS
+    mean, std = returns.mean(), returns.std(ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(returns - daily_rf, 0) ** 2))
+
+    var_hist = -np.quantile(returns, 1 - confidence)
+    tail = returns[returns <= -var_hist]
+    metrics = {
+        "Annual Return": (1 + mean) ** TRADING_DAYS - 1,
+        "Annual Volatility": std * np.sqrt(TRADING_DAYS),
+        "Sharpe": _ratio((mean - daily_rf) * np.sqrt(TRADING_DAYS), std),
+        "Sortino": _ratio((mean - daily_rf) * np.sqrt(TRADING_DAYS), downside),
+        "VaR (historical)": var_hist,
+        "CVaR (historical)": -tail.mean() if len(tail) else var_hist,
+        "VaR (parametric)": -(mean + NormalDist().inv_cdf(1 - confidence) * std),
+        "Beta": np.nan,
+    }
+
+    if benchmark is not None:
+        both = ~np.isnan(benchmark)
+        if both.sum() > 1:
+            rp, rb = returns[both], benchmark[both]
+            metrics["Beta"] = _ratio(np.cov(rp, rb)[0, 1], rb.var(ddof=1))
+    return {name: float(value) for name, value in metrics.items()}
+
+
+def risk_contributions(cov, weights):
+    """
+    Splits portfolio volatility sqrt(w' C w) into per-holding parts
+    w_i (C w)_i / sigma that sum to it. Returns (sigma, marginal, component).
+    """
+    cw = cov @ weights
+    sigma = float(np.sqrt(weights @ cw))
+    if sigma == 0:
+        return sigma, np.zeros_like(weights), np.zeros_like(weights)
+    marginal = cw / sigma
+    return sigma, marginal, weights * marginal
+
+
+def risk_report(closes, holdings, benchmark=None, risk_free=0.0, confidence=0.95, convert=None):
+    """
+    Risk and performance report for a list of lot dicts.
+
+    `closes` maps symbol -> close Series as for value_portfolio, and
+    `benchmark` is an optional index close Series for beta; `convert` is
+    applied to the aligned matrix as in value_portfolio. Returns None
+    when there are fewer than two days of portfolio returns, otherwise a
+    dict with:
+
+        metrics        dict from risk_metrics, plus "Max Drawdown"
+        returns        daily portfolio returns (Series)
+        correlation    held symbols x held symbols (DataFrame)
+        contributions  per-holding weight, volatility, beta to the portfolio
+                       and share of portfolio volatility (DataFrame)
+    """
+    with telemetry.span("risk.align", symbols=len(closes)):
+        dates, symbols, matrix = align_closes(closes)
+        if convert is not None:
+            matrix = convert(dates, symbols, matrix)
+        positions, _ = value_aligned(dates, symbols, matrix, holdings)
+    if positions.empty:
+        return None
+
+    with telemetry.span("risk.compute", symbols=positions.shape[1], rows=len(dates)):
+        held_cols = [symbols.index(s) for s in positions.columns]
+        prices = matrix[:, held_cols]
+        returns, valid = daily_returns(prices)
+        rows, port = portfolio_returns(positions.to_numpy(), returns, valid)
+        if len(port) < 2:
+            return None
+
+        bench = None
+        if benchmark is not None and not benchmark.empty:
+            level = benchmark.reindex(dates, method="ffill").to_numpy(dtype=float)
+            bench = np.full(len(dates), np.nan)
+            bench[1:] = level[1:] / level[:-1] - 1
+            bench = bench[rows]
+        metrics = risk_metrics(port, risk_free, confidence, bench)
+
+        # Drawdown of the return-weighted index, so buys and sells (cash
+        # flows) are not mistaken for gains or losses.
+        growth = np.concatenate([[1.0], np.cumprod(1 + port)])
+        metrics["Max Drawdown"] = float(np.min(growth / np.maximum.accumulate(growth) - 1))
+
+        # Covariance over the days the portfolio was invested, annualized.
+        # A symbol's return only counts when its market traded that day and
+        # the day before: a close carried over a holiday is a fake 0% return,
+        # and the return after it spans two days, so neither lines up with
+        # other markets' daily returns. Each pair then uses the days both
+        # have such a return.
+        traded = traded_mask(closes, dates, symbols)[:, held_cols]
+        traded[1:] &= traded[:-1]
+        traded = (valid & traded)[rows]
+        cov, _ = pairwise_cov(returns[rows], traded)
+        cov *= TRADING_DAYS
+        vol = np.sqrt(np.diag(cov))
+        corr = pairwise_corr(returns[rows], traded)
+
+        last = positions.to_numpy()[-1]
+        weights = last / last.sum() if last.sum() > 0 else np.zeros_like(last)
+        sigma, marginal, component = risk_contributions(np.nan_to_num(cov), weights)
+
+    held = list(positions.columns)
+    contributions = pd.DataFrame({
+        "Weight": weights,
+        "Volatility": vol,
+        "Beta to Portfolio": marginal / sigma if sigma > 0 else np.nan,
+        "Risk Contribution": component,
+        "Share of Risk": component / sigma if sigma > 0 else np.nan,
+    }, index=pd.Index(held, name="Symbol"))
+
+    return {
+        "metrics": metrics,
+        "returns": pd.Series(port, index=dates[rows], name="Return"),
+        "correlation": pd.DataFrame(corr, index=held, columns=held),
+        "contributions": contributions.sort_values("Share of Risk", ascending=False),
+    }
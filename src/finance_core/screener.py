@@ -0,0 +1,239 @@
+"""
+Universe-wide screener over the histories already in the local price store.
+
+Workers in a process pool each read a chunk of symbols straight from the
+price store's SQLite file: only the last year of bars, plus one index seek
+per longer horizon, so the cost per symbol does not grow with its history.
+Results are kept as a columnar Arrow table (data/screener.arrow) along with
+a content key of the bars they came from (last date, last close, bar count
+and re-adjustment time; see PriceStore.contents), so a later scan only
+recomputes symbols whose bars actually changed since, not every symbol a
+price refresh touched. The table is saved
+every few seconds during a scan, so an interrupted scan resumes where it
+stopped.
+
+    PYTHONPATH=src python -m finance_core screen --fetch
+"""
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from . import telemetry
+from .price_store import PriceStore
+
+RESULTS_PATH = "data/screener.arrow"
+
+# Symbols per worker task, and how often partial results are saved.
+CHUNK_SIZE = 200
+CHECKPOINT_SECONDS = 5
+
+TRADING_DAYS = 252
+
+# Return horizons in calendar days back from each symbol's last bar.
+HORIZONS = {
+    "1W": 7,
+    "1M": 30,
+    "6M": 182,
+    "1Y": 365,
+    "3Y": 3 * 365,
+    "5Y": 5 * 365,
+}
+
+METRIC_COLUMNS = (
+    [f"Return {h}" for h in HORIZONS]
+    + ["CAGR 3Y", "Volatility 1Y", "Max Drawdown 1Y", "From 52W High", "From 52W Low"]
+)
+RESULT_COLUMNS = ["Symbol", "First Date", "Last Date", "Last Close"] + METRIC_COLUMNS + ["content"]
+
+# Only the last year of bars is read; older horizons are one index seek each.
+WINDOW_DAYS = 365
+
+BOUNDS_SQL = (
+    "SELECT (SELECT MIN(date) FROM bars WHERE symbol = ?), (SELECT MAX(date) FROM bars WHERE symbol = ?)"
+)
+WINDOW_SQL = "SELECT date, close FROM bars WHERE symbol = ? AND date >= ? AND close > 0 ORDER BY date"
+SEEK_SQL = "SELECT close FROM bars WHERE symbol = ? AND date >= ? AND close > 0 ORDER BY date LIMIT 1"
+
+
+def content_key(content):
+    """
+    A PriceStore.contents tuple as the string saved with a result row.
+    """
+    return "|".join(repr(value) for value in content)
+
+
+def _day(value):
+    return np.datetime64(value, "D")
+
+
+def symbol_metrics(dates, close, first_date, anchors=None):
+    """
+    Screener metrics for one symbol from its last year of bar dates
+    (datetime64[D], ascending) and closes. `anchors` maps horizons longer
+    than a year to the first close on or after their start date. Horizons
+    reaching back past first_date are NaN.
+    """
+    last_date, last = dates[-1], close[-1]
+    row = {"First Date": first_date, "Last Date": last_date, "Last Close": last}
+
+    for label, days in HORIZONS.items():
+        target = last_date - np.timedelta64(days, "D")
+        if target < first_date:
+            row[f"Return {label}"] = np.nan
+        elif days <= WINDOW_DAYS:
+            row[f"Return {label}"] = last / close[np.searchsorted(dates, target)] - 1
+        else:
+            row[f"Return {label}"] = last / anchors[label] - 1
+    row["CAGR 3Y"] = (1 + row["Return 3Y"]) ** (1 / 3) - 1
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(close))
+    row["Volatility 1Y"] = log_returns.std(ddof=1) * np.sqrt(TRADING_DAYS) if len(log_returns) > 1 else np.nan
+    row["Max Drawdown 1Y"] = np.min(close / np.maximum.accumulate(close) - 1)
+    row["From 52W High"] = last / close.max() - 1
+    row["From 52W Low"] = last / close.min() - 1
+    return row
+
+
+def _symbol_row(conn, symbol):
+    first, last = conn.execute(BOUNDS_SQL, (symbol, symbol)).fetchone()
+    if last is None:
+        return None
+    first_date, last_date = _day(first), _day(last)
+
+    start = str(last_date - np.timedelta64(WINDOW_DAYS, "D"))
+    bars = conn.execute(WINDOW_SQL, (symbol, start)).fetchall()
+    if not bars:
+        return None
+    dates = np.array([b[0] for b in bars], dtype="datetime64[D]")
+    close = np.array([b[1] for b in bars], dtype=float)
+
+    anchors = {}
+    for label, days in HORIZONS.items():
+        target = last_date - np.timedelta64(days, "D")
+        if days > WINDOW_DAYS and target >= first_date:
+            found = conn.execute(SEEK_SQL, (symbol, str(target))).fetchone()
+            anchors[label] = found[0] if found else np.nan
+    return {"Symbol": symbol, **symbol_metrics(dates, close, first_date, anchors)}
+
+
+def _screen_chunk(task):
+    """
+    Reads one chunk of symbols from the store and returns their result rows.
+    """
+    db_path, symbols = task
+    with closing(sqlite3.connect(db_path, timeout=30)) as conn:
+        rows = [_symbol_row(conn, symbol) for symbol in symbols]
+    return [row for row in rows if row is not None]
+
+
+def empty_results():
+    results = pd.DataFrame({col: pd.Series(dtype=float) for col in RESULT_COLUMNS})
+    results["Symbol"] = results["Symbol"].astype("string")
+    results["content"] = results["content"].astype("string")
+    for col in ["First Date", "Last Date"]:
+        results[col] = pd.Series(dtype="datetime64[ns]")
+    return results
+
+
+def load_results(path=RESULTS_PATH):
+    """
+    Loads saved screener results, memory-mapped; empty when there are none
+    or they were saved without content keys.
+    """
+    if not os.path.exists(path):
+        return empty_results()
+    table = feather.read_table(path, memory_map=True)
+    if "content" not in table.column_names:
+        return empty_results()
+    return table.to_pandas()
+
+
+def save_results(results, path=RESULTS_PATH):
+    """
+    Writes the results table atomically.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(results[RESULT_COLUMNS], preserve_index=False)
+    feather.write_feather(table, f"{path}.tmp", compression="uncompressed")
+    os.replace(f"{path}.tmp", path)
+
+
+def scan(store=None, path=RESULTS_PATH, max_workers=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Brings the saved results up to date with the price store.
+
+    Only symbols whose content key differs from the one saved with their
+    results are recomputed; symbols no longer stored are dropped.
+    `progress(done, total)` is called after each chunk. Returns (results,
+    recomputed count).
+    """
+    store = store or PriceStore()
+    keys = {symbol: content_key(content) for symbol, content in store.contents().items()}
+    results = load_results(path)
+    results = results[results["Symbol"].isin(keys)]
+
+    saved = dict(zip(results["Symbol"], results["content"]))
+    stale = [symbol for symbol, key in keys.items() if saved.get(symbol) != key]
+    if not stale:
+        return results.reset_index(drop=True), 0
+
+    chunks = [stale[i:i + chunk_size] for i in range(0, len(stale), chunk_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+    kept = results[~results["Symbol"].isin(stale)]
+    fresh = []
+
+    with telemetry.span("screener.scan", symbols=len(stale), chunks=len(chunks)):
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            saved_at = time.monotonic()
+            tasks = [(store.path, chunk) for chunk in chunks]
+            for done, rows in enumerate(pool.map(_screen_chunk, tasks), start=1):
+                for row in rows:
+                    row["content"] = keys[row["Symbol"]]
+                fresh.extend(rows)
+                if progress is not None:
+                    progress(done, len(chunks))
+                if time.monotonic() - saved_at > CHECKPOINT_SECONDS:
+                    save_results(_combine(kept, fresh), path)
+                    saved_at = time.monotonic()
+
+    results = _combine(kept, fresh)
+    save_results(results, path)
+    return results, len(stale)
+
+
+def _combine(kept, rows):
+    fresh = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    for col in ["First Date", "Last Date"]:
+        fresh[col] = pd.to_datetime(fresh[col])
+    fresh["Symbol"] = fresh["Symbol"].astype("string")
+    fresh["content"] = fresh["content"].astype("string")
+    if kept.empty:
+        return fresh.reset_index(drop=True)
+    return pd.concat([kept, fresh], ignore_index=True)
+
+
+def screen(results, ranges=None, sort_by="Return 1Y", ascending=False, limit=100):
+    """
+    Filters results to the rows within `ranges` (column -> (low, high),
+    either bound may be None), sorts on `sort_by` and returns the top
+    `limit` rows with the total number of matches.
+    """
+    mask = np.ones(len(results), dtype=bool)
+    for col, (low, high) in (ranges or {}).items():
+        values = results[col].to_numpy(dtype=float)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+    matches = results[mask]
+    if sort_by in results:
+        matches = matches.sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
+    return matches.head(limit), int(mask.sum())
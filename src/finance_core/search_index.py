@@ -0,0 +1,189 @@
+import numpy as np
+from fuzzywuzzy import fuzz
+
+# Candidates gathered per lookup before fuzzy re-ranking.
+MAX_CANDIDATES = 100
+
+# Rows encoded per block while building postings, bounding the size of the
+# (rows, characters) code point matrix for million-row masters.
+TRIGRAM_BLOCK = 65_536
+
+
+def _code_points(texts):
+    """
+    Returns the code points of the padded texts as a (rows, characters)
+    matrix, zero past the end of each text.
+    """
+    padded = np.asarray([f"  {text} " for text in texts], dtype=str)
+    if not len(padded):
+        return np.zeros((0, 3), dtype=np.uint32)
+    return padded.view(np.uint32).reshape(len(padded), -1)
+
+
+def _blocks(texts):
+    for start in range(0, len(texts), TRIGRAM_BLOCK):
+        yield start, _code_points(texts[start:start + TRIGRAM_BLOCK])
+
+
+def _trigrams(points, alphabet):
+    """
+    Returns (rows, grams) for every trigram in a code point matrix, a gram
+    being the alphabet ranks of its three characters packed into one int64.
+    Trigrams with a character outside the alphabet are left out.
+    """
+    ranks = np.searchsorted(alphabet, points)
+    known = alphabet[np.minimum(ranks, len(alphabet) - 1)] == points
+    size = len(alphabet)
+    grams = (ranks[:, :-2] * size + ranks[:, 1:-1]) * size + ranks[:, 2:]
+    valid = (points[:, 2:] != 0) & known[:, :-2] & known[:, 1:-1] & known[:, 2:]
+    rows, _ = np.nonzero(valid)
+    return rows, grams[valid]
+
+
+class _SortedKeys:
+    """
+    Sorted lowercase keys supporting prefix range lookups by binary search.
+    """
+
+    def __init__(self, keys):
+        keys = np.asarray(keys, dtype=str)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def prefix(self, prefix, limit):
+        lo = np.searchsorted(self.keys, prefix, side="left")
+        hi = np.searchsorted(self.keys, prefix + "\U0010ffff", side="left")
+        return self.order[lo:min(hi, lo + limit)]
+
+
+class SearchIndex:
+    """
+    Instrument search over symbol and company name.
+
+    Built once per instrument master: sorted keys for prefix lookups, a
+    trigram posting index for typo-tolerant candidates, and a dict from
+    display key to row for O(1) selection.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        symbols = self.df['Symbol'].astype(str)
+        companies = self.df['Company'].astype(str)
+
+        self.displays = (symbols + " - " + companies).tolist()
+        self.row_of = {}
+        for i, display in enumerate(self.displays):
+            self.row_of.setdefault(display, i)
+
+        lower_symbols = symbols.str.lower().tolist()
+        lower_companies = companies.str.lower().tolist()
+        self._symbols = _SortedKeys(lower_symbols)
+        self._companies = _SortedKeys(lower_companies)
+        self._lower_symbols = lower_symbols
+
+        # Postings as one array of rows sorted by trigram, each distinct
+        # trigram's slice given by offsets into it. Grams are ranked against
+        # the index's own alphabet so (gram, row) packs into an int64 key, and
+        # a plain sort both orders and de-duplicates the postings.
+        texts = (lower_symbols, lower_companies)
+        seen = np.zeros(0x110000, dtype=bool)
+        seen[0] = True
+        for text in texts:
+            for _, points in _blocks(text):
+                seen[points.ravel()] = True
+        self._alphabet = np.flatnonzero(seen).astype(np.uint32)
+
+        rows, grams = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.int64)]
+        for text in texts:
+            for start, points in _blocks(text):
+                row, gram = _trigrams(points, self._alphabet)
+                rows.append(row + start)
+                grams.append(gram)
+        rows, grams = np.concatenate(rows), np.concatenate(grams)
+
+        n = max(len(self), 1)
+        if len(self._alphabet) ** 3 * n < 2 ** 63:
+            keys = grams * n + rows
+            keys.sort()
+            keys = keys[np.diff(keys, prepend=-1) != 0]
+            grams = keys // n
+            rows = keys - grams * n
+        else:
+            order = np.lexsort((rows, grams))
+            rows, grams = rows[order], grams[order]
+            keep = (np.diff(grams, prepend=-1) != 0) | (np.diff(rows, prepend=-1) != 0)
+            rows, grams = rows[keep], grams[keep]
+
+        starts = np.flatnonzero(np.diff(grams, prepend=-1) != 0)
+        self._grams = grams[starts]
+        self._offsets = np.r_[starts, len(grams)]
+        self._posting_rows = rows.astype(np.int32)
+
+    def __len__(self):
+        return len(self.displays)
+
+    def _trigram_candidates(self, query):
+        grams = np.unique(_trigrams(_code_points([query]), self._alphabet)[1])
+        at = np.searchsorted(self._grams, grams)
+        found = at < len(self._grams)
+        at, grams = at[found], grams[found]
+        at = at[self._grams[at] == grams]
+        lists = [self._posting_rows[self._offsets[i]:self._offsets[i + 1]] for i in at]
+        if not lists:
+            return np.empty(0, dtype=np.intp)
+
+        # Count shared trigrams over the candidate rows only; a bincount over
+        # the whole index is cheaper once the postings outnumber its rows.
+        candidates = np.concatenate(lists)
+        if len(candidates) > len(self):
+            counts = np.bincount(candidates, minlength=len(self))
+            hits = np.flatnonzero(counts)
+            counts = counts[hits]
+        else:
+            hits, counts = np.unique(candidates, return_counts=True)
+        if len(hits) > MAX_CANDIDATES:
+            hits = hits[np.argpartition(-counts, MAX_CANDIDATES)[:MAX_CANDIDATES]]
+        return hits
+
+    def search(self, query, k=20):
+        """
+        Returns up to k display keys ranked for the query: exact symbol
+        matches first, then symbol prefixes, company prefixes and finally
+        fuzzy trigram matches, each tier ordered by fuzzy score.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        tiers = {}
+        for row in self._trigram_candidates(query):
+            tiers[int(row)] = 3
+        for row in self._companies.prefix(query, MAX_CANDIDATES):
+            tiers[int(row)] = 2
+        for row in self._symbols.prefix(query, MAX_CANDIDATES):
+            tiers[int(row)] = 0 if self._lower_symbols[row] == query else 1
+
+        ranked = sorted(
+            tiers,
+            key=lambda row: (tiers[row], -fuzz.WRatio(query, self.displays[row]), row)
+        )
+
+        results = []
+        for row in ranked:
+            display = self.displays[row]
+            if self.row_of[display] == row:
+                results.append(display)
+                if len(results) == k:
+                    break
+        return results
+
+    def row(self, display):
+        """
+        Returns the instrument row for a display key as a dict, or None.
+        """
+        i = self.row_of.get(display)
+        if i is None:
+            return None
+        row = self.df.iloc[i].to_dict()
+        row['Display'] = display
+        return row
@@ -0,0 +1,170 @@
+"""
+Lightweight timing spans and counters for the hot paths.
+
+Off unless FINANCEAPP_TELEMETRY=1. When off, span() returns a shared no-op
+context manager and count() returns at once, so instrumented code pays
+one attribute check. When on, every span is appended as a JSON line to
+FINANCEAPP_TELEMETRY_LOG (default data/telemetry.jsonl) and summarized in
+memory for the diagnostics page.
+
+    with telemetry.span("history", symbol=symbol) as fields:
+        hist = ...
+        if fields is not None:
+            fields["rows"] = len(hist)
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+LOG_PATH = "data/telemetry.jsonl"
+
+# Spans kept for the "recent" list, and durations kept per span name for percentiles.
+RECENT_SPANS = 200
+SAMPLES_PER_SPAN = 500
+
+_NOOP = nullcontext()
+
+
+class Telemetry:
+    """
+    Thread-safe collector of spans and counters.
+    """
+
+    def __init__(self, enabled=False, log_path=LOG_PATH):
+        self.enabled = enabled
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._log = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = defaultdict(int)
+            self.totals = defaultdict(lambda: [0, 0.0])  # name -> [count, seconds]
+            self.samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_SPAN))
+            self.recent = deque(maxlen=RECENT_SPANS)
+
+    def span(self, name, **fields):
+        """
+        Times a block. The context value is the span's field dict, for
+        adding sizes discovered inside the block, or None when disabled.
+        """
+        if not self.enabled:
+            return _NOOP
+        return self._span(name, fields)
+
+    @contextmanager
+    def _span(self, name, fields):
+        stack = self._local.__dict__.setdefault("stack", [])
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            seconds = time.perf_counter() - started
+            stack.pop()
+            self._record(name, seconds, parent, fields)
+
+    def _record(self, name, seconds, parent, fields):
+        event = {
+            "ts": round(time.time(), 3),
+            "span": name,
+            "ms": round(seconds * 1000, 3),
+            "parent": parent,
+            "thread": threading.current_thread().name,
+            **fields,
+        }
+        line = json.dumps(event, default=str)
+        with self._lock:
+            total = self.totals[name]
+            total[0] += 1
+            total[1] += seconds
+            self.samples[name].append(seconds)
+            self.recent.append(event)
+            if self._log is None:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                self._log = open(self.log_path, "a", buffering=1, encoding="utf-8")
+            self._log.write(line + "\n")
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += n
+
+    def snapshot(self):
+        """
+        Per-span statistics (count, total, mean, p50, p95, max in ms), counters
+        and the most recent spans, newest first.
+        """
+        with self._lock:
+            spans = []
+            for name, (count, seconds) in self.totals.items():
+                samples = sorted(self.samples[name])
+                spans.append({
+                    "span": name,
+                    "count": count,
+                    "total_ms": seconds * 1000,
+                    "mean_ms": seconds * 1000 / count,
+                    "p50_ms": samples[len(samples) // 2] * 1000,
+                    "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                    "max_ms": samples[-1] * 1000,
+                })
+            return {
+                "spans": sorted(spans, key=lambda s: -s["total_ms"]),
+                "counters": dict(sorted(self.counters.items())),
+                "recent": list(reversed(self.recent)),
+            }
+
+
+_default = Telemetry(
+    enabled=os.environ.get("FINANCEAPP_TELEMETRY", "0") == "1",
+    log_path=os.environ.get("FINANCEAPP_TELEMETRY_LOG", LOG_PATH),
+)
+
+
+def get_telemetry():
+    return _default
+
+
+def is_enabled():
+    return _default.enabled
+
+
+def span(name, **fields):
+    return _default.span(name, **fields)
+
+
+def count(name, n=1):
+    _default.count(name, n)
+
+
+def timed(name):
+    """
+    Decorator form of span() for whole functions.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _default.enabled:
+                return fn(*args, **kwargs)
+            with _default.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def frame_bytes(df):
+    """
+    Approximate in-memory size of a DataFrame or Series (shallow, so cheap).
+    """
+    if not hasattr(df, "memory_usage"):
+        return None
+    usage = df.memory_usage(index=True)
+    return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
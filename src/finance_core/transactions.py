@@ -0,0 +1,315 @@
+"""
+Event-sourced transaction ledger: buys, sells, splits and dividends.
+
+Holdings, FIFO cost basis, P&L and cash flows are all derived from the
+list of events rather than stored. Transactions are dicts:
+
+    {"date": ..., "symbol": "INFY.NS", "type": "buy", "units": 10, "price": 1450.0}
+    {"date": ..., "symbol": "INFY.NS", "type": "sell", "units": 4, "price": 1610.0}
+    {"date": ..., "symbol": "INFY.NS", "type": "split", "ratio": 2}     # 2 new shares per old one
+    {"date": ..., "symbol": "INFY.NS", "type": "dividend", "amount": 180.0}
+
+Units are tracked internally in "base" units (divided by every split so
+far), which makes the holdings timeline a plain cumulative sum and lets
+FIFO matching work on one cumulative-cost curve per symbol.
+"""
+import numpy as np
+import pandas as pd
+
+TRANSACTION_TYPES = ["buy", "sell", "split", "dividend"]
+TRANSACTION_COLUMNS = ["date", "symbol", "type", "units", "price", "ratio", "amount"]
+
+# Units below this are treated as zero when checking sells against holdings.
+UNIT_TOLERANCE = 1e-9
+
+DAYS_PER_YEAR = 365.0
+
+# Range searched for money-weighted returns: -99.99% to +10,000% a year.
+MIN_RATE = -0.9999
+MAX_RATE = 100.0
+
+
+def normalize(transactions):
+    """
+    Transactions as a DataFrame in date order (input order within a day),
+    with every TRANSACTION_COLUMNS column present. Buy and sell amounts are
+    filled in as units x price; splits default to a ratio of 1.
+    """
+    frame = pd.DataFrame(list(transactions), columns=TRANSACTION_COLUMNS)
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["type"] = frame["type"].str.lower()
+    for col in ["units", "price", "ratio", "amount"]:
+        frame[col] = pd.to_numeric(frame[col], errors="coerce")
+
+    unknown = ~frame["type"].isin(TRANSACTION_TYPES)
+    if unknown.any():
+        raise ValueError(f"unknown transaction type {frame.loc[unknown, 'type'].iloc[0]!r}")
+
+    trade = frame["type"].isin(["buy", "sell"])
+    frame.loc[trade, "amount"] = frame.loc[trade, "units"] * frame.loc[trade, "price"].fillna(0.0)
+    frame.loc[frame["type"] == "split", "ratio"] = frame.loc[frame["type"] == "split", "ratio"].fillna(1.0)
+    frame[["units", "amount"]] = frame[["units", "amount"]].fillna(0.0)
+    frame["ratio"] = frame["ratio"].fillna(1.0)
+    return frame.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def _split_factors(frame):
+    """
+    Cumulative split factor per row within its symbol (the product of the
+    ratios of that symbol's splits up to and including the row), and the
+    final factor per symbol.
+    """
+    factor = frame["ratio"].where(frame["type"] == "split", 1.0).groupby(frame["symbol"]).cumprod()
+    final = factor.groupby(frame["symbol"]).last()
+    return factor.to_numpy(), final
+
+
+class TransactionLedger:
+    """
+    Derived views over an ordered list of transactions.
+    """
+
+    def __init__(self, transactions):
+        self.frame = normalize(transactions)
+        factor, self.split_factor = _split_factors(self.frame)
+        signed = np.select(
+            [self.frame["type"] == "buy", self.frame["type"] == "sell"],
+            [self.frame["units"], -self.frame["units"]], 0.0,
+        )
+        self.frame["base_units"] = signed / factor
+
+    @property
+    def symbols(self):
+        return list(dict.fromkeys(self.frame["symbol"]))
+
+    def lots(self):
+        """
+        Signed unit changes in today's share terms (after every split), as
+        the lot dicts used by valuation.value_portfolio. Price histories are
+        split-adjusted, so these value correctly across splits.
+        """
+        trades = self.frame[self.frame["base_units"] != 0]
+        current = trades["base_units"] * trades["symbol"].map(self.split_factor)
+        return [
+            {"symbol": symbol, "buy_date": date, "units": units}
+            for symbol, date, units in zip(trades["symbol"], trades["date"], current)
+        ]
+
+    def holdings_timeline(self, dates):
+        """
+        Units actually held (dates x symbols) on each of `dates`: base unit
+        changes and split ratios are scattered onto the date axis, then one
+        cumulative sum and one cumulative product give the holdings.
+        """
+        dates = pd.DatetimeIndex(dates)
+        symbols = self.symbols
+        column = {s: i for i, s in enumerate(symbols)}
+        rows = dates.searchsorted(self.frame["date"])
+        cols = self.frame["symbol"].map(column).to_numpy()
+
+        base = np.zeros((len(dates) + 1, len(symbols)))
+        np.add.at(base, (rows, cols), self.frame["base_units"].to_numpy())
+        ratios = np.ones((len(dates) + 1, len(symbols)))
+        np.multiply.at(ratios, (rows, cols), self.frame["ratio"].where(self.frame["type"] == "split", 1.0).to_numpy())
+
+        held = np.cumsum(base[:-1], axis=0) * np.cumprod(ratios[:-1], axis=0)
+        return pd.DataFrame(held, index=dates, columns=symbols)
+
+    def positions(self, prices):
+        """
+        Per-symbol FIFO positions valued at `prices` (symbol -> latest
+        price). Columns: Units, Cost Basis, Average Cost, Market Value,
+        Unrealized P&L, Realized P&L, Dividends.
+
+        FIFO matching is a lookup on each symbol's cumulative (units
+        bought, cost) curve: the cost of the first q units bought is that
+        curve interpolated at q, so the cost of every sale is the curve at
+        the units sold after it minus the units sold before it.
+        Raises ValueError when a sale exceeds the units held at the time.
+        """
+        rows = []
+        for symbol, events in self.frame.groupby("symbol", sort=False):
+            kind = events["type"].to_numpy()
+            base = events["base_units"].to_numpy()
+            cash = events["amount"].to_numpy()
+            is_buy, is_sell = kind == "buy", kind == "sell"
+
+            bought = np.concatenate([[0.0], np.cumsum(base[is_buy])])
+            cost = np.concatenate([[0.0], np.cumsum(cash[is_buy])])
+            sold_after = np.cumsum(-base[is_sell])
+            sold_before = sold_after + base[is_sell]
+
+            # Units bought up to each sale must cover everything sold so far.
+            bought_by_sale = bought[np.cumsum(is_buy)[is_sell]]
+            short = sold_after > bought_by_sale + UNIT_TOLERANCE
+            if short.any():
+                date = events["date"].to_numpy()[is_sell][short.argmax()]
+                raise ValueError(f"{symbol}: sells more units than held on {pd.Timestamp(date).date()}")
+
+            sale_cost = np.interp(sold_after, bought, cost) - np.interp(sold_before, bought, cost)
+            total_sold = sold_after[-1] if len(sold_after) else 0.0
+            remaining_cost = cost[-1] - np.interp(total_sold, bought, cost)
+            units = (bought[-1] - total_sold) * self.split_factor[symbol]
+            if abs(units) < UNIT_TOLERANCE:
+                units, remaining_cost = 0.0, 0.0
+
+            price = prices.get(symbol, np.nan)
+            value = units * price if units else 0.0
+            rows.append({
+                "Symbol": symbol,
+                "Units": units,
+                "Cost Basis": remaining_cost,
+                "Average Cost": remaining_cost / units if units else np.nan,
+                "Market Value": value,
+                "Unrealized P&L": value - remaining_cost,
+                "Realized P&L": float((cash[is_sell] - sale_cost).sum()),
+                "Dividends": float(cash[kind == "dividend"].sum()),
+            })
+        columns = ["Symbol", "Units", "Cost Basis", "Average Cost", "Market Value",
+                   "Unrealized P&L", "Realized P&L", "Dividends"]
+        return pd.DataFrame(rows, columns=columns).set_index("Symbol")
+
+    def cash_flows(self):
+        """
+        Investor cash flows per transaction: buys are negative, sells and
+        dividends positive. Returns a DataFrame of date, symbol, amount.
+        """
+        sign = self.frame["type"].map({"buy": -1.0, "sell": 1.0, "dividend": 1.0, "split": 0.0})
+        flows = self.frame.assign(amount=self.frame["amount"] * sign)
+        return flows.loc[flows["amount"] != 0, ["date", "symbol", "amount"]].reset_index(drop=True)
+
+    def money_weighted_returns(self, values, as_of=None):
+        """
+        XIRR per symbol and for the whole ledger ("Total"), treating the
+        current market `values` (symbol -> value) as a final inflow on
+        `as_of` (default today). All of them are solved in one batch.
+        A symbol whose value is NaN (no price) gets NaN and is left out of
+        the Total, rather than counted as worth nothing.
+        """
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.today().normalize()
+        unvalued = [symbol for symbol, value in values.items() if pd.isna(value)]
+        flows = self.cash_flows()
+        by_symbol = dict(tuple(flows.groupby("symbol", sort=False)))
+        empty = flows.iloc[:0]
+        groups = {symbol: by_symbol.get(symbol, empty) for symbol in self.symbols if symbol not in unvalued}
+        groups["Total"] = flows[~flows["symbol"].isin(unvalued)]
+
+        schedules = []
+        for name, group in groups.items():
+            if name == "Total":
+                final = sum(value for symbol, value in values.items() if symbol not in unvalued)
+            else:
+                final = values.get(name, 0.0)
+            dates = np.append(group["date"].to_numpy(dtype="datetime64[ns]"), np.datetime64(as_of, "ns"))
+            schedules.append((dates, np.append(group["amount"].to_numpy(), final)))
+        returns = pd.Series(xirr_many(schedules), index=list(groups), name="XIRR")
+        return returns.reindex(self.symbols + ["Total"])
+
+
+# --- Money-weighted returns ---
+
+def _npv(rates, amounts, years, rows):
+    """
+    Net present value of each schedule at its rate, for flat flow arrays
+    where `rows` gives each flow's schedule.
+    """
+    discount = np.exp(-years * np.log1p(rates)[rows])
+    return np.bincount(rows, amounts * discount, minlength=len(rates)), discount
+
+
+def xirr_flat(amounts, years, rows, count, guess=0.1, tol=1e-10, max_iter=50):
+    """
+    Vectorized XIRR for `count` cash flow schedules stored flat: flow i has
+    amount amounts[i], time years[i] (in years from its schedule's first
+    flow) and belongs to schedule rows[i]. Work per iteration is linear in
+    the total number of flows, however uneven the schedules are.
+
+    Newton's method runs on every unconverged schedule together, kept
+    within (MIN_RATE, MAX_RATE); schedules it cannot settle fall back to a
+    shared bisection over that range. Schedules without both an inflow and
+    an outflow, or without a root in the range, get NaN.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    years = np.asarray(years, dtype=float)
+    rows = np.asarray(rows, dtype=np.intp)
+    rates = np.full(count, guess)
+    solvable = (np.bincount(rows, amounts > 0, minlength=count) > 0) & \
+        (np.bincount(rows, amounts < 0, minlength=count) > 0)
+    done = ~solvable
+
+    for _ in range(max_iter):
+        active = np.flatnonzero(~done)
+        if not len(active):
+            break
+        # Renumber the active schedules 0..k-1 and keep only their flows.
+        position = np.full(count, -1)
+        position[active] = np.arange(len(active))
+        keep = ~done[rows]
+        a, t, rw = amounts[keep], years[keep], position[rows[keep]]
+
+        r = rates[active]
+        value, discount = _npv(r, a, t, rw)
+        slope = np.bincount(rw, -t * a * discount, minlength=len(active)) / (1 + r)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            step = value / slope
+        finite = np.isfinite(step)
+        new = np.where(finite, r - step, r)
+        # Stay inside the range: step halfway to a bound instead of past it.
+        new = np.where(new <= MIN_RATE, (r + MIN_RATE) / 2, new)
+        new = np.where(new >= MAX_RATE, (r + MAX_RATE) / 2, new)
+        rates[active] = new
+        done[active] = finite & (np.abs(step) < tol)
+
+    unsettled = np.flatnonzero(~done)
+    if len(unsettled):
+        position = np.full(count, -1)
+        position[unsettled] = np.arange(len(unsettled))
+        keep = ~done[rows]
+        rates[unsettled] = _bisect(amounts[keep], years[keep], position[rows[keep]], len(unsettled))
+    rates[~solvable] = np.nan
+    return rates
+
+
+def _bisect(amounts, years, rows, count, iterations=100):
+    lo, hi = np.full(count, MIN_RATE), np.full(count, MAX_RATE)
+    f_lo, _ = _npv(lo, amounts, years, rows)
+    f_hi, _ = _npv(hi, amounts, years, rows)
+    bracketed = np.sign(f_lo) != np.sign(f_hi)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        f_mid, _ = _npv(mid, amounts, years, rows)
+        left = np.sign(f_mid) == np.sign(f_lo)
+        lo, f_lo = np.where(left, mid, lo), np.where(left, f_mid, f_lo)
+        hi = np.where(left, hi, mid)
+    return np.where(bracketed, (lo + hi) / 2, np.nan)
+
+
+def xirr(amounts, years, **kwargs):
+    """
+    XIRR for each row of (schedules x flows) `amounts` and `years` arrays,
+    padded with zero amounts. See xirr_flat.
+    """
+    amounts = np.atleast_2d(np.asarray(amounts, dtype=float))
+    years = np.broadcast_to(np.atleast_2d(np.asarray(years, dtype=float)), amounts.shape)
+    rows = np.repeat(np.arange(len(amounts)), amounts.shape[1])
+    return xirr_flat(amounts.ravel(), years.ravel(), rows, len(amounts), **kwargs)
+
+
+def xirr_many(schedules):
+    """
+    XIRR for a list of (dates, amounts) schedules of any lengths, solved in
+    one batch. Dates are datetime64 arrays.
+    """
+    if not schedules:
+        return np.array([])
+    lengths = [len(amounts) for _, amounts in schedules]
+    rows = np.repeat(np.arange(len(schedules)), lengths)
+    amounts = np.concatenate([np.asarray(a, dtype=float) for _, a in schedules])
+    dates = np.concatenate([np.asarray(d, dtype="datetime64[ns]") for d, _ in schedules])
+
+    first = np.full(len(schedules), np.datetime64("NaT", "ns"))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    nonempty = np.array(lengths) > 0
+    first[nonempty] = np.minimum.reduceat(dates, starts[nonempty])
+    years = (dates - first[rows]) / np.timedelta64(1, "D") / DAYS_PER_YEAR
+    return xirr_flat(amounts, years, rows, len(schedules))
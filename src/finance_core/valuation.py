@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+
+def align_closes(closes):
+    """
+    Aligns close series onto the union of their dates.
+
+    `closes` maps symbol -> Series indexed by date. Returns (dates, symbols,
+    matrix) where matrix is dates x symbols; gaps from mismatched trading
+    calendars are forward-filled and dates before a series starts are 0.
+    """
+    symbols = list(closes)
+    series = [closes[s] for s in symbols]
+    if not series:
+        return pd.DatetimeIndex([], name="Date"), symbols, np.empty((0, 0))
+
+    # One sort over all the dates beats a chain of pairwise index unions.
+    stamps = [s.index.to_numpy(dtype="datetime64[ns]") for s in series]
+    dates = np.unique(np.concatenate(stamps))
+
+    matrix = np.full((len(dates), len(series)), np.nan, order='F')
+    for j, s in enumerate(series):
+        matrix[np.searchsorted(dates, stamps[j]), j] = s.to_numpy(dtype=float)
+
+    # Forward-fill down each column by carrying the last valid row index.
+    rows = np.where(np.isnan(matrix), 0, np.arange(len(dates))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    matrix = np.nan_to_num(np.take_along_axis(matrix, rows, axis=0))
+
+    return pd.DatetimeIndex(dates, name="Date"), symbols, matrix
+
+
+def traded_mask(closes, dates, symbols):
+    """
+    Dates x symbols mask of the rows of an align_closes matrix where each
+    symbol actually has a close, as opposed to one carried over a holiday
+    of its market or before its series starts.
+    """
+    traded = np.zeros((len(dates), len(symbols)), dtype=bool)
+    for j, symbol in enumerate(symbols):
+        traded[dates.searchsorted(closes[symbol].index), j] = True
+    return traded
+
+
+def value_aligned(dates, symbols, matrix, holdings):
+    """
+    Values lots against an already aligned close matrix (see align_closes).
+
+    Only the columns of held symbols are touched, so one shared matrix can
+    value many portfolios. Returns (positions, total) like value_portfolio,
+    with positions limited to the held symbols.
+    """
+    column_of = {symbol: i for i, symbol in enumerate(symbols)}
+    lots = [h for h in holdings if h['symbol'] in column_of]
+
+    used, cols = np.unique(np.array([column_of[h['symbol']] for h in lots], dtype=np.intp), return_inverse=True)
+    units = np.array([h['units'] for h in lots], dtype=float)
+    buy_dates = pd.DatetimeIndex([pd.Timestamp(h['buy_date']) for h in lots])
+    start_rows = dates.searchsorted(buy_dates)
+
+    held = np.zeros((len(dates) + 1, len(used)))
+    np.add.at(held, (start_rows, cols), units)
+    held = np.cumsum(held[:-1], axis=0)
+
+    values = matrix[:, used] * held
+    positions = pd.DataFrame(values, index=dates, columns=[symbols[i] for i in used])
+    total = pd.Series(values.sum(axis=1), index=dates, name="Total Value")
+    return positions, total
+
+
+def value_portfolio(closes, holdings, convert=None):
+    """
+    Values a portfolio of lots over time without per-lot loops.
+
+    `closes` maps symbol -> close Series; `holdings` is a list of dicts with
+    'symbol', 'buy_date' and 'units'. The same symbol may appear in several
+    lots. Holdings whose symbol has no close series are skipped.
+
+    Each lot's units are scattered onto its buy date and cumulatively summed,
+    giving the units held per (date, symbol); one broadcast multiply with the
+    aligned close matrix then values every position at once.
+
+    `convert(dates, symbols, matrix)`, e.g. FxStore.convert, is applied to
+    the aligned matrix first to value everything in one currency.
+
+    Returns (positions, total): a DataFrame of dates x held symbols holding
+    the value of each position, and the summed portfolio value as a Series.
+    """
+    dates, symbols, matrix = align_closes(closes)
+    if convert is not None:
+        matrix = convert(dates, symbols, matrix)
+    return value_aligned(dates, symbols, matrix, holdings)
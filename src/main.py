@@ -1,22 +1,47 @@
 # main.py
 import streamlit as st
-from stock_analysis import stock_analysis_page
-from portfolio import portfolio_tracker_page
-from expense_tracker import expense_tracker_page 
-from utils import *
-import pandas as pd
+from finance_core import telemetry
 
 
 st.set_page_config(page_title="Finance App", layout="wide")
 
-# ✅ Add third tab label
-tabs = st.tabs(["Stock Analysis", "Portfolio", "Expense Tracker"])
 
-with tabs[0]:
+# Each page imports its module on first visit, so a rerun only loads and
+# runs the page being viewed.
+def show_stock_analysis():
+    from stock_analysis import stock_analysis_page
     stock_analysis_page()
 
-with tabs[1]:
+
+def show_portfolio():
+    from portfolio import portfolio_tracker_page
     portfolio_tracker_page()
 
-with tabs[2]:
-    expense_tracker_page()  
+
+def show_expense_tracker():
+    from expense_tracker import expense_tracker_page
+    expense_tracker_page()
+
+
+def show_screener():
+    from screener import screener_page
+    screener_page()
+
+
+def show_diagnostics():
+    from diagnostics import diagnostics_page
+    diagnostics_page()
+
+
+pages = [
+    st.Page(show_stock_analysis, title="Stock Analysis", url_path="stock-analysis", default=True),
+    st.Page(show_screener, title="Screener", url_path="screener"),
+    st.Page(show_portfolio, title="Portfolio", url_path="portfolio"),
+    st.Page(show_expense_tracker, title="Expense Tracker", url_path="expense-tracker"),
+]
+# Shown only when the server runs with FINANCEAPP_TELEMETRY=1.
+if telemetry.is_enabled():
+    pages.append(st.Page(show_diagnostics, title="Diagnostics", url_path="diagnostics"))
+
+page = st.navigation(pages, position="top")
+page.run()
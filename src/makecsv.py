@@ -1,105 +1,286 @@
+"""
+Builds data/combined_stocks_yahoo.csv from NSE, NASDAQ and AMFI listings.
+
+Each exchange or fund house is a source adapter that either downloads its
+listing over a shared HTTP session or reads a local file, so the rebuild
+also works offline:
+
+    python src/makecsv.py                  # download everything
+    python src/makecsv.py --offline        # use the files under data/
+"""
+import argparse
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
 import pandas as pd
 import requests
-from io import StringIO
-from datetime import datetime
+from requests.adapters import HTTPAdapter
 
-# ==========================
-# 1. Fetch NSE Stocks (India)
-# ==========================
-print(" Fetching NSE stocks...")
+from finance_core.instrument_master import CSV_PATH, build_master
+from finance_core.nav_store import AMFI_URL, parse_navall
 
-# Get today's date in the required format
-today = datetime.today().strftime('%Y%m%d')
-nse_bhavcopy_url = f"https://www1.nseindia.com/content/historical/EQUITIES/2025/JUN/cm{today}bhav.csv.zip"
+COLUMNS = ['Symbol', 'Company', 'Yahoo_Ticker', 'Country', 'Type', 'AMC', 'NAV_Date', 'NAV']
 
-headers = {
+HEADERS = {
     "User-Agent": "Mozilla/5.0",
     "Referer": "https://www.nseindia.com"
 }
 
-try:
-    nse_response = requests.get(nse_bhavcopy_url, headers=headers)
-    if nse_response.status_code == 200:
-        with open("nse_bhavcopy.zip", "wb") as f:
-            f.write(nse_response.content)
-        import zipfile
-        with zipfile.ZipFile("nse_bhavcopy.zip", 'r') as zip_ref:
-            zip_ref.extractall("nse_bhavcopy")
-        bhavcopy_filename = f"cm{today}bhav.csv"
-        nse_df = pd.read_csv(f"nse_bhavcopy/{bhavcopy_filename}")
-        nse_df['Yahoo_Ticker'] = nse_df['SYMBOL'] + ".NS"
-        nse_df['Country'] = "India"
-        nse_df['Type'] = "Stock"
-        nse_df = nse_df[['SYMBOL', 'SERIES', 'Yahoo_Ticker', 'Country', 'Type']]
-        nse_df.columns = ['Symbol', 'Company', 'Yahoo_Ticker', 'Country', 'Type']
-    else:
-        print("Failed to fetch NSE Bhavcopy.")
-        nse_df = pd.DataFrame(columns=['Symbol', 'Company', 'Yahoo_Ticker', 'Country', 'Type'])
-except Exception as e:
-    print(f"Error fetching NSE data: {e}")
-    nse_df = pd.DataFrame(columns=['Symbol', 'Company', 'Yahoo_Ticker', 'Country', 'Type'])
-
-# ==========================
-# 2. Fetch US Stocks (NASDAQ)
-# ==========================
-print(" Fetching NASDAQ stocks...")
-us_df = pd.read_csv("https://raw.githubusercontent.com/datasets/nasdaq-listings/master/data/nasdaq-listed-symbols.csv")
-us_df['Yahoo_Ticker'] = us_df['Symbol']
-us_df['Country'] = "US"
-us_df['Type'] = "Stock"
-us_df['Company'] = us_df['Company Name']
-us_df = us_df[['Symbol', 'Company', 'Yahoo_Ticker', 'Country', 'Type']]
-
-# ==========================
-# 3. Fetch Indian Mutual Funds (from AMFI)
-# ==========================
-print(" Fetching Indian mutual funds (AMFI)...")
-amfi_url = "https://www.amfiindia.com/spages/NAVAll.txt"
-amfi_response = requests.get(amfi_url, headers=headers)
-amfi_text = amfi_response.content.decode('utf-8')
-amfi_lines = amfi_text.strip().splitlines()
-
-mutual_funds = []
-
-for line in amfi_lines:
-    if line.startswith("Scheme Code") or line.strip() == "":
-        continue
-    parts = line.split(';')
-    if len(parts) >= 5:
-        scheme_code = parts[0].strip()
-        scheme_name = parts[1].strip()
-        amc = parts[2].strip()
-        nav_date = parts[3].strip()
-        nav = parts[4].strip()
-        mutual_funds.append({
-            "Symbol": scheme_code,
-            "Company": scheme_name,
-            "Yahoo_Ticker": "",  # No Yahoo ticker for most mutual funds
-            "Country": "India",
-            "Type": "MutualFund",
-            "AMC": amc,
-            "NAV_Date": nav_date,
-            "NAV": nav
+NSE_BHAVCOPY_URL = "https://nsearchives.nseindia.com/content/cm/BhavCopy_NSE_CM_0_0_0_{date:%Y%m%d}_F_0000.csv.zip"
+NASDAQ_URL = "https://raw.githubusercontent.com/datasets/nasdaq-listings/master/data/nasdaq-listed-symbols.csv"
+
+
+def make_session(pool_size=4):
+    """
+    Returns a requests session with a pooled adapter shared by all sources.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _listing(df, **columns):
+    """
+    Fills the master columns a source does not provide with empty values.
+    """
+    for col, value in columns.items():
+        df[col] = value
+    for col in COLUMNS:
+        if col not in df:
+            df[col] = ""
+    return df[COLUMNS]
+
+
+class NSESource:
+    """
+    NSE equities from a bhavcopy zip, in either the legacy (SYMBOL/SERIES)
+    or the UDiFF (TckrSymb/SctySrs/FinInstrmNm) layout.
+    """
+    name = "NSE"
+    covers = {"Country": "India", "Type": "Stock"}
+
+    def __init__(self, path=None, date=None):
+        self.path = path
+        self.date = date
+
+    def _download(self, session):
+        # Bhavcopies are only published for trading days, so walk back a few days.
+        day = self.date or datetime.today()
+        for _ in range(7):
+            response = session.get(NSE_BHAVCOPY_URL.format(date=day), timeout=30)
+            if response.status_code == 200:
+                return response.content
+            day -= timedelta(days=1)
+        raise RuntimeError("no NSE bhavcopy published in the last 7 days")
+
+    def load(self, session):
+        if self.path:
+            with open(self.path, "rb") as f:
+                content = f.read()
+        else:
+            content = self._download(session)
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            with archive.open(archive.namelist()[0]) as f:
+                raw = pd.read_csv(f, dtype=str)
+        raw.columns = raw.columns.str.strip()
+
+        if "TckrSymb" in raw:
+            raw = raw.rename(columns={"TckrSymb": "Symbol", "SctySrs": "SERIES", "FinInstrmNm": "Company"})
+        else:
+            raw = raw.rename(columns={"SYMBOL": "Symbol"})
+            raw["Company"] = raw["Symbol"]
+
+        df = raw[raw["SERIES"].str.strip() == "EQ"].copy()
+        df["Symbol"] = df["Symbol"].str.strip()
+        return _listing(df, Yahoo_Ticker=df["Symbol"] + ".NS", Country="India", Type="Stock")
+
+
+class NasdaqSource:
+    """
+    NASDAQ-listed symbols from the datasets/nasdaq-listings CSV.
+    """
+    name = "NASDAQ"
+    covers = {"Country": "US", "Type": "Stock"}
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def load(self, session):
+        if self.path:
+            raw = pd.read_csv(self.path, dtype=str)
+        else:
+            response = session.get(NASDAQ_URL, timeout=30)
+            response.raise_for_status()
+            raw = pd.read_csv(io.StringIO(response.text), dtype=str)
+
+        df = raw.rename(columns={"Company Name": "Company"})
+        return _listing(df, Yahoo_Ticker=df["Symbol"], Country="US", Type="Stock")
+
+
+class MasterSource:
+    """
+    Carries over the rows another source covers from an existing master,
+    for offline rebuilds of sources that have no local listing file and for
+    sources skipped on purpose. Carrying no rows is not an error.
+    """
+    optional = True
+
+    def __init__(self, path, source):
+        self.path = path
+        self.name = f"existing {source.name} rows"
+        self.covers = source.covers
+
+    def load(self, session):
+        return carried_rows(self.path, self.covers)
+
+
+class AMFISource:
+    """
+    Indian mutual funds from AMFI's NAVAll.txt (see nav_store.parse_navall).
+    Their Yahoo_Ticker stays empty: scheme codes are priced from the NAV store.
+    """
+    name = "AMFI"
+    covers = {"Country": "India", "Type": "MutualFund"}
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def load(self, session):
+        if self.path:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+        else:
+            response = session.get(AMFI_URL, timeout=60)
+            response.raise_for_status()
+            text = response.content.decode("utf-8")
+        return self.parse(text)
+
+    @staticmethod
+    def parse(text):
+        snapshot = parse_navall(text)
+        df = pd.DataFrame({
+            "Symbol": snapshot["Scheme Code"],
+            "Company": snapshot["Scheme Name"],
+            "AMC": snapshot["AMC"],
+            "NAV": snapshot["NAV"],
+            "NAV_Date": snapshot["Date"],
         })
+        return _listing(df, Yahoo_Ticker="", Country="India", Type="MutualFund")
+
+
+def default_sources(offline=False, master_path=CSV_PATH):
+    if not offline:
+        return [NSESource(), NasdaqSource(), AMFISource()]
+    return [
+        NSESource(path="data/nse_bhavcopy.zip"),
+        MasterSource(master_path, NasdaqSource),
+        AMFISource(path="data/tickers_list.csv"),
+    ]
+
+
+def carried_rows(master_path, covers):
+    """
+    Rows of the existing master matching every column -> value in `covers`.
+    Raises FileNotFoundError when there is no existing master.
+    """
+    if not os.path.exists(master_path):
+        raise FileNotFoundError(f"no existing master at {master_path}")
+    df = pd.read_csv(master_path, dtype=str, keep_default_na=False)
+    mask = pd.Series(True, index=df.index)
+    for col, value in covers.items():
+        mask &= df[col] == value
+    return df.loc[mask, COLUMNS]
+
+
+def run_pipeline(sources, output_path=CSV_PATH, max_workers=4, master_path=CSV_PATH):
+    """
+    Loads all sources concurrently, then writes the deduplicated master
+    atomically and rebuilds its typed Arrow copy.
+
+    A source whose download fails is replaced by the rows it covers in the
+    existing master at `master_path`, so a network error never drops
+    instruments. The rebuild is aborted, writing nothing, when a source
+    loads but lists no instruments (its format has likely changed) or fails
+    with no existing rows to keep; leave such a source out on purpose with
+    a MasterSource (see --skip).
+    """
+    session = make_session(pool_size=max_workers)
+    frames = []
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [(source, pool.submit(source.load, session)) for source in sources]
+        for source, future in futures:
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"Error fetching {source.name} data: {e}")
+                failed += 1
+                try:
+                    df = carried_rows(master_path, source.covers)
+                except FileNotFoundError:
+                    raise RuntimeError(f"{source.name} failed and there is no existing master at "
+                                       f"{master_path} to keep its rows from; nothing was written") from e
+                if df.empty:
+                    raise RuntimeError(f"{source.name} failed and {master_path} has none of its rows to keep; "
+                                       f"nothing was written (pass --skip {source.name} to leave it out)") from e
+                print(f" {source.name}: keeping {len(df)} instruments from {master_path}")
+            else:
+                if df.empty and not getattr(source, "optional", False):
+                    raise RuntimeError(f"{source.name} listed no instruments; its format may have changed. "
+                                       f"Nothing was written.")
+                print(f" {source.name}: {len(df)} instruments")
+            frames.append(df)
+
+    if failed == len(sources):
+        raise RuntimeError("every source failed; keeping the existing master")
+
+    combined = (
+        pd.concat(frames, ignore_index=True)
+        .drop_duplicates(subset=["Symbol", "Country", "Type"], keep="first")
+    )
+
+    tmp_path = f"{output_path}.tmp"
+    combined.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    build_master(output_path, os.path.splitext(output_path)[0] + ".arrow")
+    return combined
 
-mf_df = pd.DataFrame(mutual_funds)
 
-# ==========================
-# 4. Combine All and Save
-# ==========================
-print(" Combining all data...")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offline", action="store_true", help="read local files instead of downloading")
+    parser.add_argument("--nse", help="local NSE bhavcopy zip")
+    parser.add_argument("--nasdaq", help="local nasdaq-listed-symbols.csv")
+    parser.add_argument("--amfi", help="local AMFI NAVAll.txt")
+    parser.add_argument("--master", default=CSV_PATH,
+                        help="existing master to carry rows over from (offline US rows, failed sources)")
+    parser.add_argument("--skip", nargs="+", default=[], choices=["NSE", "NASDAQ", "AMFI"],
+                        help="sources to leave out, keeping their rows from --master")
+    parser.add_argument("--output", default=CSV_PATH)
+    args = parser.parse_args()
 
-# Ensure all dataframes have same columns
-mf_df = mf_df[['Symbol', 'Company', 'Yahoo_Ticker', 'Country', 'Type', 'AMC', 'NAV_Date', 'NAV']]
-nse_df['AMC'] = ""
-nse_df['NAV_Date'] = ""
-nse_df['NAV'] = ""
+    sources = default_sources(offline=args.offline, master_path=args.master)
+    if args.nse:
+        sources[0] = NSESource(path=args.nse)
+    if args.nasdaq:
+        sources[1] = NasdaqSource(path=args.nasdaq)
+    if args.amfi:
+        sources[2] = AMFISource(path=args.amfi)
+    for i, source in enumerate([NSESource, NasdaqSource, AMFISource]):
+        if source.name in args.skip:
+            sources[i] = MasterSource(args.master, source)
 
-us_df['AMC'] = ""
-us_df['NAV_Date'] = ""
-us_df['NAV'] = ""
+    combined = run_pipeline(sources, output_path=args.output, master_path=args.master)
+    print(f"✅ {len(combined)} instruments saved to {args.output}")
 
-combined_df = pd.concat([nse_df, us_df, mf_df], ignore_index=True)
-combined_df.to_csv("combined_stocks_yahoo.csv", index=False)
 
-print("✅ All data saved to combined_stocks_yahoo.csv")
+if __name__ == "__main__":
+    main()
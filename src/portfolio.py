@@ -1,122 +1,406 @@
 import streamlit as st 
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
-from utils import search_bar_selector, load_stock_data, plot_area_chart
+from utils import (search_bar_selector, load_stock_data, plot_area_chart, plot_heatmap, show_chart, get_price_store,
+                   get_portfolio_store, get_fx_store, zoom_window)
+from finance_core import telemetry
+from finance_core.fx import BASE_CURRENCY, CURRENCY_SYMBOLS, pair_symbol, symbol_currency
+from finance_core.portfolio import fetch_closes, holdings_risk, ledger_summary, portfolio_values, value_holdings
+from finance_core.portfolio_store import DEFAULT_OWNER
+from finance_core.transactions import TransactionLedger
+
+DURATION_MAP = {
+    '1W': '5d',
+    '1M': '1mo',
+    '6M': '6mo',
+    '1Y': '1y',
+    '5Y': '5y',
+    'ALL': 'max'
+}
+
+# Indices offered for beta.
+BENCHMARKS = {
+    'Nifty 50': '^NSEI',
+    'Sensex': '^BSESN',
+    'S&P 500': '^GSPC',
+}
+
+
+# Prefix for values in the base currency.
+MONEY = CURRENCY_SYMBOLS[BASE_CURRENCY]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_risk_report(holdings, period, benchmark, risk_free, confidence, converted, version):
+    """
+    Risk report for the holdings, recomputed only when they, the options or
+    the stored bars of their symbols and FX rates (`version`) change.
+    """
+    telemetry.count("risk_report.miss")
+    fx = get_fx_store() if converted else None
+    return holdings_risk(get_price_store(), holdings, period, benchmark, risk_free, confidence, fx)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_holdings_value(holdings, period, converted, version):
+    """
+    Total value of a list of lot dicts over `period`, recomputed only when
+    they or the stored bars of their symbols and FX rates (`version`) change.
+    """
+    telemetry.count("holdings_value.miss")
+    return value_holdings(get_price_store(), holdings, period, get_fx_store() if converted else None)
+
+
+TRANSACTION_KINDS = ['Buy', 'Sell', 'Split', 'Dividend']
+
+# Created for users who have no portfolio yet.
+DEFAULT_PORTFOLIO = 'My Portfolio'
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_ledger_summary(transactions, converted, version):
+    """
+    FIFO positions and XIRR for the transactions, recomputed only when they
+    or the stored bars of their symbols and FX rates (`version`) change.
+    """
+    return ledger_summary(get_price_store(), transactions, fx=get_fx_store() if converted else None)
+
+
+def fx_for(symbols):
+    """
+    The shared FxStore when rates are available for every currency the
+    symbols trade in, otherwise None after warning that values are shown
+    in their own currencies.
+    """
+    fx = get_fx_store()
+    missing = []
+    for currency in sorted({symbol_currency(s) for s in symbols} - {fx.base}):
+        try:
+            fx.series(currency)
+        except Exception as e:
+            missing.append(f"{currency} ({e})")
+    if missing:
+        st.warning(f"No exchange rates for {', '.join(missing)}; values are not converted to {fx.base}.")
+        return None
+    return fx
+
+
+def money_prefix(symbols, fx):
+    """
+    Currency symbol for totals of `symbols`: the base currency's when `fx`
+    converts them, the one currency they share otherwise, or "" for an
+    unconverted mix of currencies.
+    """
+    if fx is not None:
+        return MONEY
+    currencies = {symbol_currency(s) for s in symbols}
+    if len(currencies) == 1:
+        (currency,) = currencies
+        return CURRENCY_SYMBOLS.get(currency, f"{currency} ")
+    return ""
+
+
+def data_version(symbols, fx):
+    """
+    Cache key covering the stored bars of `symbols` and, when converting,
+    the FX rates they need.
+    """
+    version = get_price_store().version(symbols)
+    if fx is None:
+        return version
+    pairs = [pair_symbol(c, fx.base) for c in {symbol_currency(s) for s in symbols} - {fx.base}]
+    return version, fx.bars.version(pairs)
+
+
+def close_on(symbol, date):
+    """
+    Close of `symbol` on `date`, or on the last trading day before it; None
+    when there is no history that far back.
+    """
+    closes, _ = fetch_closes(get_price_store(), [symbol])
+    close = closes.get(symbol)
+    if close is None:
+        return None
+    close = close[close.index <= pd.Timestamp(date)]
+    return float(close.iloc[-1]) if not close.empty else None
+
+
+def ledger_error(transactions):
+    """
+    Returns why the transactions are inconsistent (a sale of more units
+    than held), or None.
+    """
+    try:
+        TransactionLedger(transactions).positions({})
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def create_portfolio(owner):
+    name = st.session_state.get("portfolio_new_name", "").strip()
+    if name:
+        get_portfolio_store().create(name, owner)
+        st.session_state["portfolio_name"] = name
+        st.session_state["portfolio_new_name"] = ""
+
+
+def delete_portfolio(portfolio_id):
+    get_portfolio_store().delete(portfolio_id)
+    st.session_state.pop("portfolio_name", None)
+
+
+def portfolio_picker():
+    """
+    User and portfolio selection with create and delete. Returns the id
+    of the selected portfolio.
+    """
+    portfolios = get_portfolio_store()
+    col1, col2 = st.columns([1, 2])
+    owner = col1.text_input("User", value=DEFAULT_OWNER, key="portfolio_owner").strip() or DEFAULT_OWNER
+    names = portfolios.portfolios(owner)
+    if not names:
+        portfolios.create(DEFAULT_PORTFOLIO, owner)
+        names = [DEFAULT_PORTFOLIO]
+    if st.session_state.get("portfolio_name") not in names:
+        st.session_state.pop("portfolio_name", None)
+    name = col2.selectbox("Portfolio", names, key="portfolio_name")
+    portfolio_id = portfolios.portfolio_id(name, owner)
+
+    with st.expander("Manage Portfolios"):
+        col1, col2 = st.columns([3, 1])
+        col1.text_input("New Portfolio Name", key="portfolio_new_name")
+        col2.button("Create", on_click=create_portfolio, args=(owner,), use_container_width=True)
+        st.button(f"Delete '{name}'", on_click=delete_portfolio, args=(portfolio_id,),
+                  help="Deletes the portfolio and all of its transactions")
+    return portfolio_id
+
 
 def portfolio_tracker_page():
     st.title("Portfolio Tracker")
 
-    duration_map = {
-        '1W': '5d',
-        '1M': '1mo',
-        '6M': '6mo',
-        '1Y': '1y',
-        '5Y': '5y',
-        'ALL': 'max'
-    }
+    portfolios = get_portfolio_store()
+    portfolio_id = portfolio_picker()
 
-    if 'portfolio' not in st.session_state:
-        st.session_state['portfolio'] = []
+    # Searching and the transaction type live outside the form so the form
+    # shows the right fields as they change.
+    selected = search_bar_selector(key="portfolio_search")
+    kind = st.radio("Transaction", TRANSACTION_KINDS, horizontal=True, key="portfolio_kind")
 
     with st.form("portfolio_form"):
-        selected = search_bar_selector(key="portfolio_search")
         default_date = datetime.today() - timedelta(days=30)
-        buy_date = st.date_input("Buy Date", value=default_date)
-        units = st.number_input("Units Owned", min_value=0.0, step=0.001, format="%.5f")
+        date = st.date_input("Date", value=default_date)
+        units = price = ratio = amount = None
+        if kind in ('Buy', 'Sell'):
+            units = st.number_input("Units", min_value=0.0, step=0.001, format="%.5f")
+            price = st.number_input("Price per Unit (0 uses that day's close)", min_value=0.0, step=0.01)
+        elif kind == 'Split':
+            ratio = st.number_input("New Units per Old Unit", min_value=0.0, value=2.0, step=0.5)
+        else:
+            amount = st.number_input("Dividend Received", min_value=0.0, step=0.01)
 
-        submitted = st.form_submit_button("Add to Portfolio")
+        submitted = st.form_submit_button("Add Transaction")
 
         if submitted:
-            if selected and units > 0:
+            if not selected or not (units or ratio or amount):
+                st.error("Please select a valid stock and enter an amount greater than 0.")
+            else:
                 symbol = selected.get("Yahoo_Ticker") or selected.get("Symbol")
                 display = selected.get("Display") or f"{symbol} - {selected.get('Company', '')}"
+                if kind in ('Buy', 'Sell') and price == 0:
+                    price = close_on(symbol, date)
 
-                st.session_state['portfolio'].append({
+                transaction = {
                     "stock": display,
                     "symbol": symbol,
-                    "buy_date": buy_date,
-                    "units": units
-                })
-                st.success(f"Added {units:.2f} units of {display} bought on {buy_date}")
-                st.rerun()
-            else:
-                st.error("Please select a valid stock and enter units greater than 0.")
-
-    if st.session_state['portfolio']:
-        st.markdown("### Portfolio Summary")
-
-        col1, col2, col3, col4, col5 = st.columns([3, 3, 2, 2, 1])
-        col1.markdown("**Stock**")
-        col2.markdown("**Buy Date**")
-        col3.markdown("**Units**")
-        col4.markdown("**Symbol**")
-        col5.markdown("**Delete**")
-
-        for i, item in enumerate(st.session_state['portfolio']):
-            col1, col2, col3, col4, col5 = st.columns([3, 3, 2, 2, 1])
-            col1.write(item['stock'])
-            col2.write(item['buy_date'].strftime("%Y-%m-%d"))
-            col3.write(f"{item['units']:.4f}")
-            col4.write(item['symbol'])
-            with col5:
-                if st.button("Delete", key=f"del_{i}"):
-                    st.session_state['portfolio'].pop(i)
+                    "date": date,
+                    "type": kind.lower(),
+                    "units": units,
+                    "price": price,
+                    "ratio": ratio,
+                    "amount": amount,
+                }
+                if kind in ('Buy', 'Sell') and price is None:
+                    st.error(f"No close found for {display} on or before {date}; enter the price.")
+                elif error := ledger_error(portfolios.transactions(portfolio_id) + [transaction]):
+                    st.error(f"Cannot add this sale: {error}")
+                else:
+                    portfolios.add_transactions(portfolio_id, [transaction])
+                    st.success(f"Added {kind.lower()} of {display} on {date}")
                     st.rerun()
 
-        st.markdown("---")
-        selected_duration_label = st.radio(
-            "Select Time Duration:",
-            list(duration_map.keys()), horizontal=True, key="portfolio_duration"
+    transactions = portfolios.transactions(portfolio_id)
+    if transactions:
+        st.markdown("### Transactions")
+        table = pd.DataFrame(transactions)
+        table["date"] = pd.to_datetime(table["date"])
+        table["currency"] = table["symbol"].map(symbol_currency)
+        event = st.dataframe(
+            table[["date", "stock", "type", "currency", "units", "price", "ratio", "amount"]],
+            column_config={
+                "date": st.column_config.DateColumn("Date"),
+                "stock": "Stock",
+                "type": "Type",
+                "currency": "Currency",
+                "units": st.column_config.NumberColumn("Units", format="%.4f"),
+                "price": st.column_config.NumberColumn("Price", format="%.2f"),
+                "ratio": st.column_config.NumberColumn("Split Ratio", format="%.2f"),
+                "amount": st.column_config.NumberColumn("Amount", format="%.2f"),
+            },
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+            key=f"portfolio_transactions_{portfolio_id}",
         )
-        period = duration_map[selected_duration_label]
+        chosen = set(event.selection.rows)
+        if chosen and st.button(f"Delete {len(chosen)} Selected"):
+            remaining = [t for i, t in enumerate(transactions) if i not in chosen]
+            error = ledger_error(remaining)
+            if error:
+                st.error(f"Cannot delete: later sales would exceed the units held ({error}).")
+            else:
+                portfolios.remove_transactions(portfolio_id, [transactions[i]['id'] for i in chosen])
+                st.rerun()
 
-        total_value_df = pd.DataFrame()
+        st.markdown("---")
+        names = {t['symbol']: t['stock'] for t in transactions}
+        fx = fx_for(names)
+        money = money_prefix(names, fx)
+        holdings_view(transactions, names, fx, money)
+        portfolio_value_view(portfolio_id, TransactionLedger(transactions).lots(), fx, money)
+    else:
+        st.info("Your portfolio is empty. Use the form above to record buys, sells, splits and dividends.")
 
-        for item in st.session_state['portfolio']:
-            symbol = item['symbol']
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period=period)
-            except Exception as e:
-                st.warning(f"Failed to fetch data for {item['stock']} ({symbol}): {e}")
-                continue
 
-            if hist.empty or "Close" not in hist:
-                st.warning(f"No data found for {item['stock']} ({symbol})")
-                continue
+def holdings_view(transactions, names, fx, money):
+    """
+    Current FIFO positions with realized and unrealized P&L and XIRR, in
+    the base currency when `fx` is given. Totals are prefixed with `money`.
+    """
+    positions, total_xirr, problems = load_ledger_summary(transactions, fx is not None,
+                                                          data_version(list(names), fx))
+    for symbol, problem in problems.items():
+        st.warning(f"{names[symbol]} ({symbol}): {problem}")
 
-            if hist.index.tz is not None:
-                hist.index = hist.index.tz_localize(None)
+    st.markdown("### Holdings")
+    cols = st.columns(5)
+    cols[0].metric("Market Value", f"{money}{positions['Market Value'].sum():,.2f}")
+    cols[1].metric("Unrealized P&L", f"{money}{positions['Unrealized P&L'].sum():,.2f}")
+    cols[2].metric("Realized P&L", f"{money}{positions['Realized P&L'].sum():,.2f}")
+    cols[3].metric("Dividends", f"{money}{positions['Dividends'].sum():,.2f}")
+    unpriced = positions.index[positions["Market Value"].isna()]
+    cols[4].metric("XIRR", "–" if pd.isna(total_xirr) else f"{total_xirr:.2%}",
+                   help=f"Excludes {', '.join(names[s] for s in unpriced)}: no price." if len(unpriced) else None)
+    if not money:
+        st.caption("Totals add up amounts in different currencies without conversion.")
 
-            buy_date_ts = pd.Timestamp(item['buy_date'])
-            hist['Value'] = (hist["Close"] * item['units']).where(hist.index >= buy_date_ts, 0)
-            hist = hist[['Value']].copy()
+    amount = "{:,.2f}"
+    st.dataframe(
+        positions.rename(index=names).style.format({
+            "Units": "{:,.4f}",
+            "Cost Basis": amount,
+            "Average Cost": amount,
+            "Market Value": amount,
+            "Unrealized P&L": amount,
+            "Realized P&L": amount,
+            "Dividends": amount,
+            "XIRR": "{:.2%}",
+        }, na_rep="–"),
+        use_container_width=True
+    )
 
-            if total_value_df.empty:
-                total_value_df = hist
-            else:
-                total_value_df = total_value_df.join(hist, how="outer", rsuffix=f"_{symbol}")
-
-        if not total_value_df.empty:
-            total_value_df.fillna(0, inplace=True)
-            total_value_df['Total Value'] = total_value_df.sum(axis=1)
-            latest_value = total_value_df['Total Value'].iloc[-1]
-
-            st.markdown(f"<h3>Total Portfolio Value Today: ₹{latest_value:,.2f}</h3>", unsafe_allow_html=True)
-
-            total_value_df = total_value_df.reset_index()
-            total_value_df.rename(columns={"index": "Date"}, inplace=True)
-
-            fig = plot_area_chart(
-                df=total_value_df,
-                x_col='Date',
-                y_col='Total Value',
-                title="Overall Portfolio Value Over Time",
-                y_label="Value (₹)"
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No valid historical data found for the selected time range.")
+
+@st.fragment
+def portfolio_value_view(portfolio_id, portfolio, fx, money):
+    """
+    Duration picker and valuation chart; changing the duration reruns only this fragment.
+    """
+    selected_duration_label = st.radio(
+        "Select Time Duration:",
+        list(DURATION_MAP.keys()), horizontal=True, key="portfolio_duration"
+    )
+    period = DURATION_MAP[selected_duration_label]
+
+    # Symbols that failed to load are already reported under Holdings.
+    total_value, _ = portfolio_values(get_price_store(), get_portfolio_store(), portfolio_id, period=period, fx=fx)
+
+    if not total_value.empty:
+        latest_value = total_value.iloc[-1]
+
+        st.markdown(f"<h3>Total Portfolio Value Today: {money}{latest_value:,.2f}</h3>", unsafe_allow_html=True)
+
+        total_value_df = zoom_window(total_value.reset_index(), 'Date', key="portfolio_zoom")
+
+        fig = plot_area_chart(
+            df=total_value_df,
+            x_col='Date',
+            y_col='Total Value',
+            title="Overall Portfolio Value Over Time",
+            y_label=f"Value ({money.strip()})" if money else "Value (unconverted)"
+        )
+        show_chart(fig)
+
+        risk_view(portfolio, period, fx)
     else:
-        st.info("Your portfolio is empty. Use the form above to add stocks or mutual funds.")
+        st.info("No valid historical data found for the selected time range.")
+
+
+def risk_view(portfolio, period, fx):
+    """
+    Risk and performance analytics for the holdings over the selected period.
+    """
+    st.markdown("### Risk & Performance")
+
+    col1, col2, col3 = st.columns(3)
+    benchmark_label = col1.selectbox("Benchmark", list(BENCHMARKS), key="portfolio_benchmark")
+    risk_free = col2.number_input("Risk-free rate (%)", min_value=0.0, max_value=20.0, value=6.5, step=0.25,
+                                  key="portfolio_risk_free") / 100
+    confidence = col3.selectbox("VaR confidence", [0.95, 0.99], format_func=lambda c: f"{c:.0%}",
+                                key="portfolio_confidence")
+    benchmark = BENCHMARKS[benchmark_label]
+
+    # Fetch the benchmark first so the version below already covers its bars;
+    # a failure is reported by holdings_risk.
+    store = get_price_store()
+    try:
+        store.refresh(benchmark)
+    except Exception:
+        pass
+    version = data_version([item['symbol'] for item in portfolio] + [benchmark], fx)
+
+    report, problems = load_risk_report(portfolio, period, benchmark, risk_free, confidence, fx is not None, version)
+    if benchmark in problems:
+        st.warning(f"{benchmark_label} ({benchmark}): {problems[benchmark]}")
+    if report is None:
+        st.info("Not enough price history in this range to measure risk.")
+        return
+
+    metrics = report["metrics"]
+    row1 = st.columns(4)
+    row1[0].metric("Annual Return", f"{metrics['Annual Return']:.2%}")
+    row1[1].metric("Annual Volatility", f"{metrics['Annual Volatility']:.2%}")
+    row1[2].metric("Sharpe", f"{metrics['Sharpe']:.2f}")
+    row1[3].metric("Sortino", f"{metrics['Sortino']:.2f}")
+
+    row2 = st.columns(4)
+    row2[0].metric(f"1-day VaR {confidence:.0%} (historical)", f"{metrics['VaR (historical)']:.2%}",
+                   f"CVaR {metrics['CVaR (historical)']:.2%}", delta_color="off")
+    row2[1].metric(f"1-day VaR {confidence:.0%} (parametric)", f"{metrics['VaR (parametric)']:.2%}")
+    row2[2].metric(f"Beta vs {benchmark_label}", "–" if pd.isna(metrics['Beta']) else f"{metrics['Beta']:.2f}")
+    row2[3].metric("Max Drawdown", f"{metrics['Max Drawdown']:.2%}")
+
+    st.markdown("#### Contribution to Risk")
+    st.dataframe(
+        report["contributions"].style.format({
+            "Weight": "{:.2%}",
+            "Volatility": "{:.2%}",
+            "Beta to Portfolio": "{:.2f}",
+            "Risk Contribution": "{:.2%}",
+            "Share of Risk": "{:.2%}",
+        }),
+        use_container_width=True
+    )
+
+    if len(report["correlation"]) > 1:
+        show_chart(plot_heatmap(report["correlation"], "Correlation of Daily Returns"))
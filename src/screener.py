@@ -0,0 +1,96 @@
+import os
+import streamlit as st
+import pandas as pd
+from finance_core.instrument_master import price_symbols
+from finance_core.screener import METRIC_COLUMNS, RESULTS_PATH, load_results, scan, screen
+from utils import get_price_store, load_stock_data
+
+# Metrics offered as range filters, entered as percentages.
+RANGE_FILTERS = ["Return 1Y", "Volatility 1Y", "Max Drawdown 1Y", "From 52W High"]
+
+
+@st.cache_resource(max_entries=1)
+def load_screener_results(mtime):
+    """
+    Saved screener results joined with the instrument master; reloaded only
+    when the results file changes (`mtime`).
+    """
+    master = load_stock_data()
+    names = pd.DataFrame({
+        "Symbol": price_symbols(master).astype("string"),
+        "Company": master["Company"],
+        "Type": master["Type"],
+        "Country": master["Country"],
+    }).drop_duplicates("Symbol")
+    return load_results().merge(names, on="Symbol", how="left")
+
+
+def results_mtime():
+    return os.path.getmtime(RESULTS_PATH) if os.path.exists(RESULTS_PATH) else None
+
+
+def screener_page():
+    st.title(" Screener")
+
+    results = load_screener_results(results_mtime())
+    st.caption(
+        f"{len(results):,} of {len(load_stock_data()):,} instruments screened. Only instruments with local "
+        "price history can be screened; they are added as they are viewed, or all at once with "
+        "`PYTHONPATH=src python -m finance_core screen --fetch`."
+    )
+
+    if st.button("Scan price store", help="Recompute metrics for instruments whose prices changed"):
+        bar = st.progress(0.0, text="Scanning…")
+        _, recomputed = scan(get_price_store(), progress=lambda done, total: bar.progress(done / total))
+        bar.empty()
+        st.success(f"Recomputed {recomputed:,} instruments.")
+        results = load_screener_results(results_mtime())
+
+    if results.empty:
+        st.info("No screener results yet. Press **Scan price store** to compute them.")
+        return
+
+    screener_results_view(results)
+
+
+@st.fragment
+def screener_results_view(results):
+    """
+    Filters, sort order and the results table; filtering and sorting run on
+    the server and only the top rows are sent to the browser.
+    """
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    types = col1.multiselect("Type", sorted(results["Type"].dropna().unique()), key="screener_types")
+    countries = col2.multiselect("Country", sorted(results["Country"].dropna().unique()), key="screener_countries")
+    sort_by = col3.selectbox("Sort by", METRIC_COLUMNS, index=METRIC_COLUMNS.index("Return 1Y"), key="screener_sort")
+    limit = col4.number_input("Rows", min_value=10, max_value=1000, value=100, step=10, key="screener_limit")
+    ascending = st.radio("Order", ["Highest first", "Lowest first"], horizontal=True,
+                         key="screener_order") == "Lowest first"
+
+    ranges = {}
+    with st.expander("Ranges (%)"):
+        for col in RANGE_FILTERS:
+            low_col, high_col = st.columns(2)
+            low = low_col.number_input(f"{col} from", value=None, step=1.0, key=f"screener_{col}_low")
+            high = high_col.number_input(f"{col} to", value=None, step=1.0, key=f"screener_{col}_high")
+            if low is not None or high is not None:
+                ranges[col] = (None if low is None else low / 100, None if high is None else high / 100)
+
+    if types:
+        results = results[results["Type"].isin(types)]
+    if countries:
+        results = results[results["Country"].isin(countries)]
+
+    top, matches = screen(results, ranges, sort_by=sort_by, ascending=ascending, limit=limit)
+    st.markdown(f"**{matches:,} matches**" + (f", showing the top {len(top):,}" if matches > len(top) else ""))
+
+    st.dataframe(
+        top[["Symbol", "Company", "Type", "Country", "Last Date", "Last Close"] + METRIC_COLUMNS],
+        column_config={
+            "Last Date": st.column_config.DateColumn("Last Date"),
+            "Last Close": st.column_config.NumberColumn("Last Close", format="%.2f"),
+            **{col: st.column_config.NumberColumn(col, format="percent") for col in METRIC_COLUMNS},
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
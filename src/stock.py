@@ -1,10 +1,12 @@
 import streamlit as st
-import yfinance as yf
-import plotly.graph_objects as go
 from datetime import datetime
 import pandas as pd
 from streamlit_autorefresh import st_autorefresh
+from finance_core.fx import CURRENCY_SYMBOLS, symbol_currency
+from portfolio import data_version, fx_for, load_holdings_value, money_prefix
+from utils import plot_area_chart, show_chart, zoom_window, get_quote_cache
 
+# Reruns only read the shared quote cache; its poller does the fetching.
 st_autorefresh(interval=30 * 1000, key="auto-refresh")
 
 # Stocks to choose from
@@ -36,13 +38,14 @@ with tab1:
         selected_duration_label = st.radio("Select Time Duration:", list(duration_map.keys()), horizontal=True)
 
     ticker_symbol = available_stocks[selected_stock]
+    currency = symbol_currency(ticker_symbol)
     period = duration_map[selected_duration_label]
-    ticker = yf.Ticker(ticker_symbol)
-    data = ticker.history(period=period)
+    quotes = get_quote_cache()
+    data = quotes.history(ticker_symbol, period=period).copy()
 
     st.markdown("### Current Price")
     try:
-        current_price = ticker.info.get("currentPrice", None)
+        current_price = quotes.quote(ticker_symbol)
         if data.empty:
             st.warning("No historical data found.")
         else:
@@ -55,7 +58,7 @@ with tab1:
             price_to_show = current_price if current_price else latest_close
 
             st.markdown(
-                f"<h3 style='color:{change_color};'>{price_to_show:.2f} INR "
+                f"<h3 style='color:{change_color};'>{price_to_show:.2f} {currency} "
                 f"{change:+.2f} ({percent_change:+.2f}%) past {selected_duration_label}</h3>",
                 unsafe_allow_html=True
             )
@@ -63,23 +66,17 @@ with tab1:
         st.error(f"Error fetching price: {e}")
 
     if not data.empty:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=data["Date"],
-            y=data["Close"],
-            fill='tozeroy',
-            mode='lines',
-            line=dict(color=change_color),
-            fillcolor='rgba(0, 255, 0, 0.2)' if change >= 0 else 'rgba(255, 0, 0, 0.2)'
-        ))
-        fig.update_layout(
+        data = zoom_window(data, "Date", key="stock_zoom")
+        fig = plot_area_chart(
+            df=data,
+            x_col="Date",
+            y_col="Close",
             title=f"{selected_stock} - Closing Prices ({selected_duration_label})",
-            xaxis_title="Date",
-            yaxis_title="Price (₹)",
-            template="plotly_dark",
-            margin=dict(t=40, l=0, r=0, b=0)
+            y_label=f"Price ({CURRENCY_SYMBOLS.get(currency, currency)})",
+            line_color=change_color,
+            fill_color='rgba(0, 255, 0, 0.2)' if change >= 0 else 'rgba(255, 0, 0, 0.2)'
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
 
 # --------------- TAB 2: PORTFOLIO TRACKER ------------------
 with tab2:
@@ -132,61 +129,35 @@ with tab2:
         )
         period = duration_map[selected_duration_label]
 
-        # Create total portfolio value DataFrame
-        total_value_df = pd.DataFrame()
-
-        for item in st.session_state['portfolio']:
-            ticker = yf.Ticker(item['symbol'])
-            hist = ticker.history(period=period)
-
-            if hist.empty or "Close" not in hist:
-                continue
-
-            # Fix timezone issue
-            if hist.index.tz is not None:
-                hist.index = hist.index.tz_localize(None)
-
-            # Calculate value only from buy date onward
-            buy_date_ts = pd.Timestamp(item['buy_date'])
-            hist['Value'] = hist["Close"] * item['units']
-            hist.loc[hist.index < buy_date_ts, 'Value'] = 0
-
-            hist = hist[['Value']].copy()
-
-            if total_value_df.empty:
-                total_value_df = hist
-            else:
-                total_value_df = total_value_df.join(hist, how="outer", rsuffix='_dup')
-
-        if not total_value_df.empty:
-            total_value_df.fillna(0, inplace=True)
-            total_value_df['Total Value'] = total_value_df.sum(axis=1)
-
-            latest_value = total_value_df['Total Value'].iloc[-1]
+        # The shared quote cache refreshes the bars at most once per TTL for
+        # every session; valuing the lots is cached on the stored bars.
+        portfolio = st.session_state['portfolio']
+        symbols = [item['symbol'] for item in portfolio]
+        get_quote_cache().histories(symbols, period=period)
+        # Lots in other currencies are converted into INR, as on the Portfolio page.
+        fx = fx_for(symbols)
+        money = money_prefix(symbols, fx)
+        total_value, problems = load_holdings_value(portfolio, period, fx is not None, data_version(symbols, fx))
+        for symbol, problem in problems.items():
+            st.warning(f"{symbol}: {problem}")
+
+        if not total_value.empty:
+            latest_value = total_value.iloc[-1]
             st.markdown(
-                f"<h3> Total Portfolio Value Today: ₹{latest_value:,.2f}</h3>",
+                f"<h3> Total Portfolio Value Today: {money}{latest_value:,.2f}</h3>",
                 unsafe_allow_html=True
             )
 
             # Plot portfolio value
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=total_value_df.index,
-                y=total_value_df['Total Value'],
-                fill='tozeroy',
-                mode='lines+markers',
-                name='Total Value',
-                line=dict(color='lime', width=2)
-            ))
-
-            fig.update_layout(
+            total_value_df = zoom_window(total_value.reset_index(), "Date", key="portfolio_zoom")
+            fig = plot_area_chart(
+                df=total_value_df,
+                x_col="Date",
+                y_col="Total Value",
                 title="Overall Portfolio Value Over Time",
-                xaxis_title="Date",
-                yaxis_title="Value (₹)",
-                template="plotly_dark",
-                margin=dict(t=40, l=0, r=0, b=0)
+                y_label=f"Value ({money.strip()})" if money else "Value (unconverted)"
             )
 
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
         else:
             st.info("No valid historical data found for the selected time range.")
@@ -1,12 +1,44 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from datetime import datetime
-from utils import search_bar_selector, plot_area_chart
+from utils import (search_bar_selector, plot_area_chart, plot_heatmap, plot_line_chart, plot_volume_profile,
+                   show_chart, get_quote_cache, get_indicator_engine, zoom_window)
+from finance_core.comparison import MAX_SYMBOLS, align_frame, comparison_stats, rebase, return_correlation
+from finance_core.indicators import max_drawdown, volume_profile
+
+# Indicators drawn over the price chart, and those drawn in their own panel.
+OVERLAYS = {
+    "SMA 50": ("sma", {"window": 50}),
+    "SMA 200": ("sma", {"window": 200}),
+    "EMA 20": ("ema", {"span": 20}),
+    "Bollinger (20, 2)": ("bollinger", {"window": 20, "width": 2.0}),
+}
+PANELS = {
+    "RSI (14)": ("rsi", {"period": 14}),
+    "MACD (12, 26, 9)": ("macd", {"fast": 12, "slow": 26, "signal": 9}),
+    "Volatility (21d)": ("volatility", {"window": 21}),
+    "Drawdown": ("drawdown", {}),
+}
+
+DURATION_MAP = {
+    '1W': '5d',
+    '1M': '1mo',
+    '6M': '6mo',
+    '1Y': '1y',
+    '5Y': '5y',
+    'ALL': 'max'
+}
+
 
 def stock_analysis_page():
     st.title(" Stock Analysis")
 
+    mode = st.radio("Mode", ["Single", "Compare"], horizontal=True, key="analysis_mode",
+                    label_visibility="collapsed")
+    if mode == "Compare":
+        comparison_page()
+        return
+
     # --- Stock selection ---
     selected = search_bar_selector(key="stock_analysis_search")
 
@@ -19,26 +51,24 @@ def stock_analysis_page():
 
     st.markdown(f"### {symbol} - {company_name}")
 
-    # --- Time period options ---
-    duration_map = {
-        '1W': '5d',
-        '1M': '1mo',
-        '6M': '6mo',
-        '1Y': '1y',
-        '5Y': '5y',
-        'ALL': 'max'
-    }
+    price_history_view(symbol)
+
 
+@st.fragment
+def price_history_view(symbol):
+    """
+    Duration picker, chart and table; changing the duration reruns only this fragment.
+    """
+    # --- Time period options ---
     selected_duration_label = st.radio(
         " Select Time Duration:",
-        list(duration_map.keys()), horizontal=True, key="analysis_duration"
+        list(DURATION_MAP.keys()), horizontal=True, key="analysis_duration"
     )
-    period = duration_map[selected_duration_label]
+    period = DURATION_MAP[selected_duration_label]
 
     # --- Fetch historical data ---
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
+        hist = get_quote_cache().history(symbol, period=period).copy()
     except Exception as e:
         st.error(f"❌ Error fetching data: {e}")
         return
@@ -47,21 +77,41 @@ def stock_analysis_page():
         st.warning("⚠️ No historical data available for this stock.")
         return
 
-    if hist.index.tz is not None:
-        hist.index = hist.index.tz_localize(None)
-
     hist.reset_index(inplace=True)
     hist.rename(columns={"Date": "Date", "Close": "Close Price"}, inplace=True)
 
+    chosen = st.multiselect(" Indicators", list(OVERLAYS) + list(PANELS), key="analysis_indicators")
+
     # --- Plot chart ---
+    hist = zoom_window(hist, "Date", key="analysis_zoom")
+    indicators = indicator_frames(symbol, chosen, hist["Date"])
+    overlays = {
+        col: frame[col].to_numpy()
+        for label, frame in indicators.items() if label in OVERLAYS for col in frame.columns
+    }
     fig = plot_area_chart(
         df=hist,
         x_col="Date",
         y_col="Close Price",
         title=f" {symbol} Price Trend",
-        y_label="Price (₹)"
+        y_label="Price (₹)",
+        overlays=overlays
     )
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
+
+    col1, col2 = st.columns(2)
+    col1.metric("Max Drawdown", f"{max_drawdown(hist['Close Price']):.1%}")
+    col2.metric("Period Return", f"{hist['Close Price'].iloc[-1] / hist['Close Price'].iloc[0] - 1:+.1%}")
+
+    for label, frame in indicators.items():
+        if label in PANELS:
+            panel = frame.reset_index()
+            show_chart(plot_line_chart(panel, "Date", list(frame.columns), title=f" {label}", y_label=label))
+
+    profile = volume_profile(hist.rename(columns={"Close Price": "Close"}))
+    if not profile.empty:
+        with st.expander(" Volume Profile"):
+            show_chart(plot_volume_profile(profile, title=f" {symbol} Volume by Price"))
 
     # --- Recent price table ---
     st.markdown("###  Recent Price Table")
@@ -71,3 +121,97 @@ def stock_analysis_page():
         hist_display.tail(10).sort_values("Date", ascending=False),
         use_container_width=True
     )
+
+
+def indicator_frames(symbol, labels, dates):
+    """
+    Computes the chosen indicators on the full history, so long windows are
+    warmed up before the displayed period, then aligns them to `dates`.
+    Results come from the shared IndicatorEngine cache.
+    """
+    if not labels:
+        return {}
+
+    full = get_quote_cache().history(symbol, period='max')
+    engine = get_indicator_engine()
+    frames = {}
+    for label in labels:
+        name, params = OVERLAYS.get(label) or PANELS[label]
+        frames[label] = engine.compute(symbol, full, name, **params).reindex(pd.DatetimeIndex(dates, name="Date"))
+    return frames
+
+
+# --- Comparison mode ---
+
+def comparison_page():
+    """
+    Picks the symbols to compare; the chart itself is a fragment.
+    """
+    names = st.session_state.setdefault("compare_names", {})
+    selected = search_bar_selector(key="compare_search")
+
+    # Adding updates the multiselect's state before it is drawn below.
+    if selected and st.button("Add to comparison"):
+        symbol = selected.get('Yahoo_Ticker') or selected.get('Symbol')
+        chosen = st.session_state.get("compare_symbols", [])
+        if symbol in chosen:
+            st.info(f"{symbol} is already in the comparison.")
+        elif len(chosen) >= MAX_SYMBOLS:
+            st.warning(f"Compare at most {MAX_SYMBOLS} symbols at a time.")
+        else:
+            names[symbol] = selected.get('Company') or symbol
+            st.session_state["compare_symbols"] = chosen + [symbol]
+
+    symbols = st.multiselect(
+        "Compared", list(names), key="compare_symbols",
+        format_func=lambda symbol: f"{symbol} - {names[symbol]}"
+    )
+    if len(symbols) < 2:
+        st.info("🔍 Add at least two stocks or mutual funds to compare.")
+        return
+
+    comparison_view(tuple(symbols))
+
+
+@st.fragment
+def comparison_view(symbols):
+    """
+    Rebased price overlay, summary table and correlation heatmap for the
+    selected symbols; changing the duration reruns only this fragment.
+    """
+    selected_duration_label = st.radio(
+        " Select Time Duration:",
+        list(DURATION_MAP.keys()), horizontal=True, key="compare_duration"
+    )
+    period = DURATION_MAP[selected_duration_label]
+
+    # Cached histories are reused, so adding a symbol only fetches that one.
+    histories, errors = get_quote_cache().histories(symbols, period=period)
+    closes = {}
+    for symbol in symbols:
+        if symbol in errors:
+            st.warning(f"{symbol}: failed to fetch data: {errors[symbol]}")
+        elif histories[symbol].empty or "Close" not in histories[symbol]:
+            st.warning(f"{symbol}: no data found")
+        else:
+            closes[symbol] = histories[symbol]["Close"]
+    if not closes:
+        return
+
+    prices = align_frame(closes)
+    window = zoom_window(prices.reset_index(), "Date", key="compare_zoom").set_index("Date")
+    rebased = rebase(window.ffill())
+
+    show_chart(plot_line_chart(
+        rebased.reset_index(), "Date", list(rebased.columns),
+        title=" Performance (rebased to 100)", y_label="Value of 100 invested", height=500
+    ))
+
+    st.markdown("###  Summary")
+    st.dataframe(
+        comparison_stats(window).style.format({"Return": "{:+.1%}", "Volatility": "{:.1%}", "Max Drawdown": "{:.1%}"}),
+        use_container_width=True
+    )
+
+    if len(closes) > 1:
+        show_chart(plot_heatmap(return_correlation(window), " Correlation of Daily Returns"))
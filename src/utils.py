@@ -1,51 +1,292 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
+import numpy as np
+from finance_core import telemetry
+from finance_core.price_store import PriceStore
+from finance_core.quote_cache import QuoteCache
+
+@st.cache_resource
+def _load_master():
+    telemetry.count("load_stock_data.miss")
+    from finance_core.instrument_master import load_master
+
+    with telemetry.span("load_master") as fields:
+        master = load_master()
+        if fields is not None:
+            fields["rows"], fields["bytes"] = len(master), telemetry.frame_bytes(master)
+    return master
+
 
-@st.cache_data
 def load_stock_data():
     """
-    Loads stock and mutual fund data from CSV.
+    Loads the typed stock and mutual fund master, shared read-only by all sessions.
     """
-    return pd.read_csv("data/combined_stocks_yahoo.csv")
+    telemetry.count("load_stock_data.call")
+    with telemetry.span("load_stock_data"):
+        return _load_master()
 
 
-def search_bar_selector(key="search"):
+@st.cache_resource
+def get_price_store():
     """
-    Autocomplete search bar using st.selectbox (native Streamlit behavior).
-    Returns selected stock row as a dictionary or None.
+    Returns the process-wide local price store shared by all pages.
     """
-    df = load_stock_data()
-    df['Display'] = df['Symbol'].astype(str) + " - " + df['Company'].astype(str)
+    return PriceStore()
 
-    selected_display = st.selectbox("🔍 Search Stock / Mutual Fund:", df['Display'].tolist(), key=key)
 
-    if selected_display:
-        selected_row = df[df['Display'] == selected_display]
-        if not selected_row.empty:
-            return selected_row.iloc[0].to_dict()
+@st.cache_resource
+def get_portfolio_store():
+    """
+    Returns the process-wide store of saved portfolios.
+    """
+    from finance_core.portfolio_store import PortfolioStore
+
+    return PortfolioStore()
 
-    return None
 
-def plot_area_chart(df, x_col, y_col, title, y_label, line_color='lime', fill_color='rgba(0, 255, 0, 0.2)'):
+@st.cache_resource
+def get_fx_store():
     """
-    Plots a smooth area chart using Plotly.
+    Returns the process-wide FX rate store used for currency conversion.
     """
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df[x_col],
-        y=df[y_col],
-        fill='tozeroy',
-        mode='lines+markers',
-        line=dict(color=line_color, width=2),
-        fillcolor=fill_color
-    ))
+    from finance_core.fx import FxStore
+
+    return FxStore()
+
+
+@st.cache_resource
+def get_quote_cache():
+    """
+    Returns the process-wide quote and history cache; its background poller
+    refreshes the symbols any session is viewing.
+    """
+    return QuoteCache(get_price_store())
+
+
+@st.cache_resource
+def get_indicator_engine():
+    """
+    Returns the process-wide indicator cache, keyed by (symbol, indicator, params).
+    """
+    from finance_core.indicators import IndicatorEngine
+
+    return IndicatorEngine()
+
 
+@st.cache_resource
+def get_search_index():
+    """
+    Builds the instrument search index once per process.
+    """
+    from finance_core.search_index import SearchIndex
+
+    return SearchIndex(load_stock_data())
+
+
+def search_bar_selector(key="search", max_results=20):
+    """
+    Search box backed by the instrument index; only the top matches are sent
+    to the selectbox. Returns the selected stock row as a dictionary or None.
+    """
+    with telemetry.span("search_index.get"):
+        index = get_search_index()
+
+    query = st.text_input("🔍 Search Stock / Mutual Fund:", key=f"{key}_query")
+    with telemetry.span("search_bar_selector", key=key) as fields:
+        matches = index.search(query, k=max_results)
+        if fields is not None:
+            fields["matches"] = len(matches)
+    if not matches:
+        if query:
+            st.caption("No matching stocks or mutual funds.")
+        return None
+
+    selected_display = st.selectbox("Matches", matches, key=key, label_visibility="collapsed")
+    return index.row(selected_display)
+
+# Most points sent to the browser per trace; longer series are downsampled.
+MAX_CHART_POINTS = 2000
+
+# Above this many source points markers are dropped and WebGL is used.
+MARKER_THRESHOLD = 500
+WEBGL_THRESHOLD = 5000
+
+
+def downsample_minmax(y, max_points=MAX_CHART_POINTS):
+    """
+    Returns sorted row positions that keep the shape of a series within
+    max_points: the minimum and maximum of each of max_points / 2 equal
+    buckets, plus the first and last points, so spikes and dips survive.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max(max_points // 2, 1)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    keep = np.concatenate([[0, n - 1], lows, highs])
+    return np.unique(keep[keep < n])
+
+
+def zoom_window(df, x_col, key):
+    """
+    Date-range slider for series too long to chart at full resolution.
+    The selected window is cut from the full-resolution frame before it is
+    downsampled, so zooming in reveals every point.
+    """
+    if len(df) <= MAX_CHART_POINTS:
+        return df
+
+    first, last = df[x_col].iloc[0].date(), df[x_col].iloc[-1].date()
+    start, end = st.slider("Zoom", min_value=first, max_value=last, value=(first, last), key=key)
+    dates = df[x_col].dt.normalize()
+    return df[(dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))]
+
+
+def plot_area_chart(df, x_col, y_col, title, y_label, line_color='lime', fill_color='rgba(0, 255, 0, 0.2)',
+                    max_points=MAX_CHART_POINTS, overlays=None):
+    """
+    Plots a smooth area chart using Plotly. Long series are downsampled to
+    max_points and drawn with WebGL without markers. `overlays` maps a
+    name to values aligned with df's rows, drawn as lines at the same
+    sampled points (e.g. moving averages).
+    """
+    import plotly.graph_objects as go
+
+    n = len(df)
+    with telemetry.span("figure.build", rows=n) as fields:
+        positions = downsample_minmax(df[y_col].to_numpy(), max_points)
+        trace = go.Scattergl if n > WEBGL_THRESHOLD else go.Scatter
+
+        fig = go.Figure()
+        fig.add_trace(trace(
+            x=df[x_col].iloc[positions],
+            y=df[y_col].iloc[positions],
+            fill='tozeroy',
+            mode='lines' if n > MARKER_THRESHOLD else 'lines+markers',
+            line=dict(color=line_color, width=2),
+            fillcolor=fill_color,
+            name=y_col
+        ))
+        for name, values in (overlays or {}).items():
+            fig.add_trace(trace(
+                x=df[x_col].iloc[positions],
+                y=np.asarray(values)[positions],
+                mode='lines',
+                line=dict(width=1.5),
+                name=name
+            ))
+
+        fig.update_layout(
+            title=title,
+            xaxis_title="Date",
+            yaxis_title=y_label,
+            template="plotly_dark",
+            showlegend=bool(overlays),
+            margin=dict(t=40, l=0, r=0, b=0)
+        )
+        if fields is not None:
+            fields["points"] = len(positions)
+    return fig
+
+
+def plot_line_chart(df, x_col, y_cols, title, y_label, max_points=MAX_CHART_POINTS, height=300):
+    """
+    Plots one line per column in y_cols, each downsampled on its own so
+    every line keeps its peaks and dips. Used for indicator panels such as
+    RSI or MACD and for comparisons.
+    """
+    import plotly.graph_objects as go
+
+    n = len(df)
+    with telemetry.span("figure.build", rows=n, lines=len(y_cols)):
+        trace = go.Scattergl if n > WEBGL_THRESHOLD else go.Scatter
+
+        fig = go.Figure()
+        for col in y_cols:
+            positions = downsample_minmax(df[col].to_numpy(), max_points)
+            fig.add_trace(trace(
+                x=df[x_col].iloc[positions],
+                y=df[col].iloc[positions],
+                mode='lines',
+                line=dict(width=1.5),
+                name=col
+            ))
+        fig.update_layout(
+            title=title,
+            xaxis_title="Date",
+            yaxis_title=y_label,
+            template="plotly_dark",
+            height=height,
+            margin=dict(t=40, l=0, r=0, b=0)
+        )
+    return fig
+
+
+def plot_volume_profile(profile, title, y_label="Price (₹)"):
+    """
+    Horizontal bars of traded volume per price bin, from indicators.volume_profile.
+    """
+    import plotly.graph_objects as go
+
+    mids = (profile["Low"] + profile["High"]) / 2
+    fig = go.Figure(go.Bar(
+        x=profile["Volume"],
+        y=mids,
+        orientation='h',
+        width=(profile["High"] - profile["Low"]) * 0.9,
+        marker_color='lime'
+    ))
     fig.update_layout(
         title=title,
-        xaxis_title="Date",
+        xaxis_title="Volume",
         yaxis_title=y_label,
         template="plotly_dark",
+        height=400,
         margin=dict(t=40, l=0, r=0, b=0)
     )
     return fig
+
+
+def plot_heatmap(frame, title, zmin=-1, zmax=1):
+    """
+    Square heatmap of a labelled matrix such as a correlation matrix.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(
+        z=frame.to_numpy(),
+        x=list(frame.columns),
+        y=list(frame.index),
+        zmin=zmin,
+        zmax=zmax,
+        colorscale='RdBu',
+        reversescale=True
+    ))
+    fig.update_layout(
+        title=title,
+        template="plotly_dark",
+        height=max(300, min(800, 30 * len(frame) + 100)),
+        yaxis=dict(autorange='reversed'),
+        margin=dict(t=40, l=0, r=0, b=0)
+    )
+    return fig
+
+
+def show_chart(fig):
+    """
+    Renders a Plotly figure at full width. With telemetry on, the span also
+    records the serialized payload size sent to the browser.
+    """
+    with telemetry.span("figure.render") as fields:
+        st.plotly_chart(fig, use_container_width=True)
+        if fields is not None:
+            fields["bytes"] = len(fig.to_json())
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from finance_core.risk import risk_report
+
+
+def test_holidays_do_not_dilute_correlation():
+    dates = pd.bdate_range("2022-01-03", periods=600)
+    rng = np.random.default_rng(1)
+    common = rng.normal(0, 0.01, len(dates))
+    a = pd.Series(100 * np.exp(np.cumsum(common)), index=dates)
+    # Same moves on another exchange that is shut every fourth day.
+    b = pd.Series(100 * np.exp(np.cumsum(common + rng.normal(0, 0.003, len(dates)))), index=dates)
+    b = b.drop(dates[::4])
+    holdings = [{"symbol": s, "buy_date": dates[0], "units": 1.0} for s in ["A", "B"]]
+
+    report = risk_report({"A": a, "B": b}, holdings)
+
+    assert report["correlation"].loc["A", "B"] > 0.9
+    vol = report["contributions"]["Volatility"]
+    assert abs(vol["B"] - vol["A"]) / vol["A"] < 0.15
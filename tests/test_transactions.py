@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_core.transactions import TransactionLedger, xirr_many
+
+
+def test_fifo_positions_across_split():
+    ledger = TransactionLedger([
+        {"date": "2020-01-01", "symbol": "A", "type": "buy", "units": 10, "price": 100.0},
+        {"date": "2020-06-01", "symbol": "A", "type": "buy", "units": 10, "price": 200.0},
+        {"date": "2021-01-01", "symbol": "A", "type": "split", "ratio": 2},
+        # 30 post-split units: all 20 from the first lot, 10 (5 pre-split) from the second.
+        {"date": "2021-06-01", "symbol": "A", "type": "sell", "units": 30, "price": 80.0},
+    ])
+    row = ledger.positions({"A": 150.0}).loc["A"]
+
+    assert row["Units"] == pytest.approx(10.0)
+    assert row["Cost Basis"] == pytest.approx(1000.0)
+    assert row["Average Cost"] == pytest.approx(100.0)
+    assert row["Market Value"] == pytest.approx(1500.0)
+    assert row["Unrealized P&L"] == pytest.approx(500.0)
+    assert row["Realized P&L"] == pytest.approx(2400.0 - 2000.0)
+
+
+def test_sell_more_than_held_raises():
+    ledger = TransactionLedger([
+        {"date": "2020-01-01", "symbol": "A", "type": "buy", "units": 5, "price": 10.0},
+        {"date": "2020-02-01", "symbol": "A", "type": "sell", "units": 6, "price": 12.0},
+    ])
+    with pytest.raises(ValueError, match="sells more units than held"):
+        ledger.positions({"A": 12.0})
+
+
+def test_xirr_known_schedule():
+    # 1000 grows to 1100 over 2020, a leap year of 366 days.
+    dates = np.array(["2020-01-01", "2021-01-01"], dtype="datetime64[ns]")
+    rates = xirr_many([(dates, np.array([-1000.0, 1100.0]))])
+    assert rates[0] == pytest.approx(1.1 ** (365 / 366) - 1, abs=1e-9)
+
+
+def test_xirr_uneven_schedule():
+    # Two deposits and a withdrawal, checked by discounting at the result.
+    dates = np.array(["2019-03-01", "2020-07-15", "2022-01-10"], dtype="datetime64[ns]")
+    amounts = np.array([-5000.0, -2000.0, 8200.0])
+    (rate,) = xirr_many([(dates, amounts)])
+    years = (dates - dates[0]) / np.timedelta64(1, "D") / 365.0
+    assert np.sum(amounts / (1 + rate) ** years) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_unpriced_symbol_left_out_of_total():
+    ledger = TransactionLedger([
+        {"date": "2020-01-01", "symbol": "A", "type": "buy", "units": 10, "price": 100.0},
+        {"date": "2020-01-01", "symbol": "B", "type": "buy", "units": 10, "price": 100.0},
+    ])
+    returns = ledger.money_weighted_returns({"A": 1100.0, "B": np.nan}, as_of=pd.Timestamp("2021-01-01"))
+
+    assert np.isnan(returns["B"])
+    assert returns["Total"] == pytest.approx(returns["A"])
+    assert returns["A"] == pytest.approx(1.1 ** (365 / 366) - 1, abs=1e-9)